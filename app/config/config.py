@@ -18,6 +18,7 @@ class Settings(BaseSettings):
     # Configurações do banco de dados
     DATABASE_TYPE: str = "sqlite"
     DATABASE_URL: str = "sqlite:///database/teste_drg.db"
+    DATABASE_INIT_MODE: str = "create_all"  # create_all | migrate | none
 
     # Configurações Oracle
     ORACLE_HOST: str = "localhost"
@@ -48,6 +49,23 @@ class Settings(BaseSettings):
     # Configurações de log
     LOG_LEVEL: str = "INFO"
     LOG_FILE: str = "logs/app.log"
+    LOG_FORMAT: str = "texto"  # texto | json (JSON-lines, um registro por chamada DRG)
+    LOG_MAX_BYTES: int = 52428800  # Rotacionar ao atingir 50 MB (0 = sem limite)
+    LOG_ROTATION_HOURS: float = 24  # Rotacionar a cada N horas (0 = desabilitado)
+    LOG_BACKUP_COUNT: int = 14  # Arquivos rotacionados mantidos
+    LOG_RETENTION_DAYS: float = 14  # Remover arquivos rotacionados mais antigos
+    LOG_COMPRESS: bool = True  # Comprimir arquivos rotacionados com gzip
+    LOG_ASYNC_ENABLED: bool = True  # Fila + thread dedicada para logs da integração DRG
+    LOG_QUEUE_MAX_SIZE: int = 10000  # Limite de registros pendentes na fila
+    LOG_QUEUE_DROP_POLICY: str = "descartar_novos"  # descartar_novos | descartar_antigos
+    LOG_PAYLOAD_MODE: str = "resumido"  # resumido | completo
+    LOG_PAYLOAD_MAX_STRING: int = 256  # Strings maiores viram tamanho + hash no modo resumido
+    LOG_PAYLOAD_MAX_PROFUNDIDADE: int = 8  # Níveis de aninhamento registrados
+    LOG_PAYLOAD_MAX_ITENS: int = 50  # Itens registrados por lista
+    LOG_PAYLOAD_MAX_CARACTERES: int = 65536  # Tamanho máximo de cada payload no log
+    TRACING_ENABLED: bool = False  # Exportar spans das fases do envio de lotes
+    TRACING_EXPORTER: str = "arquivo"  # arquivo | console
+    TRACING_FILE: str = "logs/spans.jsonl"  # OTLP/JSON, um trace por linha
 
     # Configurações de anexos
     ANEXOS_BASE_PATH: Optional[str] = None
@@ -66,11 +84,44 @@ class Settings(BaseSettings):
     MONITOR_PULL_ENABLED: bool = True  # Monitoramento PULL da DRG
     MONITOR_PULL_INTERVAL_MINUTES: int = 5  # Intervalo para buscar retorno
     MONITOR_PULL_MAX_PAGE_SIZE: int = 100  # Máximo de registros por página
+    ESTATISTICAS_CACHE_SEGUNDOS: float = 5  # Cache das contagens usadas pelas rotas de status
+    CONTADORES_GUIAS_ENABLED: bool = False  # Contadores materializados por status
+    CONTADORES_GUIAS_RECONCILIAR_MINUTES: int = 15  # Intervalo da reconciliação
+    GUIAS_LISTAGEM_MAX_LIMIT: int = 1000  # Máximo de guias por página em GET /guias
+    EXPORTACAO_LINHAS_POR_BLOCO: int = 1000  # Linhas lidas do cursor/enviadas por chunk
+    ARQUIVAMENTO_ENABLED: bool = False  # Mover guias finalizadas antigas para o arquivo
+    ARQUIVAMENTO_DIAS: int = 90  # Idade mínima (data_atualizacao) das guias arquivadas
+    ARQUIVAMENTO_LOTE: int = 500  # Guias movidas por transação
+    ARQUIVAMENTO_MAX_LOTES: int = 100  # Lotes por execução (o restante fica para a próxima)
+    ARQUIVAMENTO_PAUSA_MS: int = 200  # Pausa entre lotes
+    ARQUIVAMENTO_INTERVALO_MINUTES: int = 60  # Intervalo entre execuções
+
+    # Eleição de líder: com vários workers só o líder executa os monitores
+    LEADER_ELECTION_ENABLED: bool = True
+    LEADER_LEASE_SECONDS: int = 180  # Validade do lease (failover após expirar; mínimo HTTP_TIMEOUT + 2 x renovação)
+    LEADER_RENEW_SECONDS: int = 10  # Intervalo de renovação/disputa do lease
+
+    # Worker separado (python -m app.worker)
+    API_BACKGROUND_TASKS_ENABLED: bool = True  # False = monitores só no worker
+    WORKER_HEALTH_PORT: int = 8081  # Health check HTTP do worker (0 = desabilitado)
+    WORKER_THREADS: int = 4  # Threads do executor (consultas ao banco, HTTP)
+    WORKER_MAX_MEMORY_MB: int = 0  # Limite de memória do processo (0 = sem limite)
+    WORKER_SHUTDOWN_TIMEOUT_SECONDS: int = 30  # Espera pela parada dos monitores
+
+    # Ingestão de lotes (POST /guias/lote)
+    INGESTAO_MAX_GUIAS: int = 1000  # Máximo de guias por lote
+    INGESTAO_MAX_KB: int = 500  # Tamanho máximo do corpo do lote (413 ao exceder)
+    INGESTAO_NDJSON_COMMIT_SIZE: int = 1000  # Guias por bloco/commit na importação NDJSON
+    INGESTAO_REJEITOS_DIR: str = "logs/importacoes"  # Rejeitos das importações via API
 
     # Configurações para consulta externa de guias
     CONSULTA_EXTERNA_TIMEOUT_MS: int = 30000  # 30 segundos em milissegundos
     CONSULTA_EXTERNA_MAX_TENTATIVAS: int = 3
     CONSULTA_EXTERNA_INTERVALO_MS: int = 60000  # 1 minuto entre tentativas
+    CONSULTA_EXTERNA_CACHE_MAX_ENTRADAS: int = 10000  # Limite de entradas no cache de consultas
+    CONSULTA_EXTERNA_BACKOFF_BASE_MS: int = 500  # Espera inicial entre retentativas imediatas
+    CONSULTA_EXTERNA_FILA_MAX_ITENS: int = 1000  # Limite da fila de retentativas adiadas
+    CONSULTA_EXTERNA_FILA_INTERVALO_SEGUNDOS: int = 30  # Intervalo de verificação da fila
     CONSULTA_EXTERNA_URL: str = (
         "https://api.externa.com/consultar-guia"  # URL padrão da consulta externa
     )
@@ -86,7 +137,12 @@ class Settings(BaseSettings):
     RATE_LIMIT_MONITOR_MINUTES: int = 10
     RATE_LIMIT_CONSULTA_EXTERNA_MINUTES: int = 30
     RATE_LIMIT_CONSULTA_MULTIPLA_MINUTES: int = 10
+    RATE_LIMIT_INGESTAO_MINUTES: int = 10
     RATE_LIMIT_DEFAULT_MINUTES: int = 5
+    RATE_LIMIT_STORAGE_URI: str = "memory://"  # memory:// | sqlite:///arquivo.db | redis://...
+    RATE_LIMIT_IP_PER_HOUR: int = 1000  # Limite global por IP (middleware de segurança)
+    RATE_LIMIT_IP_BLOCK_SECONDS: int = 3600  # Duração do bloqueio ao exceder o limite
+    RATE_LIMIT_IP_MAX_CLIENTES: int = 10000  # IPs acompanhados em memória (LRU)
 
     # Configurações padrão do hospital (valores do .env)
     HOSPITAL_CODIGO_CONTRATADO: str = "5499"
@@ -3,6 +3,7 @@ Configuração do banco de dados para FastAPI
 """
 
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import StaticPool
@@ -20,36 +21,72 @@ engine = None
 SessionLocal = None
 
 
-def init_db():
-    """Inicializa o banco de dados"""
-    global engine, SessionLocal 
-
-    settings = get_settings()
+def criar_engine(settings=None):
+    """Cria o engine conforme DATABASE_TYPE (usado pela aplicação e pelo Alembic)."""
+    settings = settings or get_settings()
 
     # Configurar engine baseado no tipo de banco
     if settings.DATABASE_TYPE == "sqlite":
-        engine = create_engine(
+        # Conexão única só para banco em memória; em arquivo cada thread
+        # (requisições, renovação do lease do líder) usa a sua, senão as
+        # transações de threads diferentes se misturam na mesma conexão
+        opcoes = {}
+        if make_url(settings.DATABASE_URL).database in (None, "", ":memory:"):
+            opcoes["poolclass"] = StaticPool
+        return create_engine(
             settings.DATABASE_URL,
-            poolclass=StaticPool,
             connect_args={"check_same_thread": False},
             echo=settings.DEVELOPMENT,
+            **opcoes,
         )
     elif settings.DATABASE_TYPE == "oracle":
         # Construir URL Oracle (usando SID, não SERVICE_NAME)
         oracle_url = f"oracle+cx_oracle://{settings.ORACLE_USERNAME}:{settings.ORACLE_PASSWORD}@{settings.ORACLE_HOST}:{settings.ORACLE_PORT}/?service_name={settings.ORACLE_SID}"
-        engine = create_engine(oracle_url, echo=settings.DEVELOPMENT)
+        return create_engine(oracle_url, echo=settings.DEVELOPMENT)
     else:
-        engine = create_engine(settings.DATABASE_URL, echo=settings.DEVELOPMENT)
+        return create_engine(settings.DATABASE_URL, echo=settings.DEVELOPMENT)
+
+
+def init_db():
+    """Inicializa o banco de dados"""
+    global engine, SessionLocal
+
+    settings = get_settings()
+    engine = criar_engine(settings)
 
     # Criar session factory
     SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-    # Criar tabelas se não existirem (SQLAlchemy verifica se já existem)
-    Base.metadata.create_all(bind=engine)
+    preparar_esquema(engine, settings.DATABASE_INIT_MODE)
 
     logger.info(f"Banco de dados inicializado: {settings.DATABASE_TYPE}")
 
 
+def preparar_esquema(bind, modo: str):
+    """
+    Prepara o esquema conforme DATABASE_INIT_MODE.
+
+    - create_all: cria as tabelas ausentes a partir dos modelos (com seus
+      índices); não altera tabelas existentes
+    - migrate: aplica as migrações do Alembic pendentes (alembic upgrade head)
+    - none: não verifica o esquema (inicialização rápida; migrações aplicadas
+      fora da aplicação com `alembic upgrade head`)
+    """
+    if modo == "none":
+        return
+
+    if modo == "migrate":
+        from app.database.migracoes import aplicar_migracoes
+
+        aplicar_migracoes(bind)
+        return
+
+    # Criar tabelas se não existirem (SQLAlchemy verifica se já existem).
+    # Tabelas existentes não são alteradas: índices novos em bancos já
+    # existentes vêm das migrações (DDL online, fora da inicialização)
+    Base.metadata.create_all(bind=bind)
+
+
 def get_db() -> Generator[Session, None, None]:
     """Dependency para obter sessão do banco de dados"""
     if SessionLocal is None:
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Migrações do esquema (Alembic)
+
+As revisões ficam em migrations/versions e valem para SQLite, Oracle e
+PostgreSQL. Pela linha de comando:
+
+    alembic upgrade head        # aplicar pendentes
+    alembic current             # revisão atual do banco
+    alembic upgrade head --sql  # gerar o SQL para o DBA (modo offline)
+
+Com DATABASE_INIT_MODE=migrate a aplicação executa o upgrade na inicialização.
+"""
+
+import logging
+import os
+
+from alembic import command
+from alembic.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Raiz do projeto (onde fica o alembic.ini)
+RAIZ_PROJETO = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+
+
+def configuracao_alembic() -> Config:
+    """Configuração do Alembic independente do diretório de trabalho."""
+    config = Config(os.path.join(RAIZ_PROJETO, "alembic.ini"))
+    config.set_main_option(
+        "script_location", os.path.join(RAIZ_PROJETO, "migrations")
+    )
+    return config
+
+
+def aplicar_migracoes(bind):
+    """
+    Aplica as migrações pendentes usando a conexão do engine da aplicação.
+
+    A conexão é entregue sem transação aberta: o env.py controla as
+    transações (uma por revisão), o que permite às revisões saírem da
+    transação para DDL online (CREATE INDEX CONCURRENTLY no PostgreSQL).
+    """
+    config = configuracao_alembic()
+    with bind.connect() as conexao:
+        config.attributes["connection"] = conexao
+        command.upgrade(config, "head")
+    logger.info("✅ Esquema do banco atualizado (alembic upgrade head)")
@@ -0,0 +1,58 @@
+"""
+Middleware de correlation id para rastrear requisições nos logs
+"""
+
+import re
+
+import structlog
+from fastapi import FastAPI
+
+from app.utils.logger import novo_id_correlacao
+
+HEADER_CORRELACAO = "X-Correlation-ID"
+
+# Aceitar apenas ids curtos e sem caracteres de controle vindos do cliente
+_ID_VALIDO = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+
+class CorrelacaoMiddleware:
+    """
+    Define o correlation_id de cada requisição HTTP.
+
+    Usa o header X-Correlation-ID recebido (se válido) ou gera um novo, deixa
+    o valor disponível para os logs via contextvars e o devolve na resposta.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._header_bytes = HEADER_CORRELACAO.lower().encode("latin-1")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        correlation_id = None
+        for nome, valor in scope.get("headers", []):
+            if nome == self._header_bytes:
+                valor = valor.decode("latin-1")
+                if _ID_VALIDO.match(valor):
+                    correlation_id = valor
+                break
+        if correlation_id is None:
+            correlation_id = novo_id_correlacao()
+
+        async def send_com_correlacao(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((self._header_bytes, correlation_id.encode("latin-1")))
+                message["headers"] = headers
+            await send(message)
+
+        with structlog.contextvars.bound_contextvars(correlation_id=correlation_id):
+            await self.app(scope, receive, send_com_correlacao)
+
+
+def setup_correlacao_middleware(app: FastAPI):
+    """Configura o middleware de correlation id"""
+    app.add_middleware(CorrelacaoMiddleware)
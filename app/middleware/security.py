@@ -5,92 +5,194 @@ Implementa proteções básicas contra ataques comuns
 
 import logging
 import time
-from typing import Callable
-from fastapi import Request, Response
+from collections import OrderedDict
+from typing import Optional
+
 from fastapi.responses import JSONResponse
 
+from app.config.config import get_settings
+
 # Logger para segurança
 security_logger = logging.getLogger("security")
 
+# Caminhos sondados por scanners: a requisição é registrada e respondida com 404.
+# Comparados com o path normalizado e com o primeiro segmento dele
+# ("/wp-admin/setup.php" casa com "/wp-admin").
+CAMINHOS_SUSPEITOS = frozenset(
+    {
+        "/login",
+        "/admin",
+        "/wp-admin",
+        "/wp-login.php",
+        "/administrator",
+        "/phpmyadmin",
+        "/.env",
+        "/config",
+        "/backup",
+        "/test",
+        "/api/login",
+        "/api/admin",
+    }
+)
+
+# Health check e métricas: sondados com frequência pela infraestrutura,
+# passam direto sem verificação de caminho nem consumo do limite por IP
+CAMINHOS_ISENTOS = frozenset({"/api/v1/health", "/api/v1/metrics"})
+
+# Resultados da verificação do limitador
+PERMITIDO = "permitido"
+EXCEDIDO = "excedido"  # Esgotou as fichas nesta requisição (passa a ser bloqueado)
+BLOQUEADO = "bloqueado"  # Já estava bloqueado
+
+
+class LimitadorIP:
+    """
+    Rate limit por IP com token bucket e memória limitada.
+
+    Cada IP tem um balde com `capacidade` fichas, repostas continuamente a
+    `capacidade / janela_segundos` fichas por segundo. Ao esgotar as fichas o
+    IP fica bloqueado por `bloqueio_segundos`. No máximo `max_clientes` IPs são
+    mantidos; ao atingir o limite, o IP usado há mais tempo é descartado (LRU).
+
+    Não usa lock: é chamado apenas no event loop, sem pontos de await.
+    """
+
+    __slots__ = (
+        "capacidade",
+        "taxa_reposicao",
+        "bloqueio_segundos",
+        "max_clientes",
+        "_clientes",
+    )
+
+    def __init__(
+        self,
+        capacidade: int,
+        janela_segundos: float,
+        bloqueio_segundos: float,
+        max_clientes: int,
+    ):
+        self.capacidade = capacidade
+        self.taxa_reposicao = capacidade / janela_segundos
+        self.bloqueio_segundos = bloqueio_segundos
+        self.max_clientes = max_clientes
+        # ip -> [fichas, instante da última atualização, bloqueado até]
+        self._clientes: "OrderedDict[str, list]" = OrderedDict()
+
+    def verificar(self, ip: str, agora: Optional[float] = None) -> str:
+        """
+        Consome uma ficha do IP.
+
+        Returns:
+            str: PERMITIDO, EXCEDIDO ou BLOQUEADO
+        """
+        if agora is None:
+            agora = time.monotonic()
+
+        estado = self._clientes.get(ip)
+        if estado is None:
+            estado = [float(self.capacidade), agora, 0.0]
+            self._clientes[ip] = estado
+            if len(self._clientes) > self.max_clientes:
+                self._clientes.popitem(last=False)
+        else:
+            self._clientes.move_to_end(ip)
+
+        if estado[2]:
+            if agora < estado[2]:
+                return BLOQUEADO
+            # Bloqueio expirado: recomeça com o balde cheio
+            estado[0], estado[1], estado[2] = float(self.capacidade), agora, 0.0
+
+        fichas = min(
+            self.capacidade, estado[0] + (agora - estado[1]) * self.taxa_reposicao
+        )
+        estado[1] = agora
+
+        if fichas < 1:
+            estado[0] = fichas
+            estado[2] = agora + self.bloqueio_segundos
+            return EXCEDIDO
+
+        estado[0] = fichas - 1
+        return PERMITIDO
+
+
+def caminho_suspeito(path: str) -> bool:
+    """Verifica o path (sem barra final, minúsculo) e o primeiro segmento dele."""
+    normalizado = path.rstrip("/").lower()
+    if normalizado in CAMINHOS_SUSPEITOS:
+        return True
+
+    fim_segmento = normalizado.find("/", 1)
+    return fim_segmento > 0 and normalizado[:fim_segmento] in CAMINHOS_SUSPEITOS
+
 
 class SecurityMiddleware:
-    """Middleware para proteção contra ataques básicos"""
+    """
+    Middleware ASGI para proteção contra ataques básicos: caminhos suspeitos
+    e rate limit global por IP, em uma única passada sobre o scope.
+    """
 
     def __init__(self, app):
         self.app = app
-        self.suspicious_paths = [
-            "/login",
-            "/admin",
-            "/wp-admin",
-            "/wp-login.php",
-            "/administrator",
-            "/phpmyadmin",
-            "/.env",
-            "/config",
-            "/backup",
-            "/test",
-            "/api/login",
-            "/api/admin",
-        ]
-        self.blocked_ips = set()  # IPs bloqueados temporariamente
-        self.request_counts = {}  # Contador de requisições por IP
+        settings = get_settings()
+        self.limitador = LimitadorIP(
+            capacidade=settings.RATE_LIMIT_IP_PER_HOUR,
+            janela_segundos=3600,
+            bloqueio_segundos=settings.RATE_LIMIT_IP_BLOCK_SECONDS,
+            max_clientes=settings.RATE_LIMIT_IP_MAX_CLIENTES,
+        )
 
     async def __call__(self, scope, receive, send):
-        if scope["type"] == "http":
-            request = Request(scope, receive)
-
-            # Verificar IP bloqueado
-            client_ip = request.client.host
-            if client_ip in self.blocked_ips:
-                response = JSONResponse(
-                    status_code=403,
-                    content={"detail": "Access denied", "reason": "IP blocked"},
-                )
-                await response(scope, receive, send)
-                return
-
-            # Log tentativas suspeitas
-            if request.url.path in self.suspicious_paths:
-                security_logger.warning(
-                    f"🚨 Tentativa suspeita detectada - IP: {client_ip} | "
-                    f"Path: {request.url.path} | User-Agent: {request.headers.get('user-agent', 'Unknown')}"
-                )
-
-                # Bloquear apenas rotas que já retornam 404
-                response = JSONResponse(
-                    status_code=404, content={"detail": "Not found"}
-                )
-                await response(scope, receive, send)
-                return
-
-            # Rate limiting básico (simples)
-            current_time = time.time()
-            if client_ip not in self.request_counts:
-                self.request_counts[client_ip] = {
-                    "count": 0,
-                    "reset_time": current_time + 3600,
-                }  # Reset a cada hora
-
-            # Reset contador se passou 1 hora
-            if current_time > self.request_counts[client_ip]["reset_time"]:
-                self.request_counts[client_ip] = {
-                    "count": 0,
-                    "reset_time": current_time + 3600,
-                }
-
-            # Incrementar contador
-            self.request_counts[client_ip]["count"] += 1
-
-            # Bloquear se muitas requisições (mais de 1000 por hora)
-            if self.request_counts[client_ip]["count"] > 1000:
-                security_logger.warning(f"🚨 Rate limit excedido - IP: {client_ip}")
-                self.blocked_ips.add(client_ip)
-                response = JSONResponse(
-                    status_code=429,
-                    content={"detail": "Too many requests", "retry_after": 3600},
-                )
-                await response(scope, receive, send)
-                return
+        if scope["type"] != "http" or scope["path"] in CAMINHOS_ISENTOS:
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
+
+        # Trabalhar direto no scope ASGI, sem montar um Request por chamada
+        client = scope.get("client")
+        client_ip = client[0] if client else "desconhecido"
+
+        # Log tentativas suspeitas
+        if caminho_suspeito(path):
+            user_agent = "Unknown"
+            for nome, valor in scope.get("headers", []):
+                if nome == b"user-agent":
+                    user_agent = valor.decode("latin-1")
+                    break
+            security_logger.warning(
+                f"🚨 Tentativa suspeita detectada - IP: {client_ip} | "
+                f"Path: {path} | User-Agent: {user_agent}"
+            )
+
+            # Bloquear apenas rotas que já retornam 404
+            response = JSONResponse(status_code=404, content={"detail": "Not found"})
+            await response(scope, receive, send)
+            return
+
+        # Rate limiting por IP (token bucket com bloqueio temporário)
+        situacao = self.limitador.verificar(client_ip)
+        if situacao == BLOQUEADO:
+            response = JSONResponse(
+                status_code=403,
+                content={"detail": "Access denied", "reason": "IP blocked"},
+            )
+            await response(scope, receive, send)
+            return
+
+        if situacao == EXCEDIDO:
+            security_logger.warning(f"🚨 Rate limit excedido - IP: {client_ip}")
+            response = JSONResponse(
+                status_code=429,
+                content={
+                    "detail": "Too many requests",
+                    "retry_after": self.limitador.bloqueio_segundos,
+                },
+            )
+            await response(scope, receive, send)
+            return
 
         await self.app(scope, receive, send)
 
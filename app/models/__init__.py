@@ -2,5 +2,24 @@ from .guias import Guia
 from .anexo import Anexo
 from .procedimento import Procedimento
 from .diagnostico import Diagnostico
+from .contador_guias import ContadorGuias
+from .lideranca import Lideranca
+from .arquivo import (
+    guias_arquivo,
+    anexos_arquivo,
+    procedimentos_arquivo,
+    diagnosticos_arquivo,
+)
 
-__all__ = ['Guia', 'Anexo', 'Procedimento', 'Diagnostico']
\ No newline at end of file
+__all__ = [
+    'Guia',
+    'Anexo',
+    'Procedimento',
+    'Diagnostico',
+    'ContadorGuias',
+    'Lideranca',
+    'guias_arquivo',
+    'anexos_arquivo',
+    'procedimentos_arquivo',
+    'diagnosticos_arquivo',
+]
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Date, ForeignKey
+from sqlalchemy import Column, Integer, String, Date, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.database.database import Base
 
@@ -7,6 +7,10 @@ class Anexo(Base):
     """Modelo para anexos das guias."""
 
     __tablename__ = "inovemed_tbl_anexos"
+    __table_args__ = (
+        # Carga dos filhos de cada guia (selectin/lazy load por guia_id)
+        Index("ix_anexos_guia_id", "guia_id"),
+    )
 
     # Campos principais
     id = Column(Integer, primary_key=True)
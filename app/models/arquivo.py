@@ -0,0 +1,70 @@
+"""
+Tabelas de arquivo das guias finalizadas
+
+Cópias das tabelas de guias e filhos, com as mesmas colunas, para onde o
+arquivamento move as guias finalizadas antigas (ver arquivamento_service).
+São tabelas sem modelo ORM e sem chaves estrangeiras: os dados só são
+inseridos em lote e lidos pela consulta de histórico, e os ids originais são
+preservados para que a guia continue acessível pelo mesmo id.
+"""
+
+from sqlalchemy import Column, DateTime, Index, Table
+
+from app.database.database import Base
+from .anexo import Anexo
+from .diagnostico import Diagnostico
+from .guias import Guia
+from .procedimento import Procedimento
+
+
+def _copiar_colunas(origem: Table) -> list:
+    """Mesmas colunas e tipos da tabela de origem, sem FKs, defaults e índices."""
+    return [
+        Column(
+            coluna.name,
+            coluna.type,
+            primary_key=coluna.primary_key,
+            nullable=coluna.nullable,
+            autoincrement=False,
+        )
+        for coluna in origem.columns
+    ]
+
+
+guias_arquivo = Table(
+    "inovemed_tbl_guias_arq",
+    Base.metadata,
+    *_copiar_colunas(Guia.__table__),
+    Column("data_arquivamento", DateTime, nullable=False),
+    Index("ix_guias_arq_numero_guia", "numero_guia", unique=True),
+    # Exportação do histórico por janela de atualização
+    Index("ix_guias_arq_dt_atualizacao", "data_atualizacao"),
+)
+
+anexos_arquivo = Table(
+    "inovemed_tbl_anexos_arq",
+    Base.metadata,
+    *_copiar_colunas(Anexo.__table__),
+    Index("ix_anexos_arq_guia_id", "guia_id"),
+)
+
+procedimentos_arquivo = Table(
+    "inovemed_tbl_procedimentos_arq",
+    Base.metadata,
+    *_copiar_colunas(Procedimento.__table__),
+    Index("ix_procedimentos_arq_guia_id", "guia_id"),
+)
+
+diagnosticos_arquivo = Table(
+    "inovemed_tbl_diagnosticos_arq",
+    Base.metadata,
+    *_copiar_colunas(Diagnostico.__table__),
+    Index("ix_diagnosticos_arq_guia_id", "guia_id"),
+)
+
+# Tabela quente -> tabela de arquivo (filhos antes da guia na exclusão)
+TABELAS_FILHAS_ARQUIVO = (
+    (Anexo.__table__, anexos_arquivo),
+    (Procedimento.__table__, procedimentos_arquivo),
+    (Diagnostico.__table__, diagnosticos_arquivo),
+)
@@ -0,0 +1,35 @@
+from sqlalchemy import Column, Integer, String, DateTime, UniqueConstraint
+from app.database.database import Base
+from datetime import datetime
+
+
+class ContadorGuias(Base):
+    """Contadores materializados de guias por combinação de status."""
+
+    __tablename__ = "inovemed_tbl_contadores_guias"
+    __table_args__ = (
+        UniqueConstraint(
+            "tp_status",
+            "status_consulta",
+            "status_monitoramento",
+            name="uq_contadores_guias_status",
+        ),
+    )
+
+    # Campos principais
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    tp_status = Column(String(1), nullable=False)  # A/P/T/E
+    status_consulta = Column(String(1), nullable=False)  # P/C/R
+    status_monitoramento = Column(String(1), nullable=False)  # N/M/F
+    quantidade = Column(Integer, nullable=False, default=0)
+
+    # Campos de controle
+    data_atualizacao = Column(
+        DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
+
+    def __repr__(self):
+        return (
+            f"<ContadorGuias {self.tp_status}/{self.status_consulta}/"
+            f"{self.status_monitoramento}={self.quantidade}>"
+        )
@@ -7,6 +7,7 @@ from sqlalchemy import (
     Boolean,
     ForeignKey,
     Date,
+    Index,
 )
 from sqlalchemy.orm import relationship
 from app.database.database import Base
@@ -17,6 +18,26 @@ class Guia(Base):
     """Modelo para guias de internação"""
 
     __tablename__ = "inovemed_tbl_guias"
+    __table_args__ = (
+        # Listagem por status paginada por id (keyset: tp_status = ? AND id > ?)
+        # e busca de pendentes do monitor de envio (tp_status = 'A'/'E')
+        Index("ix_guias_tp_status_id", "tp_status", "id"),
+        # Monitor PULL: transmitidas (tp_status = 'T') desde data_processamento
+        Index("ix_guias_tp_status_dt_proc", "tp_status", "data_processamento"),
+        # Contagens por status (GROUP BY coberto pelo índice)
+        Index(
+            "ix_guias_status",
+            "tp_status",
+            "status_consulta",
+            "status_monitoramento",
+        ),
+        # Monitor de campos: guias em monitoramento (status_monitoramento = 'M')
+        Index("ix_guias_status_monitoramento", "status_monitoramento"),
+        # Consultas recentes (data_ultima_consulta >= ontem)
+        Index("ix_guias_dt_ultima_consulta", "data_ultima_consulta"),
+        # Exportação por janela de atualização
+        Index("ix_guias_data_atualizacao", "data_atualizacao"),
+    )
 
     # Campos principais
     id = Column(Integer, primary_key=True, autoincrement=True)
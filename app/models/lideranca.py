@@ -0,0 +1,24 @@
+from sqlalchemy import Column, String, DateTime
+from app.database.database import Base
+from datetime import datetime
+
+
+class Lideranca(Base):
+    """Lease de liderança: apenas o worker dono executa as tarefas em segundo plano."""
+
+    __tablename__ = "inovemed_tbl_lideranca"
+
+    # Nome do papel disputado (ex.: "monitores")
+    nome = Column(String(50), primary_key=True)
+
+    # Worker que detém o lease (host:pid:sufixo) e validade do lease
+    dono = Column(String(120), nullable=False)
+    expira_em = Column(DateTime, nullable=False)
+
+    # Campos de controle
+    data_atualizacao = Column(
+        DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
+
+    def __repr__(self):
+        return f"<Lideranca {self.nome}={self.dono} até {self.expira_em}>"
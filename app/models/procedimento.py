@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Numeric, ForeignKey
+from sqlalchemy import Column, Integer, String, Numeric, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.database.database import Base
 
@@ -7,6 +7,10 @@ class Procedimento(Base):
     """Modelo para procedimentos das guias."""
 
     __tablename__ = "inovemed_tbl_procedimentos"
+    __table_args__ = (
+        # Carga dos filhos de cada guia (selectin/lazy load por guia_id)
+        Index("ix_procedimentos_guia_id", "guia_id"),
+    )
 
     # Campos principais
     id = Column(Integer, primary_key=True)
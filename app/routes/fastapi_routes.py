@@ -4,20 +4,19 @@ Rotas FastAPI para o sistema DRG
 """
 
 from fastapi import APIRouter, Depends, HTTPException, Query, Path, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime
 import asyncio
 import logging
-
-# Rate limiting
-from slowapi import Limiter
-from slowapi.util import get_remote_address
+import os
 
 from app.database.database import get_db
 from app.models import Guia, Anexo, Procedimento, Diagnostico
 from app.schemas.guia_schema import (
+    CAMPOS_PUBLICOS_GUIA,
     GuiaResponseSchema,
     EntradaSchema,
 )
@@ -37,10 +36,29 @@ from app.schemas.consulta_externa_schema import (
 from app.services.drg_service import DRGService
 from app.services.guia_service import GuiaService
 from app.services.monitor_service import monitor_service
-from app.services.consulta_externa_service import ConsultaExternaService
+from app.services.consulta_externa_service import (
+    ConsultaExternaService,
+    cache_consulta_externa,
+    fila_retentativa_consulta,
+)
 from app.services.monitor_campos_service import MonitorCamposService
+from app.services.estatisticas_service import estatisticas_service
+from app.services.ingestao_service import ImportacaoNDJSON, ingestao_service
+from app.services.exportacao_service import (
+    CAMPOS_PADRAO as CAMPOS_EXPORTACAO,
+    FORMATOS as FORMATOS_EXPORTACAO,
+    exportacao_service,
+)
 from app.services.monitor_pull_service import monitor_pull_service
+from app.services.lideranca_service import lideranca_service
+from app.services.arquivamento_service import arquivamento_service
+from app.services.tarefas_service import tarefas_service
 from app.config.config import get_settings
+from app.utils.logger import drg_logger
+from app.utils import metricas
+from app.utils.rate_limit import limiter
+from app.utils.corpo_limitado import corpo_json_limitado
+from app.utils.json_rapido import RespostaJSON
 
 # Configurar logging
 logger = logging.getLogger(__name__)
@@ -48,8 +66,10 @@ logger = logging.getLogger(__name__)
 # Criar router
 router = APIRouter()
 
-# Rate limiter para as rotas
-limiter = Limiter(key_func=get_remote_address)
+# Colunas de GuiaResponseSchema, lidas direto do banco na listagem de guias
+COLUNAS_LISTAGEM = tuple(
+    getattr(Guia, campo) for campo in GuiaResponseSchema.model_fields
+)
 
 
 @router.get("/health", response_model=dict)
@@ -75,16 +95,32 @@ async def health_check(request: Request):
         )
 
 
+@router.get("/metrics", include_in_schema=False)
+def metricas_prometheus():
+    """Métricas da integração no formato Prometheus."""
+    if not metricas.PROMETHEUS_DISPONIVEL:
+        raise HTTPException(
+            status_code=503, detail="prometheus_client não está instalado"
+        )
+
+    return Response(
+        content=metricas.gerar_metricas(),
+        headers={"Content-Type": metricas.CONTENT_TYPE_LATEST},
+    )
+
+
 @router.get("/status", response_model=dict)
 @limiter.limit(f"{get_settings().RATE_LIMIT_DEFAULT_MINUTES * 6}/minute")
 async def system_status(request: Request, db: Session = Depends(get_db)):
     """Retorna status do sistema."""
     try:
-        # Contar guias por status
-        total_guias = db.query(Guia).count()
-        aguardando = db.query(Guia).filter(Guia.tp_status == "A").count()
-        transmitidas = db.query(Guia).filter(Guia.tp_status == "T").count()
-        com_erro = db.query(Guia).filter(Guia.tp_status == "E").count()
+        # Contar guias por status (consulta agregada única, em cache)
+        contagens = estatisticas_service.obter_contagens(db)
+        por_status = contagens["por_tp_status"]
+        total_guias = contagens["total"]
+        aguardando = por_status.get("A", 0)
+        transmitidas = por_status.get("T", 0)
+        com_erro = por_status.get("E", 0)
 
         # Status do DRG
         drg_service = DRGService()
@@ -128,52 +164,272 @@ async def system_status(request: Request, db: Session = Depends(get_db)):
 async def listar_guias(
     request: Request,
     status: Optional[str] = Query(None, description="Filtrar por status"),
-    limit: int = Query(50, ge=1, le=100, description="Limite de resultados"),
-    offset: int = Query(0, ge=0, description="Offset para paginação"),
+    limit: int = Query(
+        50,
+        ge=1,
+        le=get_settings().GUIAS_LISTAGEM_MAX_LIMIT,
+        description="Limite de resultados",
+    ),
+    offset: int = Query(
+        0, ge=0, description="Offset para paginação (prefira apos_id em tabelas grandes)"
+    ),
+    apos_id: Optional[int] = Query(
+        None,
+        ge=0,
+        description="Cursor: retorna as guias com id maior (valor de X-Proximo-Cursor)",
+    ),
+    campos: Optional[str] = Query(
+        None,
+        description="Colunas públicas a retornar, separadas por vírgula (padrão: resumo da guia)",
+    ),
     db: Session = Depends(get_db),
 ):
-    """Lista todas as guias com filtros opcionais."""
-    try:
-        # Query base
-        query = db.query(Guia)
+    """
+    Lista todas as guias com filtros opcionais.
 
-        # Aplicar filtros
-        if status:
-            query = query.filter(Guia.tp_status == status.upper())
+    Lê apenas as colunas pedidas (por padrão as de GuiaResponseSchema) e
+    serializa as linhas direto para bytes, sem montar entidades ORM. `campos`
+    aceita apenas colunas de CAMPOS_PUBLICOS_GUIA (400 para as demais).
 
-        # Paginação
-        query = query.offset(offset).limit(limit)
+    Paginação por cursor: quando a página vem cheia, o cabeçalho
+    X-Proximo-Cursor traz o id a passar em `apos_id` na próxima chamada. O
+    custo de cada página independe da posição na tabela (ao contrário de
+    `offset`).
+    """
+    colunas = _colunas_listagem(campos)
+
+    try:
+        query = _consulta_listagem(colunas, status, apos_id, offset, limit)
 
         # Executar query
-        guias = query.all()
+        linhas = [dict(linha) for linha in db.execute(query).mappings()]
 
-        return guias
+        headers = {}
+        if len(linhas) == limit:
+            headers["X-Proximo-Cursor"] = str(linhas[-1]["id"])
+
+        return RespostaJSON(linhas, headers=headers)
 
     except Exception as e:
         logger.error(f"Erro ao listar guias: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _consulta_listagem(
+    colunas: tuple,
+    status: Optional[str],
+    apos_id: Optional[int],
+    offset: int,
+    limit: int,
+):
+    """SELECT da listagem de guias (ordenada por id para paginação estável)."""
+    query = select(*colunas).order_by(Guia.id)
+
+    # Aplicar filtros
+    if status:
+        query = query.where(Guia.tp_status == status.upper())
+
+    # Paginação
+    if apos_id is not None:
+        query = query.where(Guia.id > apos_id)
+    elif offset:
+        query = query.offset(offset)
+    return query.limit(limit)
+
+
+def _colunas_listagem(campos: Optional[str]) -> tuple:
+    """
+    Colunas pedidas em `campos` (id sempre incluído, para o cursor).
+
+    Só são aceitas colunas de CAMPOS_PUBLICOS_GUIA.
+    """
+    if not campos:
+        return COLUNAS_LISTAGEM
+
+    nomes = [nome.strip() for nome in campos.split(",") if nome.strip()]
+    nao_permitidos = [nome for nome in nomes if nome not in CAMPOS_PUBLICOS_GUIA]
+    if nao_permitidos:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Campos não permitidos: {', '.join(nao_permitidos)}",
+        )
+
+    if "id" not in nomes:
+        nomes.insert(0, "id")
+    return tuple(Guia.__table__.columns[nome] for nome in dict.fromkeys(nomes))
+
+
+@router.post("/guias/lote", response_model=dict)
+@limiter.limit(f"{get_settings().RATE_LIMIT_INGESTAO_MINUTES}/minute")
+def ingerir_lote_guias(
+    request: Request,
+    payload=Depends(corpo_json_limitado(get_settings().INGESTAO_MAX_KB)),
+    db: Session = Depends(get_db),
+):
+    """
+    Ingere um lote de guias (mesmo formato enviado à DRG).
+
+    O corpo é limitado a INGESTAO_MAX_KB (413 ao exceder), verificado nos
+    bytes recebidos antes do parse do JSON.
+
+    Cada guia é validada individualmente; guias inválidas não impedem a
+    gravação das demais. Guias cujo numero_guia já existe são ignoradas
+    (status "existente"), portanto reenviar o mesmo lote é seguro.
+    """
+    try:
+        resultado = ingestao_service.ingerir_lote(db, payload)
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Erro na ingestão do lote: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail={"sucesso": False, "erro": f"Erro interno: {str(e)}"},
+        )
+
+    if "erro" in resultado:
+        raise HTTPException(status_code=400, detail=resultado)
+
+    return resultado
+
+
+@router.post("/guias/importar", response_model=dict)
+@limiter.limit(f"{get_settings().RATE_LIMIT_INGESTAO_MINUTES}/minute")
+async def importar_guias_ndjson(request: Request, db: Session = Depends(get_db)):
+    """
+    Importa guias em NDJSON (uma guia por linha, mesmo formato de loteGuias).
+
+    Para cargas iniciais e migrações: o corpo é lido em streaming e gravado
+    em blocos de INGESTAO_NDJSON_COMMIT_SIZE, sem o limite de tamanho do lote.
+    Guias rejeitadas vão para um arquivo em INGESTAO_REJEITOS_DIR; a resposta
+    traz só o nome do arquivo, nunca o caminho no servidor. Os anexos seguem
+    a mesma validação do lote (caminhoDocumento dentro de ANEXOS_BASE_PATH).
+    """
+    settings = get_settings()
+    importacao = ImportacaoNDJSON(
+        db,
+        arquivo_rejeitos=os.path.join(
+            settings.INGESTAO_REJEITOS_DIR,
+            f"rejeitos_{datetime.utcnow().strftime('%Y%m%d_%H%M%S_%f')}.ndjson",
+        ),
+    )
+
+    try:
+        async for parte in request.stream():
+            if importacao.alimentar(parte):
+                await asyncio.to_thread(importacao.descarregar)
+        return _resumo_importacao(await asyncio.to_thread(importacao.finalizar))
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Erro na importação NDJSON: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail={
+                **_resumo_importacao(importacao.resumo()),
+                "sucesso": False,
+                "erro": str(e),
+            },
+        )
+
+
+def _resumo_importacao(resumo: dict) -> dict:
+    """Resumo da importação sem o caminho do arquivo de rejeitos no servidor."""
+    if resumo.get("arquivo_rejeitos"):
+        resumo["arquivo_rejeitos"] = os.path.basename(resumo["arquivo_rejeitos"])
+    return resumo
+
+
+@router.get("/guias/export")
+@limiter.limit(f"{get_settings().RATE_LIMIT_DEFAULT_MINUTES}/minute")
+async def exportar_guias(
+    request: Request,
+    formato: str = Query("csv", description="csv ou ndjson"),
+    status: Optional[str] = Query(None, description="Filtrar por tp_status"),
+    situacao_guia: Optional[str] = Query(None, description="Filtrar por situação"),
+    status_consulta: Optional[str] = Query(None, description="Filtrar por status_consulta"),
+    status_monitoramento: Optional[str] = Query(
+        None, description="Filtrar por status_monitoramento"
+    ),
+    atualizado_desde: Optional[datetime] = Query(
+        None, description="data_atualizacao >= (ISO 8601)"
+    ),
+    atualizado_ate: Optional[datetime] = Query(
+        None, description="data_atualizacao < (ISO 8601)"
+    ),
+    campos: Optional[str] = Query(
+        None,
+        description="Colunas públicas separadas por vírgula (padrão: estado de processamento)",
+    ),
+    arquivadas: bool = Query(
+        False, description="Exportar o histórico de guias finalizadas arquivadas"
+    ),
+):
+    """
+    Exporta guias e seu estado de processamento em CSV ou NDJSON.
+
+    A resposta é enviada em streaming (chunked) a partir de um cursor no
+    servidor, com memória constante independentemente do número de guias.
+    Com `arquivadas=true` exporta as guias movidas para o arquivo. `campos`
+    aceita apenas colunas de CAMPOS_PUBLICOS_GUIA, como na listagem.
+    """
+    formato = formato.lower()
+    if formato not in FORMATOS_EXPORTACAO:
+        raise HTTPException(
+            status_code=400, detail="Formato deve ser 'csv' ou 'ndjson'"
+        )
+
+    if campos:
+        nomes = [coluna.name for coluna in _colunas_listagem(campos)]
+    else:
+        nomes = list(CAMPOS_EXPORTACAO)
+    query = exportacao_service.montar_consulta(
+        nomes,
+        {
+            "status": status,
+            "situacao_guia": situacao_guia,
+            "status_consulta": status_consulta,
+            "status_monitoramento": status_monitoramento,
+        },
+        atualizado_desde,
+        atualizado_ate,
+        arquivadas,
+    )
+
+    prefixo = "guias_arquivadas" if arquivadas else "guias"
+    nome_arquivo = f"{prefixo}_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.{formato}"
+    return StreamingResponse(
+        exportacao_service.exportar(query, nomes, formato),
+        media_type=(
+            "text/csv" if formato == "csv" else "application/x-ndjson"
+        ),
+        headers={"Content-Disposition": f'attachment; filename="{nome_arquivo}"'},
+    )
+
+
 @router.get("/guias/{guia_id}", response_model=dict)
 async def consultar_guia(
     guia_id: int = Path(..., description="ID da guia"), db: Session = Depends(get_db)
 ):
-    """Consulta uma guia específica com todos os dados."""
+    """Consulta uma guia específica com todos os dados (inclusive arquivada)."""
     try:
         # Buscar guia
         guia = db.query(Guia).filter(Guia.id == guia_id).first()
+        arquivada = guia is None
 
-        if not guia:
-            raise HTTPException(status_code=404, detail="Guia não encontrada")
-
-        # Buscar relacionamentos
-        anexos = db.query(Anexo).filter(Anexo.guia_id == guia_id).all()
-        procedimentos = (
-            db.query(Procedimento).filter(Procedimento.guia_id == guia_id).all()
-        )
-        diagnosticos = (
-            db.query(Diagnostico).filter(Diagnostico.guia_id == guia_id).all()
-        )
+        if guia:
+            # Buscar relacionamentos
+            anexos = db.query(Anexo).filter(Anexo.guia_id == guia_id).all()
+            procedimentos = (
+                db.query(Procedimento).filter(Procedimento.guia_id == guia_id).all()
+            )
+            diagnosticos = (
+                db.query(Diagnostico).filter(Diagnostico.guia_id == guia_id).all()
+            )
+        else:
+            # Guias finalizadas antigas ficam na tabela de arquivo
+            historico = arquivamento_service.buscar_guia(db, guia_id=guia_id)
+            if not historico:
+                raise HTTPException(status_code=404, detail="Guia não encontrada")
+            guia, anexos, procedimentos, diagnosticos = historico
 
         # Montar resposta completa
         result = {
@@ -194,6 +450,7 @@ async def consultar_guia(
             "diagnosticos": [
                 {"id": d.id, "codigo": d.codigo, "tipo": d.tipo} for d in diagnosticos
             ],
+            "arquivada": arquivada,
         }
 
         return {"success": True, "data": result}
@@ -368,24 +625,26 @@ async def renovar_token():
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _consulta_guias_com_erro():
+    """SELECT das guias com erro após 2+ tentativas (até 10)."""
+    return select(Guia).where(Guia.tp_status == "E", Guia.tentativas >= 2).limit(10)
+
+
 @router.get("/monitoramento", response_model=dict)
 async def monitoramento(db: Session = Depends(get_db)):
     """Retorna informações de monitoramento do sistema."""
     try:
-        # Estatísticas gerais
-        total_guias = db.query(Guia).count()
-        aguardando = db.query(Guia).filter(Guia.tp_status == "A").count()
-        processando = db.query(Guia).filter(Guia.tp_status == "P").count()
-        transmitidas = db.query(Guia).filter(Guia.tp_status == "T").count()
-        com_erro = db.query(Guia).filter(Guia.tp_status == "E").count()
+        # Estatísticas gerais (consulta agregada única, em cache)
+        contagens = estatisticas_service.obter_contagens(db)
+        por_status = contagens["por_tp_status"]
+        total_guias = contagens["total"]
+        aguardando = por_status.get("A", 0)
+        processando = por_status.get("P", 0)
+        transmitidas = por_status.get("T", 0)
+        com_erro = por_status.get("E", 0)
 
         # Guias com erro recente
-        guias_erro = (
-            db.query(Guia)
-            .filter(Guia.tp_status == "E", Guia.tentativas >= 2)
-            .limit(10)
-            .all()
-        )
+        guias_erro = db.scalars(_consulta_guias_com_erro()).all()
 
         # Status DRG
         drg_service = DRGService()
@@ -420,6 +679,8 @@ async def monitoramento(db: Session = Depends(get_db)):
                     "has_token", False
                 ),
             },
+            "logging": drg_logger.estatisticas(),
+            "lideranca": lideranca_service.estado(),
         }
 
     except Exception as e:
@@ -461,6 +722,14 @@ async def start_monitoring():
     Inicia o monitoramento automático da tabela.
     """
     try:
+        if not tarefas_service.pode_iniciar_manualmente():
+            return {
+                "success": False,
+                "message": "Monitoramento roda apenas no worker líder",
+                "lideranca": lideranca_service.estado(),
+                "timestamp": datetime.utcnow().isoformat(),
+            }
+
         await monitor_service.start_monitoring()
         return {
             "success": True,
@@ -524,6 +793,7 @@ async def consultar_guia_externa(
             db=db,
             numero_guia=consulta_request.numero_guia,
             data_ultima_atualizacao=consulta_request.data_ultima_atualizacao,
+            retentativas_imediatas=False,
         )
 
         return ConsultaExternaResponseSchema(
@@ -608,9 +878,12 @@ async def obter_status_consulta(
         guia = db.query(Guia).filter(Guia.numero_guia == numero_guia).first()
 
         if not guia:
-            raise HTTPException(
-                status_code=404, detail=f"Guia {numero_guia} não encontrada"
-            )
+            historico = arquivamento_service.buscar_guia(db, numero_guia=numero_guia)
+            if not historico:
+                raise HTTPException(
+                    status_code=404, detail=f"Guia {numero_guia} não encontrada"
+                )
+            guia = historico.guia
 
         # Parse dos dados retornados se existirem
         dados_retornados = None
@@ -645,19 +918,16 @@ async def obter_estatisticas_consulta_externa(db: Session = Depends(get_db)):
     informações úteis para monitoramento.
     """
     try:
-        # Contar guias por status de consulta
-        total_guias = db.query(Guia).count()
-        pendentes = db.query(Guia).filter(Guia.status_consulta == "P").count()
-        consultadas = db.query(Guia).filter(Guia.status_consulta == "C").count()
-        retornadas = db.query(Guia).filter(Guia.status_consulta == "R").count()
+        # Contar guias por status de consulta (consulta agregada única, em cache)
+        contagens = estatisticas_service.obter_contagens(db)
+        por_status = contagens["por_status_consulta"]
+        total_guias = contagens["total"]
+        pendentes = por_status.get("P", 0)
+        consultadas = por_status.get("C", 0)
+        retornadas = por_status.get("R", 0)
 
         # Guias com consulta recente (últimas 24h)
-        from datetime import datetime, timedelta
-
-        ontem = datetime.utcnow() - timedelta(days=1)
-        consultas_recentes = (
-            db.query(Guia).filter(Guia.data_ultima_consulta >= ontem).count()
-        )
+        consultas_recentes = contagens["consultas_recentes_24h"]
 
         # URLs mais utilizadas (removido - agora é configuração global)
         return {
@@ -669,10 +939,13 @@ async def obter_estatisticas_consulta_externa(db: Session = Depends(get_db)):
                 "retornadas": retornadas,
                 "consultas_recentes_24h": consultas_recentes,
             },
+            "cache": cache_consulta_externa.estatisticas(),
+            "fila_retentativas": fila_retentativa_consulta.estatisticas(),
             "configuracoes": {
                 "timeout_ms": get_settings().CONSULTA_EXTERNA_TIMEOUT_MS,
                 "intervalo_ms": get_settings().CONSULTA_EXTERNA_INTERVALO_MS,
                 "max_tentativas": get_settings().CONSULTA_EXTERNA_MAX_TENTATIVAS,
+                "backoff_base_ms": get_settings().CONSULTA_EXTERNA_BACKOFF_BASE_MS,
                 "url_consulta_externa": get_settings().CONSULTA_EXTERNA_URL,
             },
         }
@@ -808,6 +1081,14 @@ async def iniciar_monitoramento_campos():
                 "timestamp": datetime.utcnow().isoformat(),
             }
 
+        if not tarefas_service.pode_iniciar_manualmente():
+            return {
+                "sucesso": False,
+                "mensagem": "Monitoramento roda apenas no worker líder",
+                "lideranca": lideranca_service.estado(),
+                "timestamp": datetime.utcnow().isoformat(),
+            }
+
         # Iniciar monitoramento contínuo em background
         import asyncio
 
@@ -946,6 +1227,14 @@ async def iniciar_monitoramento_pull():
                 "timestamp": datetime.utcnow().isoformat(),
             }
 
+        if not tarefas_service.pode_iniciar_manualmente():
+            return {
+                "sucesso": False,
+                "mensagem": "Monitoramento roda apenas no worker líder",
+                "lideranca": lideranca_service.estado(),
+                "timestamp": datetime.utcnow().isoformat(),
+            }
+
         # Iniciar monitoramento
         await monitor_pull_service.iniciar_monitoramento_pull()
 
@@ -1000,3 +1289,70 @@ async def parar_monitoramento_pull():
                 "timestamp": datetime.utcnow().isoformat(),
             },
         )
+
+
+@router.get("/arquivamento/status", response_model=dict)
+async def obter_status_arquivamento(db: Session = Depends(get_db)):
+    """
+    Obtém a configuração e a última execução do arquivamento de guias finalizadas.
+    """
+    try:
+        return {
+            **arquivamento_service.obter_status(db),
+            "timestamp": datetime.utcnow().isoformat(),
+        }
+
+    except Exception as e:
+        logger.error(f"Erro ao obter status do arquivamento: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/arquivamento/executar", response_model=dict)
+@limiter.limit(f"{get_settings().RATE_LIMIT_MONITOR_MINUTES}/minute")
+async def executar_arquivamento(request: Request):
+    """
+    Executa manualmente uma rodada do arquivamento de guias finalizadas.
+
+    Move até ARQUIVAMENTO_MAX_LOTES lotes; se `restantes` vier true, ainda há
+    guias elegíveis para as próximas execuções. Retorna 409 se o arquivamento
+    estiver desabilitado, se este worker não for o líder ou se já houver uma
+    execução em andamento.
+    """
+    if not arquivamento_service.habilitado:
+        raise HTTPException(
+            status_code=409,
+            detail={"sucesso": False, "erro": "Arquivamento desabilitado"},
+        )
+    if not tarefas_service.pode_iniciar_manualmente():
+        raise HTTPException(
+            status_code=409,
+            detail={
+                "sucesso": False,
+                "erro": "Arquivamento roda apenas no worker líder",
+                "lideranca": lideranca_service.estado(),
+            },
+        )
+
+    try:
+        resultado = await asyncio.to_thread(
+            arquivamento_service.arquivar, aguardar=False
+        )
+    except Exception as e:
+        logger.error(f"Erro ao executar arquivamento: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "sucesso": False,
+                "erro": f"Erro interno: {str(e)}",
+                "timestamp": datetime.utcnow().isoformat(),
+            },
+        )
+
+    if not resultado["sucesso"]:
+        raise HTTPException(status_code=409, detail=resultado)
+
+    return {
+        **resultado,
+        "mensagem": f"{resultado['arquivadas']} guias arquivadas",
+        "timestamp": datetime.utcnow().isoformat(),
+    }
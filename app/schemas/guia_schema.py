@@ -1,45 +1,98 @@
 from pydantic import BaseModel, Field, field_validator, model_validator
 from datetime import datetime, date
+from pathlib import Path, PurePosixPath, PureWindowsPath
 from typing import List, Optional, Union
 from decimal import Decimal
 
+from app.config.config import get_settings
+
 
 class AnexoSchema(BaseModel):
-    """Schema para validação de anexos."""
-
-    numero_lote_documento: str = Field(..., min_length=1, max_length=20)
-    numero_protocolo_documento: str = Field(..., min_length=1, max_length=20)
-    formato_documento: str = Field(..., pattern=r"^(PDF|JPG|PNG|DOC)$")
-    sequencial_documento: str = Field(..., min_length=1, max_length=10)
-    data_criacao: date
-    nome: str = Field(..., min_length=1, max_length=255)
-    caminho_documento: str = Field(..., min_length=1, max_length=500)
-    observacao_documento: Optional[str] = Field(None, max_length=500)
-    tipo_documento: str = Field(..., min_length=1, max_length=2)
+    """Schema para validação de anexos (limites das colunas de inovemed_tbl_anexos)."""
+
+    numero_lote_documento: Optional[str] = Field(
+        None, max_length=12, alias="numeroLoteDocumento"
+    )
+    numero_protocolo_documento: Optional[str] = Field(
+        None, max_length=12, alias="numeroProtocoloDocumento"
+    )
+    # 1=PDF, 2=DOC, 3=XLS, 4=JPG, 5=PNG, 99=Outros
+    formato_documento: str = Field(
+        ..., pattern=r"^([1-5]|99)$", alias="formatoDocumento"
+    )
+    sequencial_documento: Optional[int] = Field(
+        None, ge=1, alias="sequencialDocumento"
+    )
+    data_criacao: date = Field(alias="dataCriacao")
+    nome: str = Field(..., min_length=1, max_length=500)
+    caminho_documento: str = Field(
+        ..., min_length=1, max_length=500, alias="caminhoDocumento"
+    )
+    observacao_documento: Optional[str] = Field(
+        None, max_length=500, alias="observacaoDocumento"
+    )
+    tipo_documento: str = Field(
+        ..., min_length=1, max_length=2, alias="tipoDocumento"
+    )
+
+    @field_validator("caminho_documento")
+    @classmethod
+    def validar_caminho_documento(cls, v: str) -> str:
+        """
+        Restringe o caminho a um arquivo dentro de ANEXOS_BASE_PATH.
+
+        O arquivo é lido do disco do servidor e enviado à DRG: caminhos
+        absolutos, com '..' ou que resolvam fora do diretório de anexos
+        permitiriam ler qualquer arquivo do servidor.
+        """
+        caminho = v.strip()
+        if (
+            PurePosixPath(caminho).is_absolute()
+            or PureWindowsPath(caminho).is_absolute()
+            or PureWindowsPath(caminho).drive
+            or caminho.startswith(("/", "\\"))
+        ):
+            raise ValueError("caminhoDocumento deve ser relativo a ANEXOS_BASE_PATH")
+        if ".." in PureWindowsPath(caminho).parts:
+            raise ValueError("caminhoDocumento não pode conter '..'")
+
+        base = get_settings().ANEXOS_BASE_PATH
+        if not base:
+            raise ValueError("ANEXOS_BASE_PATH não configurado: anexos não aceitos")
+        base = Path(base).expanduser().resolve()
+        if not (base / caminho).resolve().is_relative_to(base):
+            raise ValueError("caminhoDocumento fora de ANEXOS_BASE_PATH")
+
+        return caminho
 
     class Config:
         from_attributes = True
+        populate_by_name = True
 
 
 class ProcedimentoSchema(BaseModel):
-    """Schema para validação de procedimentos."""
-
-    tabela: str = Field(..., pattern=r"^(TUSS|CBHPM|SIGTAP)$")
-    codigo: str = Field(..., min_length=1, max_length=15)
-    descricao: str = Field(..., min_length=1, max_length=255)
-    qtde_solicitada: int = Field(..., ge=1)
-    valor_unitario: Decimal = Field(..., ge=0, decimal_places=2)
-    qtde_autorizada: int = Field(..., ge=1)
+    """Schema para validação de procedimentos (limites de inovemed_tbl_procedimentos)."""
+
+    tabela: str = Field(..., pattern=r"^(00|20|22|98)$")
+    codigo: str = Field(..., min_length=1, max_length=10)
+    descricao: str = Field(..., min_length=1, max_length=150)
+    qtde_solicitada: int = Field(..., ge=1, alias="qtdeSolicitada")
+    valor_unitario: Decimal = Field(
+        ..., ge=0, max_digits=8, decimal_places=2, alias="valorUnitario"
+    )
+    # Zero quando a operadora não autoriza
+    qtde_autorizada: int = Field(..., ge=0, alias="qtdeAutorizada")
 
     class Config:
         from_attributes = True
+        populate_by_name = True
 
 
 class DiagnosticoSchema(BaseModel):
-    """Schema para validação de diagnósticos."""
+    """Schema para validação de diagnósticos (limites de inovemed_tbl_diagnosticos)."""
 
-    codigo: str = Field(..., min_length=3, max_length=10)
-    tipo: str = Field(..., pattern=r"^[1-3]$")
+    codigo: str = Field(..., min_length=3, max_length=4)  # CID-10
+    tipo: str = Field(..., min_length=1, max_length=1)
 
     class Config:
         from_attributes = True
@@ -196,32 +249,60 @@ class LoteGuiasSchema(BaseModel):
 
 
 class EntradaSchema(BaseModel):
-    """Schema para validação da estrutura completa de entrada."""
-
-    loteGuias: LoteGuiasSchema
-
-    @field_validator("loteGuias", mode="after")
-    @classmethod
-    def validate_lote_size(cls, v):
-        """Valida se o lote não excede o limite de tamanho."""
-        import json
-
-        # Converter para JSON para calcular tamanho
-        json_str = json.dumps(v.model_dump(), default=str)
-        size_kb = len(json_str.encode("utf-8")) / 1024
+    """
+    Schema para validação da estrutura completa de entrada.
 
-        if size_kb > 500:  # Limite de 500KB
-            raise ValueError(
-                f"Lote excede o limite de 500KB. Tamanho atual: {size_kb:.2f}KB"
-            )
+    O limite de tamanho do lote é aplicado nos bytes do corpo da requisição,
+    antes do parse (ver app.utils.corpo_limitado).
+    """
 
-        return v
+    loteGuias: LoteGuiasSchema
 
     class Config:
         from_attributes = True
 
 
 # Schemas de resposta
+# Colunas de guias que podem ser devolvidas em listagens e exportações
+# (`campos`). Ficam de fora senhas, dados retornados pela consulta externa,
+# dados do beneficiário e do profissional e informações clínicas.
+CAMPOS_PUBLICOS_GUIA = (
+    "id",
+    "numero_guia",
+    "codigo_operadora",
+    "numero_guia_operadora",
+    "numero_guia_internacao",
+    "data_autorizacao",
+    "data_validade",
+    "codigo_prestador",
+    "nome_prestador",
+    "codigo_contratado",
+    "nome_hospital",
+    "data_solicitacao",
+    "data_sugerida_internacao",
+    "carater_atendimento",
+    "tipo_internacao",
+    "regime_internacao",
+    "diarias_solicitadas",
+    "qtde_diarias_autorizadas",
+    "tipo_acomodacao_solicitada",
+    "tipo_acomodacao_autorizada",
+    "cnes_autorizado",
+    "natureza_guia",
+    "guia_complementar",
+    "situacao_guia",
+    "tp_status",
+    "data_processamento",
+    "mensagem_erro",
+    "tentativas",
+    "status_consulta",
+    "data_ultima_consulta",
+    "status_monitoramento",
+    "data_criacao",
+    "data_atualizacao",
+)
+
+
 class GuiaResponseSchema(BaseModel):
     """Schema para resposta de guias."""
 
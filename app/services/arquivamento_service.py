@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Arquivamento das guias finalizadas
+
+Guias em estado final (tp_status 'T' e status_monitoramento 'F') não mudam
+mais, mas continuariam na tabela principal para sempre, deixando mais lentas
+as varreduras dos monitores e das rotas de status. O arquivamento move as
+finalizadas há mais de ARQUIVAMENTO_DIAS (pela data_atualizacao), junto com
+anexos, procedimentos e diagnósticos, para as tabelas *_arq.
+
+Cada lote de até ARQUIVAMENTO_LOTE guias é copiado e removido da tabela
+principal em uma única transação (INSERT ... SELECT + DELETE), então uma guia
+nunca fica nas duas tabelas nem em nenhuma. O histórico continua acessível:
+as rotas que buscam uma guia recorrem a `buscar_guia` quando ela não está na
+tabela principal, e a exportação aceita `arquivadas=true`.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from sqlalchemy import delete, func, insert, literal, select
+from sqlalchemy.orm import Session
+
+from app.config.config import get_settings
+from app.database.database import get_session
+from app.models import Guia, guias_arquivo
+from app.models.arquivo import TABELAS_FILHAS_ARQUIVO
+from app.services.contadores_service import contadores_service
+from app.services.estatisticas_service import estatisticas_service
+
+logger = logging.getLogger(__name__)
+
+
+class GuiaArquivada(NamedTuple):
+    """Guia lida do arquivo e seus filhos (linhas com os atributos dos modelos)."""
+
+    guia: Any
+    anexos: List[Any]
+    procedimentos: List[Any]
+    diagnosticos: List[Any]
+
+
+class ArquivamentoService:
+    """Move guias finalizadas antigas para as tabelas de arquivo"""
+
+    def __init__(self):
+        self.settings = get_settings()
+        self.habilitado = self.settings.ARQUIVAMENTO_ENABLED
+
+        # Controle de execução do arquivamento periódico
+        self._running = False
+        self._task = None
+        self._ultima_execucao: Optional[Dict[str, Any]] = None
+
+        # Serializa as execuções (periódica e manual) neste processo; entre
+        # processos só o worker líder arquiva
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Arquivamento
+    # ------------------------------------------------------------------
+
+    def _filtro_finalizadas(self, corte: datetime):
+        return (
+            Guia.tp_status == "T",
+            Guia.status_monitoramento == "F",
+            Guia.data_atualizacao < corte,
+        )
+
+    def arquivar(
+        self, max_lotes: Optional[int] = None, aguardar: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Arquiva as guias finalizadas antigas em lotes limitados.
+
+        Args:
+            max_lotes: lotes por execução (padrão ARQUIVAMENTO_MAX_LOTES)
+            aguardar: se False e já houver uma execução em andamento, retorna
+                erro em vez de esperar por ela
+
+        Returns:
+            Dict com guias arquivadas, lotes executados e se ainda restam guias
+        """
+        if not self._lock.acquire(blocking=aguardar):
+            return {"sucesso": False, "erro": "Arquivamento já em execução"}
+        try:
+            return self._arquivar(max_lotes)
+        finally:
+            self._lock.release()
+
+    def _arquivar(self, max_lotes: Optional[int]) -> Dict[str, Any]:
+        max_lotes = max_lotes or self.settings.ARQUIVAMENTO_MAX_LOTES
+        tamanho = self.settings.ARQUIVAMENTO_LOTE
+        corte = datetime.utcnow() - timedelta(days=self.settings.ARQUIVAMENTO_DIAS)
+        inicio = time.monotonic()
+
+        arquivadas = 0
+        lotes = 0
+        restantes = True
+        while lotes < max_lotes:
+            with get_session() as db:
+                quantidade = self._arquivar_lote(db, corte, tamanho)
+            if quantidade:
+                lotes += 1
+                arquivadas += quantidade
+            if quantidade < tamanho:
+                restantes = False
+                break
+
+            # Pausa entre lotes para não monopolizar o banco
+            time.sleep(self.settings.ARQUIVAMENTO_PAUSA_MS / 1000)
+
+        if arquivadas:
+            estatisticas_service.invalidar()
+            logger.info(
+                f"🗄️ Arquivamento: {arquivadas} guias finalizadas movidas em "
+                f"{lotes} lotes ({time.monotonic() - inicio:.1f}s)"
+            )
+
+        self._ultima_execucao = {
+            "data": datetime.utcnow().isoformat(),
+            "arquivadas": arquivadas,
+            "lotes": lotes,
+            "restantes": restantes,
+        }
+        return {"sucesso": True, **self._ultima_execucao}
+
+    def _arquivar_lote(self, db: Session, corte: datetime, tamanho: int) -> int:
+        """Copia e remove um lote de guias (e filhos) em uma transação."""
+        ids: List[int] = list(
+            db.execute(
+                select(Guia.id)
+                .where(*self._filtro_finalizadas(corte))
+                .order_by(Guia.id)
+                .limit(tamanho)
+            ).scalars()
+        )
+        if not ids:
+            return 0
+
+        try:
+            # Variação dos contadores materializados (guias saem da tabela principal)
+            variacoes = Counter()
+            if contadores_service.habilitado:
+                por_status = db.execute(
+                    select(
+                        Guia.tp_status,
+                        Guia.status_consulta,
+                        Guia.status_monitoramento,
+                        func.count(Guia.id),
+                    )
+                    .where(Guia.id.in_(ids))
+                    .group_by(
+                        Guia.tp_status, Guia.status_consulta, Guia.status_monitoramento
+                    )
+                )
+                for *chave, total in por_status:
+                    variacoes[tuple(chave)] -= total
+
+            origem = Guia.__table__
+            agora = literal(datetime.utcnow()).label("data_arquivamento")
+            db.execute(
+                insert(guias_arquivo).from_select(
+                    [coluna.name for coluna in origem.columns] + ["data_arquivamento"],
+                    select(*origem.columns, agora).where(origem.c.id.in_(ids)),
+                )
+            )
+
+            for tabela, arquivo in TABELAS_FILHAS_ARQUIVO:
+                db.execute(
+                    insert(arquivo).from_select(
+                        [coluna.name for coluna in tabela.columns],
+                        select(*tabela.columns).where(tabela.c.guia_id.in_(ids)),
+                    )
+                )
+                db.execute(delete(tabela).where(tabela.c.guia_id.in_(ids)))
+
+            db.execute(delete(origem).where(origem.c.id.in_(ids)))
+
+            if variacoes:
+                contadores_service.aplicar_variacoes(db, variacoes)
+
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+        return len(ids)
+
+    async def iniciar_arquivamento_continuo(self):
+        """
+        Arquiva as guias finalizadas continuamente
+        """
+        intervalo = self.settings.ARQUIVAMENTO_INTERVALO_MINUTES * 60
+        logger.info(
+            f"🚀 Iniciando arquivamento de guias finalizadas "
+            f"(> {self.settings.ARQUIVAMENTO_DIAS} dias, intervalo: "
+            f"{self.settings.ARQUIVAMENTO_INTERVALO_MINUTES} minutos)"
+        )
+
+        while self._running:
+            try:
+                await asyncio.to_thread(self.arquivar)
+                await asyncio.sleep(intervalo)
+
+            except asyncio.CancelledError:
+                logger.info("🛑 Arquivamento de guias cancelado")
+                break
+            except Exception as e:
+                logger.error(f"❌ Erro no arquivamento de guias: {e}")
+                await asyncio.sleep(60)
+
+        logger.info("🛑 Arquivamento de guias finalizado")
+
+    def obter_status(self, db: Session) -> Dict[str, Any]:
+        """Configuração, última execução e total de guias no arquivo."""
+        return {
+            "habilitado": self.habilitado,
+            "executando": self._running,
+            "em_andamento": self._lock.locked(),
+            "dias": self.settings.ARQUIVAMENTO_DIAS,
+            "lote": self.settings.ARQUIVAMENTO_LOTE,
+            "intervalo_minutos": self.settings.ARQUIVAMENTO_INTERVALO_MINUTES,
+            "guias_arquivadas": db.execute(
+                select(func.count()).select_from(guias_arquivo)
+            ).scalar(),
+            "ultima_execucao": self._ultima_execucao,
+        }
+
+    # ------------------------------------------------------------------
+    # Leitura do histórico
+    # ------------------------------------------------------------------
+
+    def buscar_guia(
+        self,
+        db: Session,
+        guia_id: Optional[int] = None,
+        numero_guia: Optional[str] = None,
+    ) -> Optional[GuiaArquivada]:
+        """
+        Busca uma guia no arquivo por id ou numero_guia.
+
+        As linhas retornadas têm os mesmos atributos dos modelos ORM, então
+        podem ser usadas com os mesmos schemas de resposta.
+        """
+        query = select(guias_arquivo)
+        if guia_id is not None:
+            query = query.where(guias_arquivo.c.id == guia_id)
+        else:
+            query = query.where(guias_arquivo.c.numero_guia == numero_guia)
+
+        guia = db.execute(query).first()
+        if guia is None:
+            return None
+
+        anexos, procedimentos, diagnosticos = (
+            db.execute(
+                select(arquivo)
+                .where(arquivo.c.guia_id == guia.id)
+                .order_by(arquivo.c.id)
+            ).all()
+            for _, arquivo in TABELAS_FILHAS_ARQUIVO
+        )
+        return GuiaArquivada(guia, anexos, procedimentos, diagnosticos)
+
+    def numeros_arquivados(self, db: Session, numeros: List[str]) -> Dict[str, int]:
+        """numero_guia -> id das guias (entre as informadas) que estão no arquivo."""
+        return dict(
+            db.execute(
+                select(guias_arquivo.c.numero_guia, guias_arquivo.c.id).where(
+                    guias_arquivo.c.numero_guia.in_(numeros)
+                )
+            ).all()
+        )
+
+
+# Instância global do serviço
+arquivamento_service = ArquivamentoService()
@@ -2,18 +2,121 @@
 Serviço para consulta externa de guias
 """
 
+import asyncio
+import heapq
 import httpx
 import json
 import logging
+import random
+import threading
+import time
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from app.config.config import get_settings
+from app.database.database import get_session
 from app.models.guias import Guia
+from app.utils.cache import CacheTTL
 
 logger = logging.getLogger(__name__)
 
+# Cache de respostas compartilhado entre instâncias do serviço (as rotas
+# criam uma instância por requisição), chaveado por guia + data informada.
+# A validade de cada entrada é o intervalo mínimo entre consultas da guia.
+cache_consulta_externa = CacheTTL(
+    ttl_segundos=get_settings().CONSULTA_EXTERNA_INTERVALO_MS / 1000,
+    max_entradas=get_settings().CONSULTA_EXTERNA_CACHE_MAX_ENTRADAS,
+)
+
+
+class FilaRetentativaConsulta:
+    """
+    Fila de retentativas adiadas para consultas externas.
+
+    Recebe guias cuja consulta falhou por erro transitório mesmo após as
+    retentativas imediatas. Cada guia aparece no máximo uma vez na fila
+    (reagendar substitui o agendamento anterior).
+    """
+
+    def __init__(self, max_itens: int):
+        self.max_itens = max_itens
+        self._heap: List[Tuple[float, str]] = []
+        self._itens: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self.agendadas = 0
+        self.recusadas = 0
+
+    def agendar(
+        self,
+        numero_guia: str,
+        data_ultima_atualizacao: Optional[Any],
+        tentativa: int,
+        atraso_segundos: float,
+    ) -> bool:
+        """
+        Agenda uma nova consulta da guia após `atraso_segundos`.
+
+        Returns:
+            bool: False se a fila estiver cheia
+        """
+        with self._lock:
+            if numero_guia not in self._itens and len(self._itens) >= self.max_itens:
+                self.recusadas += 1
+                return False
+
+            executar_em = time.time() + atraso_segundos
+            self._itens[numero_guia] = {
+                "numero_guia": numero_guia,
+                "data_ultima_atualizacao": data_ultima_atualizacao,
+                "tentativa": tentativa,
+                "executar_em": executar_em,
+            }
+            heapq.heappush(self._heap, (executar_em, numero_guia))
+            self.agendadas += 1
+            return True
+
+    def retirar_vencidas(self) -> List[Dict[str, Any]]:
+        """Remove e retorna os itens cujo horário de execução já passou."""
+        agora = time.time()
+        vencidas = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= agora:
+                executar_em, numero_guia = heapq.heappop(self._heap)
+                item = self._itens.get(numero_guia)
+
+                # Entrada obsoleta (guia reagendada depois deste agendamento)
+                if item is None or item["executar_em"] != executar_em:
+                    continue
+
+                del self._itens[numero_guia]
+                vencidas.append(item)
+
+        return vencidas
+
+    def estatisticas(self) -> Dict[str, Any]:
+        """Retorna contadores da fila."""
+        with self._lock:
+            proxima = min(
+                (item["executar_em"] for item in self._itens.values()), default=None
+            )
+            return {
+                "pendentes": len(self._itens),
+                "max_itens": self.max_itens,
+                "agendadas": self.agendadas,
+                "recusadas": self.recusadas,
+                "proxima_execucao": (
+                    datetime.utcfromtimestamp(proxima).isoformat() if proxima else None
+                ),
+            }
+
+
+# Fila compartilhada de retentativas adiadas
+fila_retentativa_consulta = FilaRetentativaConsulta(
+    max_itens=get_settings().CONSULTA_EXTERNA_FILA_MAX_ITENS
+)
+
 
 class ConsultaExternaService:
     """Serviço para consultar guias em rotas externas"""
@@ -21,11 +124,17 @@ class ConsultaExternaService:
     def __init__(self):
         self.settings = get_settings()
 
+        # Controle de execução da fila de retentativas
+        self._running = False
+        self._task = None
+
     async def consultar_guia_externa(
         self,
         db: Session,
         numero_guia: str,
         data_ultima_atualizacao: Optional[datetime] = None,
+        tentativa_fila: int = 0,
+        retentativas_imediatas: bool = True,
     ) -> Dict[str, Any]:
         """
         Consulta uma guia em uma rota externa
@@ -34,13 +143,30 @@ class ConsultaExternaService:
             db: Sessão do banco de dados
             numero_guia: Número da guia para consultar
             data_ultima_atualizacao: Data da última atualização da guia (opcional)
+            tentativa_fila: Número de reprocessamentos já feitos pela fila de retentativas
+            retentativas_imediatas: repetir erros transitórios na própria chamada
+                (com backoff). As rotas HTTP usam False: não seguram a requisição
+                e a falha transitória vai direto para a fila de retentativas
 
         Returns:
             Dict com resultado da consulta
         """
         try:
+            # Cache antes do banco: a mesma guia com a mesma data informada,
+            # dentro do intervalo, é respondida sem carregar a linha. Uma data
+            # mais nova gera outra chave e força nova verificação/consulta.
+            chave_cache = self._chave_cache(numero_guia, data_ultima_atualizacao)
+            em_cache = cache_consulta_externa.obter(chave_cache)
+            if em_cache is not None:
+                return {
+                    "sucesso": True,
+                    "mensagem": "Guia já foi consultada recentemente",
+                    "dados": em_cache["dados"],
+                    "status_consulta": em_cache["status_consulta"],
+                }
+
             # Buscar guia no banco
-            guia = db.query(Guia).filter(Guia.numero_guia == numero_guia).first()
+            guia = db.scalars(self.consulta_por_numero(numero_guia)).first()
 
             if not guia:
                 return {
@@ -48,30 +174,43 @@ class ConsultaExternaService:
                     "erro": f"Guia {numero_guia} não encontrada no banco de dados",
                 }
 
-            # Verificar se já foi consultada recentemente
-            if self._deve_pular_consulta(guia, data_ultima_atualizacao):
+            # Verificar no banco se já foi consultada recentemente
+            if self._deve_pular_consulta(guia):
+                dados = self._parse_dados_retornados(guia.dados_retornados)
+                # Só o retorno definitivo (R) vai para o cache; o intervalo
+                # de uma consulta com erro já está correndo no banco
+                if guia.status_consulta == "R" and dados is not None:
+                    cache_consulta_externa.definir(
+                        chave_cache,
+                        {"dados": dados, "status_consulta": guia.status_consulta},
+                    )
                 return {
                     "sucesso": True,
                     "mensagem": "Guia já foi consultada recentemente",
-                    "dados": self._parse_dados_retornados(guia.dados_retornados),
+                    "dados": dados,
                     "status_consulta": guia.status_consulta,
                 }
 
             # Preparar parâmetros para consulta externa
+            if isinstance(data_ultima_atualizacao, datetime):
+                data_parametro = data_ultima_atualizacao.isoformat()
+            elif data_ultima_atualizacao:
+                data_parametro = str(data_ultima_atualizacao)
+            else:
+                data_parametro = guia.data_atualizacao.isoformat()
+
             params = {
                 "numero_guia": numero_guia,
-                "data_ultima_atualizacao": (
-                    data_ultima_atualizacao.isoformat()
-                    if data_ultima_atualizacao
-                    else guia.data_atualizacao.isoformat()
-                ),
+                "data_ultima_atualizacao": data_parametro,
             }
 
             # Usar URL do .env
             url_destino = self.settings.CONSULTA_EXTERNA_URL
 
             # Fazer consulta externa
-            resultado_consulta = await self._fazer_consulta_externa(url_destino, params)
+            resultado_consulta = await self._fazer_consulta_externa(
+                url_destino, params, retentativas_imediatas
+            )
 
             if resultado_consulta["sucesso"]:
                 # Atualizar guia com dados retornados
@@ -79,6 +218,12 @@ class ConsultaExternaService:
                     db, guia, resultado_consulta["dados"]
                 )
 
+                # Registrar no cache para responder sem banco dentro do intervalo
+                cache_consulta_externa.definir(
+                    chave_cache,
+                    {"dados": resultado_consulta["dados"], "status_consulta": "R"},
+                )
+
                 return {
                     "sucesso": True,
                     "mensagem": "Consulta realizada com sucesso",
@@ -90,24 +235,40 @@ class ConsultaExternaService:
                 guia.status_consulta = "C"  # Consultado
                 guia.data_ultima_consulta = datetime.utcnow()
                 guia.mensagem_erro = resultado_consulta["erro"]
-                guia.status_monitoramento = "M"  # Monitorando (para tentar novamente)
+
+                # Falha transitória que persistiu após as retentativas imediatas:
+                # reprocessar pela fila de retentativas adiadas
+                reagendada = resultado_consulta.get(
+                    "retentavel", False
+                ) and self._agendar_retentativa(
+                    numero_guia, data_ultima_atualizacao, tentativa_fila
+                )
+                # Monitorando (para tentar novamente) mesmo com a retentativa na
+                # fila: a fila fica só em memória e se perde em um reinício
+                guia.status_monitoramento = "M"
                 db.commit()
 
                 return {
                     "sucesso": False,
                     "erro": resultado_consulta["erro"],
                     "status_consulta": "C",
+                    "reagendada": reagendada,
                 }
 
         except Exception as e:
             logger.error(f"Erro ao consultar guia externa {numero_guia}: {e}")
             return {"sucesso": False, "erro": f"Erro interno: {str(e)}"}
 
-    def _deve_pular_consulta(
-        self, guia: Guia, data_ultima_atualizacao: Optional[datetime]
-    ) -> bool:
+    def consulta_por_numero(self, numero_guia: str):
+        """SELECT da guia pelo numero_guia (índice único)."""
+        return select(Guia).where(Guia.numero_guia == numero_guia)
+
+    def _deve_pular_consulta(self, guia: Guia) -> bool:
         """
-        Verifica se deve pular a consulta baseado no intervalo configurado
+        Verifica se deve pular a consulta baseado no intervalo configurado.
+
+        Decisão autoritativa, vale para todos os processos e sobrevive a
+        reinícios; o cache só evita chegar até aqui.
         """
         # Se já foi retornada (status R), não consultar novamente
         if guia.status_consulta == "R":
@@ -123,57 +284,167 @@ class ConsultaExternaService:
         ).total_seconds() * 1000
 
         # Se passou menos tempo que o intervalo configurado, pular
-        if diferenca_ms < self.settings.CONSULTA_EXTERNA_INTERVALO_MS:
-            return True
+        return diferenca_ms < self.settings.CONSULTA_EXTERNA_INTERVALO_MS
 
-        # Se a guia foi atualizada desde a última consulta, deve consultar novamente
-        if data_ultima_atualizacao and guia.data_ultima_consulta:
-            if data_ultima_atualizacao > guia.data_ultima_consulta:
-                return False
+    def _chave_cache(
+        self, numero_guia: str, data_ultima_atualizacao: Optional[Any]
+    ) -> Tuple[str, Optional[str]]:
+        """
+        Monta a chave do cache de consultas: número da guia e data informada
+        pelo chamador. A data pode chegar como datetime (rota individual) ou
+        string (consulta múltipla), então é normalizada para texto.
+        """
+        if isinstance(data_ultima_atualizacao, datetime):
+            data_ultima_atualizacao = data_ultima_atualizacao.isoformat()
+        elif data_ultima_atualizacao is not None:
+            data_ultima_atualizacao = str(data_ultima_atualizacao)
 
-        return False
+        return (numero_guia, data_ultima_atualizacao)
 
     async def _fazer_consulta_externa(
-        self, url: str, params: Dict[str, Any]
+        self, url: str, params: Dict[str, Any], retentativas_imediatas: bool = True
     ) -> Dict[str, Any]:
         """
-        Faz a consulta HTTP para a rota externa
+        Faz a consulta HTTP para a rota externa.
+
+        Erros transitórios (timeout, falha de conexão e HTTP 5xx) são repetidos
+        até CONSULTA_EXTERNA_MAX_TENTATIVAS vezes, com backoff exponencial e
+        jitter limitado por CONSULTA_EXTERNA_INTERVALO_MS. Sem
+        retentativas_imediatas é feita uma única tentativa.
         """
-        timeout_ms = self.settings.CONSULTA_EXTERNA_TIMEOUT_MS
-        timeout_seconds = timeout_ms / 1000
+        timeout_seconds = self.settings.CONSULTA_EXTERNA_TIMEOUT_MS / 1000
+        max_tentativas = (
+            max(1, self.settings.CONSULTA_EXTERNA_MAX_TENTATIVAS)
+            if retentativas_imediatas
+            else 1
+        )
 
         try:
             async with httpx.AsyncClient(timeout=timeout_seconds) as client:
-                logger.info(f"Consultando URL externa: {url} com parâmetros: {params}")
+                for tentativa in range(1, max_tentativas + 1):
+                    resultado = await self._executar_consulta(client, url, params)
+
+                    if resultado["sucesso"] or not resultado.get("retentavel"):
+                        return resultado
 
-                response = await client.get(url, params=params)
+                    if tentativa < max_tentativas:
+                        atraso = self._calcular_backoff(tentativa)
+                        logger.warning(
+                            f"Consulta externa falhou (tentativa {tentativa}/{max_tentativas}), "
+                            f"nova tentativa em {atraso:.2f}s: {resultado['erro']}"
+                        )
+                        await asyncio.sleep(atraso)
 
-                if response.status_code == 200:
-                    dados = response.json()
+                return resultado
 
-                    # Verificar se a resposta indica sucesso
-                    if self._verificar_resposta_sucesso(dados):
-                        return {"sucesso": True, "dados": dados}
-                    else:
-                        return {
-                            "sucesso": False,
-                            "erro": f"Resposta da API indica erro: {dados.get('erro', 'Erro desconhecido')}",
-                        }
+        except Exception as e:
+            return {"sucesso": False, "erro": f"Erro inesperado: {str(e)}"}
+
+    async def _executar_consulta(
+        self, client: httpx.AsyncClient, url: str, params: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Executa uma única tentativa de consulta HTTP.
+
+        O campo "retentavel" indica se a falha é transitória.
+        """
+        timeout_ms = self.settings.CONSULTA_EXTERNA_TIMEOUT_MS
+
+        try:
+            logger.info(f"Consultando URL externa: {url} com parâmetros: {params}")
+
+            response = await client.get(url, params=params)
+
+            if response.status_code == 200:
+                dados = response.json()
+
+                # Verificar se a resposta indica sucesso
+                if self._verificar_resposta_sucesso(dados):
+                    return {"sucesso": True, "dados": dados}
                 else:
                     return {
                         "sucesso": False,
-                        "erro": f"Erro HTTP {response.status_code}: {response.text}",
+                        "erro": f"Resposta da API indica erro: {dados.get('erro', 'Erro desconhecido')}",
+                        "retentavel": False,
                     }
+            else:
+                return {
+                    "sucesso": False,
+                    "erro": f"Erro HTTP {response.status_code}: {response.text}",
+                    "retentavel": response.status_code >= 500,
+                }
 
         except httpx.TimeoutException:
             return {
                 "sucesso": False,
                 "erro": f"Timeout na consulta externa (>{timeout_ms}ms)",
+                "retentavel": True,
+            }
+        except httpx.TransportError as e:
+            return {
+                "sucesso": False,
+                "erro": f"Erro de conexão: {str(e)}",
+                "retentavel": True,
             }
         except httpx.RequestError as e:
-            return {"sucesso": False, "erro": f"Erro de conexão: {str(e)}"}
-        except Exception as e:
-            return {"sucesso": False, "erro": f"Erro inesperado: {str(e)}"}
+            return {
+                "sucesso": False,
+                "erro": f"Erro de conexão: {str(e)}",
+                "retentavel": False,
+            }
+
+    def _calcular_backoff(self, tentativa: int) -> float:
+        """
+        Calcula o atraso (em segundos) antes da próxima tentativa imediata.
+
+        Backoff exponencial a partir de CONSULTA_EXTERNA_BACKOFF_BASE_MS, com
+        teto em CONSULTA_EXTERNA_INTERVALO_MS e jitter sobre metade do valor.
+        """
+        teto_ms = min(
+            self.settings.CONSULTA_EXTERNA_INTERVALO_MS,
+            self.settings.CONSULTA_EXTERNA_BACKOFF_BASE_MS * (2 ** (tentativa - 1)),
+        )
+        return (teto_ms / 2 + random.uniform(0, teto_ms / 2)) / 1000
+
+    def _agendar_retentativa(
+        self,
+        numero_guia: str,
+        data_ultima_atualizacao: Optional[Any],
+        tentativa_fila: int,
+    ) -> bool:
+        """
+        Agenda a guia na fila de retentativas adiadas.
+
+        Cada reprocessamento dobra o intervalo de espera. Após
+        CONSULTA_EXTERNA_MAX_TENTATIVAS reprocessamentos (ou com a fila cheia)
+        retorna False e a guia volta para o monitoramento de campos.
+        """
+        if tentativa_fila >= self.settings.CONSULTA_EXTERNA_MAX_TENTATIVAS:
+            logger.warning(
+                f"Guia {numero_guia} esgotou as retentativas adiadas, "
+                "retornando para o monitoramento de campos"
+            )
+            return False
+
+        atraso = (self.settings.CONSULTA_EXTERNA_INTERVALO_MS / 1000) * (
+            2**tentativa_fila
+        )
+        agendada = fila_retentativa_consulta.agendar(
+            numero_guia, data_ultima_atualizacao, tentativa_fila + 1, atraso
+        )
+
+        if agendada:
+            logger.info(
+                f"Guia {numero_guia} agendada para nova consulta em {atraso:.0f}s "
+                f"(retentativa adiada {tentativa_fila + 1})"
+            )
+        else:
+            logger.warning(
+                f"Fila de retentativas cheia, guia {numero_guia} retornando "
+                "para o monitoramento de campos"
+            )
+
+        return agendada
 
     def _verificar_resposta_sucesso(self, dados: Dict[str, Any]) -> bool:
         """
@@ -595,8 +866,9 @@ class ConsultaExternaService:
                 erros += 1
                 continue
 
+            # Chamada de rota HTTP: sem esperas de backoff na requisição
             resultado = await self.consultar_guia_externa(
-                db, numero_guia, data_ultima_atualizacao
+                db, numero_guia, data_ultima_atualizacao, retentativas_imediatas=False
             )
 
             resultados.append({"numero_guia": numero_guia, **resultado})
@@ -613,3 +885,55 @@ class ConsultaExternaService:
             "erros": erros,
             "resultados": resultados,
         }
+
+    async def processar_fila_retentativas(self) -> Dict[str, Any]:
+        """
+        Reprocessa as consultas da fila de retentativas cujo horário já passou
+        """
+        itens = fila_retentativa_consulta.retirar_vencidas()
+        if not itens:
+            return {"processadas": 0, "sucessos": 0, "erros": 0}
+
+        logger.info(f"Reprocessando {len(itens)} consultas da fila de retentativas")
+
+        sucessos = 0
+        erros = 0
+        with get_session() as db:
+            for item in itens:
+                resultado = await self.consultar_guia_externa(
+                    db,
+                    item["numero_guia"],
+                    item["data_ultima_atualizacao"],
+                    tentativa_fila=item["tentativa"],
+                )
+                if resultado["sucesso"]:
+                    sucessos += 1
+                else:
+                    erros += 1
+
+        return {"processadas": len(itens), "sucessos": sucessos, "erros": erros}
+
+    async def iniciar_fila_retentativas_continua(self):
+        """
+        Processa a fila de retentativas continuamente
+        """
+        intervalo = self.settings.CONSULTA_EXTERNA_FILA_INTERVALO_SEGUNDOS
+        logger.info(f"Iniciando fila de retentativas de consulta (intervalo: {intervalo}s)")
+
+        while self._running:
+            try:
+                await self.processar_fila_retentativas()
+                await asyncio.sleep(intervalo)
+
+            except asyncio.CancelledError:
+                logger.info("Fila de retentativas de consulta cancelada")
+                break
+            except Exception as e:
+                logger.error(f"Erro na fila de retentativas de consulta: {e}")
+                await asyncio.sleep(60)
+
+        logger.info("Fila de retentativas de consulta finalizada")
+
+
+# Instância global do serviço (usada pela fila de retentativas em background)
+consulta_externa_service = ConsultaExternaService()
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Serviço de contadores materializados de guias
+
+Mantém a tabela inovemed_tbl_contadores_guias com a quantidade de guias por
+combinação (tp_status, status_consulta, status_monitoramento). Os contadores
+são ajustados no mesmo flush (e portanto na mesma transação) que altera os
+status das guias via ORM. Inserções feitas diretamente no banco por outros
+sistemas não passam pelo ORM: a reconciliação periódica corrige essa deriva.
+"""
+
+import asyncio
+import logging
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, Tuple
+
+from sqlalchemy import delete, event, func, insert, literal, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, attributes
+
+from app.config.config import get_settings
+from app.database.database import get_session
+from app.models import ContadorGuias, Guia
+
+logger = logging.getLogger(__name__)
+
+# Colunas que definem a combinação de status contada
+CAMPOS_STATUS = ("tp_status", "status_consulta", "status_monitoramento")
+
+ChaveStatus = Tuple[str, str, str]
+
+
+class ContadoresService:
+    """Manutenção incremental e reconciliação dos contadores de guias"""
+
+    def __init__(self):
+        self.settings = get_settings()
+        self.habilitado = self.settings.CONTADORES_GUIAS_ENABLED
+
+        # Controle de execução da reconciliação periódica
+        self._running = False
+        self._task = None
+
+    # ------------------------------------------------------------------
+    # Manutenção incremental (eventos do ORM)
+    # ------------------------------------------------------------------
+
+    def calcular_variacoes(self, session: Session) -> Counter:
+        """
+        Calcula a variação dos contadores causada pelas guias do flush atual.
+
+        Returns:
+            Counter: chave de status -> variação (+/-)
+        """
+        variacoes: Counter = Counter()
+
+        for obj in session.new:
+            if isinstance(obj, Guia):
+                variacoes[self._chave_atual(obj)] += 1
+
+        for obj in session.deleted:
+            if isinstance(obj, Guia):
+                variacoes[self._chave_anterior(obj)] -= 1
+
+        for obj in session.dirty:
+            if isinstance(obj, Guia) and session.is_modified(obj):
+                anterior = self._chave_anterior(obj)
+                atual = self._chave_atual(obj)
+                if anterior != atual:
+                    variacoes[anterior] -= 1
+                    variacoes[atual] += 1
+
+        return variacoes
+
+    def aplicar_variacoes(self, session: Session, variacoes: Counter):
+        """Aplica as variações na tabela de contadores usando a conexão da sessão."""
+        conexao = session.connection()
+
+        for (tp_status, status_consulta, status_monitoramento), delta in sorted(
+            variacoes.items()
+        ):
+            if delta == 0:
+                continue
+
+            filtro = (
+                ContadorGuias.tp_status == tp_status,
+                ContadorGuias.status_consulta == status_consulta,
+                ContadorGuias.status_monitoramento == status_monitoramento,
+            )
+            stmt = (
+                update(ContadorGuias)
+                .where(*filtro)
+                .values(
+                    quantidade=ContadorGuias.quantidade + delta,
+                    data_atualizacao=datetime.utcnow(),
+                )
+            )
+
+            if conexao.execute(stmt).rowcount:
+                continue
+
+            # Primeira guia nesta combinação: criar a linha. Outro processo pode
+            # criar a mesma linha ao mesmo tempo, então o INSERT fica num
+            # savepoint e, em caso de conflito, refazemos o UPDATE.
+            try:
+                with conexao.begin_nested():
+                    conexao.execute(
+                        ContadorGuias.__table__.insert().values(
+                            tp_status=tp_status,
+                            status_consulta=status_consulta,
+                            status_monitoramento=status_monitoramento,
+                            quantidade=delta,
+                            data_atualizacao=datetime.utcnow(),
+                        )
+                    )
+            except IntegrityError:
+                conexao.execute(stmt)
+
+    def _chave_atual(self, guia: Guia) -> ChaveStatus:
+        return tuple(getattr(guia, campo) for campo in CAMPOS_STATUS)
+
+    def _chave_anterior(self, guia: Guia) -> ChaveStatus:
+        chave = []
+        for campo in CAMPOS_STATUS:
+            historico = attributes.get_history(guia, campo)
+            if historico.deleted:
+                chave.append(historico.deleted[0])
+            else:
+                chave.append(getattr(guia, campo))
+        return tuple(chave)
+
+    # ------------------------------------------------------------------
+    # Leitura e reconciliação
+    # ------------------------------------------------------------------
+
+    def obter_contadores(self, db: Session) -> Dict[ChaveStatus, int]:
+        """Lê a tabela de contadores (uma linha por combinação de status)."""
+        linhas = db.query(
+            ContadorGuias.tp_status,
+            ContadorGuias.status_consulta,
+            ContadorGuias.status_monitoramento,
+            ContadorGuias.quantidade,
+        ).all()
+        return {
+            (tp_status, status_consulta, status_monitoramento): quantidade
+            for tp_status, status_consulta, status_monitoramento, quantidade in linhas
+            if quantidade
+        }
+
+    def reconciliar(self) -> Dict[str, Any]:
+        """
+        Recalcula os contadores a partir da tabela de guias e corrige a deriva.
+
+        Numa única transação, com a tabela de contadores bloqueada para
+        escrita desde o início (BEGIN IMMEDIATE no SQLite, LOCK TABLE nos
+        demais), as linhas são apagadas e reinseridas a partir do GROUP BY das
+        guias. Flushes concorrentes esperam o bloqueio e aplicam sua variação
+        sobre os valores recalculados, inclusive em combinações novas.
+
+        Returns:
+            Dict com o número de combinações corrigidas
+        """
+        tabela = ContadorGuias.__table__
+
+        with get_session() as db:
+            self._bloquear_contadores(db)
+
+            anteriores = self.obter_contadores(db)
+
+            db.execute(delete(ContadorGuias))
+            db.execute(
+                insert(ContadorGuias).from_select(
+                    [*CAMPOS_STATUS, "quantidade", "data_atualizacao"],
+                    select(
+                        *(getattr(Guia, campo) for campo in CAMPOS_STATUS),
+                        func.count(Guia.id),
+                        literal(datetime.utcnow(), tabela.c.data_atualizacao.type),
+                    ).group_by(*(getattr(Guia, campo) for campo in CAMPOS_STATUS)),
+                )
+            )
+
+            reais = self.obter_contadores(db)
+            db.commit()
+
+        corrigidos = 0
+        for chave in set(reais) | set(anteriores):
+            if reais.get(chave, 0) == anteriores.get(chave, 0):
+                continue
+            corrigidos += 1
+            if chave in anteriores:
+                logger.warning(
+                    f"⚠️ Contador {chave} divergente: {anteriores[chave]} -> "
+                    f"{reais.get(chave, 0)}"
+                )
+
+        logger.info(f"✅ Contadores de guias reconciliados ({corrigidos} corrigidos)")
+        return {"sucesso": True, "corrigidos": corrigidos}
+
+    def _bloquear_contadores(self, db: Session):
+        """Bloqueia a tabela de contadores para escrita até o fim da transação."""
+        conexao = db.connection()
+        if conexao.dialect.name == "sqlite":
+            # O SQLite não tem bloqueio de linha/tabela: reservar a escrita
+            # do banco antes da primeira leitura
+            conexao.exec_driver_sql("BEGIN IMMEDIATE")
+        else:
+            conexao.exec_driver_sql(
+                f"LOCK TABLE {ContadorGuias.__tablename__} IN EXCLUSIVE MODE"
+            )
+
+    async def iniciar_reconciliacao_continua(self):
+        """
+        Reconcilia os contadores continuamente
+        """
+        intervalo = self.settings.CONTADORES_GUIAS_RECONCILIAR_MINUTES * 60
+        logger.info(
+            f"🚀 Iniciando reconciliação de contadores "
+            f"(intervalo: {self.settings.CONTADORES_GUIAS_RECONCILIAR_MINUTES} minutos)"
+        )
+
+        while self._running:
+            try:
+                await asyncio.to_thread(self.reconciliar)
+                await asyncio.sleep(intervalo)
+
+            except asyncio.CancelledError:
+                logger.info("🛑 Reconciliação de contadores cancelada")
+                break
+            except Exception as e:
+                logger.error(f"❌ Erro na reconciliação de contadores: {e}")
+                await asyncio.sleep(60)
+
+        logger.info("🛑 Reconciliação de contadores finalizada")
+
+
+# Instância global do serviço
+contadores_service = ContadoresService()
+
+
+@event.listens_for(Session, "after_flush")
+def _atualizar_contadores_apos_flush(session, flush_context):
+    """Ajusta os contadores na mesma transação do flush que alterou as guias."""
+    if not contadores_service.habilitado:
+        return
+
+    variacoes = contadores_service.calcular_variacoes(session)
+    if variacoes:
+        contadores_service.aplicar_variacoes(session, variacoes)
+
+
+# Garante que o valor anterior dos campos de status seja carregado antes de
+# uma alteração (objetos expirados após commit não guardam o valor antigo).
+# Só com os contadores habilitados: o active_history custa um SELECT extra
+# em cada alteração de status de uma guia expirada.
+if contadores_service.habilitado:
+    for _campo in CAMPOS_STATUS:
+        event.listen(
+            getattr(Guia, _campo), "set", lambda *args: None, active_history=True
+        )
@@ -7,7 +7,10 @@ from app.services.token_manager import (
     TokenExpiredError,
     is_token_expired_error,
 )
-from app.utils.logger import drg_logger
+from app.utils import json_rapido
+from app.utils.logger import ChamadaDRG, drg_logger
+from app.utils.metricas import registrar_chamada_drg
+from app.utils.rastreamento import span
 
 
 def is_retentable_error(error_msg: str, status_code: int = None) -> bool:
@@ -124,8 +127,47 @@ class DRGService:
         # Inicializar TokenManager
         self.token_manager = TokenManager(self)
 
+    def _post_json(
+        self,
+        url: str,
+        corpo: Dict[str, Any],
+        headers: Dict[str, str],
+        timeout: float,
+        chamada: ChamadaDRG,
+    ) -> requests.Response:
+        """
+        Faz o POST JSON para a DRG registrando status e bytes na chamada.
+
+        O corpo é serializado aqui com o mesmo codificador das respostas da
+        API (orjson), já em bytes, para medir o tamanho enviado.
+        """
+        with span("serializar_json", operacao=chamada.operacao):
+            dados = json_rapido.dumps(corpo)
+        with span(f"http_{chamada.operacao}", bytes_enviados=len(dados)):
+            response = requests.post(url, data=dados, headers=headers, timeout=timeout)
+        chamada.registrar_resposta(
+            response.status_code, len(dados), len(response.content)
+        )
+        return response
+
+    @staticmethod
+    def _numeros_guias(json_lote: Dict[str, Any]) -> list:
+        """Extrai os números das guias de um JSON no formato loteGuias."""
+        guias = json_lote.get("loteGuias", {}).get("guia", [])
+        return [g.get("numeroGuia") for g in guias if isinstance(g, dict)]
+
     def autenticar(self, use_pull_credentials: bool = False) -> Dict[str, Any]:
         """Autentica na API DRG e obtém token."""
+        with drg_logger.chamada("autenticacao", self.auth_url) as chamada:
+            resultado = self._autenticar(use_pull_credentials, chamada)
+            chamada.finalizar(resultado)
+        registrar_chamada_drg(chamada)
+        return resultado
+
+    def _autenticar(
+        self, use_pull_credentials: bool, chamada: ChamadaDRG
+    ) -> Dict[str, Any]:
+        """Executa a requisição de autenticação."""
         try:
             # Escolher credenciais baseado no contexto
             username = self.pull_username if use_pull_credentials else self.username
@@ -149,8 +191,8 @@ class DRGService:
             drg_logger.log_request("POST", self.auth_url, headers, json_data=auth_data)
 
             # Fazer requisição de autenticação
-            response = requests.post(
-                self.auth_url, json=auth_data, headers=headers, timeout=30
+            response = self._post_json(
+                self.auth_url, auth_data, headers, timeout=30, chamada=chamada
             )
 
             # Log da resposta
@@ -263,6 +305,18 @@ class DRGService:
         Returns:
             Dict: Resultado do envio
         """
+        with drg_logger.chamada(
+            "envio_lote", self.drg_url, self._numeros_guias(json_lote)
+        ) as chamada:
+            resultado = self._executar_envio_lote(json_lote, token, chamada)
+            chamada.finalizar(resultado)
+        registrar_chamada_drg(chamada)
+        return resultado
+
+    def _executar_envio_lote(
+        self, json_lote: Dict[str, Any], token: str, chamada: ChamadaDRG
+    ) -> Dict[str, Any]:
+        """Executa a requisição de envio do lote e interpreta a resposta."""
         try:
             # Headers para envio (formato correto da API DRG)
             headers = {"Content-Type": "application/json", "Authorization": token}
@@ -273,9 +327,7 @@ class DRGService:
             # Fazer requisição de envio (usar timeout do settings)
             settings = get_settings()
             timeout = settings.HTTP_TIMEOUT
-            response = requests.post(
-                self.drg_url, json=json_lote, headers=headers, timeout=timeout
-            )
+            response = self._post_json(self.drg_url, json_lote, headers, timeout, chamada)
 
             # Log da resposta
             drg_logger.log_response(
@@ -488,6 +540,18 @@ class DRGService:
         Returns:
             Dict: Resultado do envio
         """
+        with drg_logger.chamada(
+            "envio_guia", self.drg_url, self._numeros_guias(json_drg)
+        ) as chamada:
+            resultado = self._executar_envio_guia(json_drg, token, chamada)
+            chamada.finalizar(resultado)
+        registrar_chamada_drg(chamada)
+        return resultado
+
+    def _executar_envio_guia(
+        self, json_drg: Dict[str, Any], token: str, chamada: ChamadaDRG
+    ) -> Dict[str, Any]:
+        """Executa a requisição de envio da guia e interpreta a resposta."""
         try:
             # Headers para envio (formato correto da API DRG)
             headers = {"Content-Type": "application/json", "Authorization": token}
@@ -498,9 +562,7 @@ class DRGService:
             # Fazer requisição de envio (usar timeout do settings)
             settings = get_settings()
             timeout = settings.HTTP_TIMEOUT
-            response = requests.post(
-                self.drg_url, json=json_drg, headers=headers, timeout=timeout
-            )
+            response = self._post_json(self.drg_url, json_drg, headers, timeout, chamada)
 
             # Log da resposta
             response_json = None
@@ -706,6 +768,23 @@ class DRGService:
             - Método: POST
             - Headers: Authorization (JWT), x-api-key
         """
+        guias = [numero_guia] if isinstance(numero_guia, str) else numero_guia
+        with drg_logger.chamada("exportacao", self.drg_pull_url, guias) as chamada:
+            resultado = self._consumir_exportacao(
+                numero_guia, data_ultima_alteracao, page, chamada
+            )
+            chamada.finalizar(resultado)
+        registrar_chamada_drg(chamada)
+        return resultado
+
+    def _consumir_exportacao(
+        self,
+        numero_guia: Optional[str],
+        data_ultima_alteracao: Optional[str],
+        page: int,
+        chamada: ChamadaDRG,
+    ) -> Dict[str, Any]:
+        """Executa a requisição de exportação (PULL) e interpreta a resposta."""
         try:
             # Validar que ao menos um parâmetro foi informado
             if not numero_guia and not data_ultima_alteracao:
@@ -750,8 +829,8 @@ class DRGService:
             # Fazer requisição (usar timeout do settings)
             settings = get_settings()
             timeout = settings.HTTP_TIMEOUT
-            response = requests.post(
-                self.drg_pull_url, json=payload, headers=headers, timeout=timeout
+            response = self._post_json(
+                self.drg_pull_url, payload, headers, timeout, chamada
             )
 
             # Log da resposta
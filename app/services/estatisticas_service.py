@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Serviço de estatísticas agregadas das guias
+
+Todas as contagens por status (tp_status, status_consulta e
+status_monitoramento) saem de uma única consulta GROUP BY, mantida em cache
+por alguns segundos e compartilhada pelas rotas de status. Com os contadores
+materializados habilitados (CONTADORES_GUIAS_ENABLED), a leitura vem da tabela
+de contadores e não depende do tamanho da tabela de guias.
+"""
+
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from sqlalchemy import case, func, select
+from sqlalchemy.orm import Session
+
+from app.config.config import get_settings
+from app.database.database import get_session
+from app.models import Guia
+from app.services.contadores_service import contadores_service
+from app.utils.cache import CacheTTL
+
+logger = logging.getLogger(__name__)
+
+_CHAVE_CONTAGENS = "contagens"
+
+
+class EstatisticasService:
+    """Agregador das contagens de guias por status"""
+
+    def __init__(self):
+        self.settings = get_settings()
+        self._cache = CacheTTL(
+            ttl_segundos=self.settings.ESTATISTICAS_CACHE_SEGUNDOS, max_entradas=1
+        )
+
+    def obter_contagens(self, db: Optional[Session] = None) -> Dict[str, Any]:
+        """
+        Retorna as contagens de guias por status.
+
+        Args:
+            db: Sessão do banco de dados (opcional, abre uma nova se omitida)
+
+        Returns:
+            Dict com total, contagens por tp_status, status_consulta e
+            status_monitoramento, e consultas externas nas últimas 24h
+        """
+        contagens = self._cache.obter(_CHAVE_CONTAGENS)
+        if contagens is not None:
+            return contagens
+
+        if db is not None:
+            contagens = self._consultar_contagens(db)
+        else:
+            with get_session() as sessao:
+                contagens = self._consultar_contagens(sessao)
+
+        self._cache.definir(_CHAVE_CONTAGENS, contagens)
+        return contagens
+
+    def invalidar(self):
+        """Descarta as contagens em cache (próxima leitura consulta o banco)."""
+        self._cache.invalidar(_CHAVE_CONTAGENS)
+
+    def consulta_contagens(self, desde: datetime):
+        """GROUP BY por status, com as consultas externas feitas desde `desde`."""
+        return select(
+            Guia.tp_status,
+            Guia.status_consulta,
+            Guia.status_monitoramento,
+            func.count(Guia.id),
+            func.sum(case((Guia.data_ultima_consulta >= desde, 1), else_=0)),
+        ).group_by(Guia.tp_status, Guia.status_consulta, Guia.status_monitoramento)
+
+    def consulta_recentes(self, desde: datetime):
+        """Contagem das guias consultadas externamente desde `desde`."""
+        return select(func.count(Guia.id)).where(Guia.data_ultima_consulta >= desde)
+
+    def _consultar_contagens(self, db: Session) -> Dict[str, Any]:
+        """Obtém as contagens dos contadores materializados ou da tabela de guias."""
+        ontem = datetime.utcnow() - timedelta(days=1)
+
+        if contadores_service.habilitado:
+            linhas = [
+                (*chave, qtd)
+                for chave, qtd in contadores_service.obter_contadores(db).items()
+            ]
+            # Janela de tempo móvel: não materializável, contada à parte
+            consultas_recentes = db.execute(self.consulta_recentes(ontem)).scalar()
+        else:
+            resultado = db.execute(self.consulta_contagens(ontem)).all()
+            linhas = [linha[:4] for linha in resultado]
+            consultas_recentes = sum(linha[4] or 0 for linha in resultado)
+
+        total = 0
+        por_tp_status: Dict[str, int] = {}
+        por_status_consulta: Dict[str, int] = {}
+        por_status_monitoramento: Dict[str, int] = {}
+
+        for tp_status, status_consulta, status_monitoramento, qtd in linhas:
+            total += qtd
+            por_tp_status[tp_status] = por_tp_status.get(tp_status, 0) + qtd
+            por_status_consulta[status_consulta] = (
+                por_status_consulta.get(status_consulta, 0) + qtd
+            )
+            por_status_monitoramento[status_monitoramento] = (
+                por_status_monitoramento.get(status_monitoramento, 0) + qtd
+            )
+
+        return {
+            "total": total,
+            "por_tp_status": por_tp_status,
+            "por_status_consulta": por_status_consulta,
+            "por_status_monitoramento": por_status_monitoramento,
+            "consultas_recentes_24h": consultas_recentes,
+            "origem": "contadores" if contadores_service.habilitado else "guias",
+            "atualizado_em": datetime.utcnow().isoformat(),
+        }
+
+
+# Instância global do serviço
+estatisticas_service = EstatisticasService()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Exportação em streaming das guias e do seu estado de processamento
+
+Usada pelos operadores para conciliar com a DRG. As linhas são lidas com
+cursor no servidor (`yield_per`: cursor nomeado no PostgreSQL, fetch em
+blocos no Oracle/SQLite) e convertidas em blocos de CSV ou NDJSON à medida que
+chegam, então a memória da API e do banco fica constante mesmo exportando a
+tabela inteira. Com `arquivadas=True` a mesma exportação é feita a partir da
+tabela de arquivo das guias finalizadas.
+"""
+
+import csv
+import io
+import logging
+import time
+from datetime import date, datetime
+from typing import Any, Dict, Iterator, Optional, Sequence
+
+from sqlalchemy import select
+
+from app.config.config import get_settings
+from app.database.database import get_session
+from app.models import Guia, guias_arquivo
+from app.schemas.guia_schema import CAMPOS_PUBLICOS_GUIA
+from app.utils import json_rapido
+
+logger = logging.getLogger(__name__)
+
+FORMATOS = ("csv", "ndjson")
+
+# Colunas exportadas por padrão (estado de processamento de cada guia)
+CAMPOS_PADRAO = (
+    "id",
+    "numero_guia",
+    "numero_guia_operadora",
+    "codigo_operadora",
+    "situacao_guia",
+    "tp_status",
+    "tentativas",
+    "mensagem_erro",
+    "data_processamento",
+    "status_consulta",
+    "status_monitoramento",
+    "data_ultima_consulta",
+    "data_atualizacao",
+)
+
+# Filtros de igualdade aceitos: parâmetro -> coluna
+FILTROS_IGUALDADE = {
+    "status": Guia.tp_status,
+    "situacao_guia": Guia.situacao_guia,
+    "status_consulta": Guia.status_consulta,
+    "status_monitoramento": Guia.status_monitoramento,
+}
+
+
+def _texto_csv(valor: Any) -> Any:
+    if valor is None:
+        return ""
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat()
+    return valor
+
+
+class ExportacaoService:
+    """Geração de CSV/NDJSON das guias em streaming"""
+
+    def __init__(self):
+        self.settings = get_settings()
+
+    def montar_consulta(
+        self,
+        campos: Sequence[str],
+        filtros: Dict[str, Optional[str]],
+        atualizado_desde: Optional[datetime] = None,
+        atualizado_ate: Optional[datetime] = None,
+        arquivadas: bool = False,
+    ):
+        """
+        SELECT das colunas pedidas, com os filtros, ordenado por id.
+
+        Só exporta colunas de CAMPOS_PUBLICOS_GUIA (ValueError para as demais).
+        """
+        nao_permitidos = [
+            campo for campo in campos if campo not in CAMPOS_PUBLICOS_GUIA
+        ]
+        if nao_permitidos:
+            raise ValueError(f"Campos não permitidos: {', '.join(nao_permitidos)}")
+
+        tabela = guias_arquivo if arquivadas else Guia.__table__
+        colunas = tabela.columns
+        query = select(*(colunas[campo] for campo in campos)).order_by(colunas.id)
+
+        for parametro, valor in filtros.items():
+            if valor:
+                coluna = colunas[FILTROS_IGUALDADE[parametro].name]
+                query = query.where(coluna == valor.upper())
+        if atualizado_desde:
+            query = query.where(colunas.data_atualizacao >= atualizado_desde)
+        if atualizado_ate:
+            query = query.where(colunas.data_atualizacao < atualizado_ate)
+
+        return query
+
+    def exportar(self, query, campos: Sequence[str], formato: str) -> Iterator[bytes]:
+        """
+        Gera o arquivo em blocos de EXPORTACAO_LINHAS_POR_BLOCO linhas.
+
+        Gerador síncrono: o StreamingResponse o consome em uma thread e envia
+        cada bloco como um chunk HTTP. A sessão fica aberta apenas enquanto o
+        gerador é consumido.
+        """
+        por_bloco = self.settings.EXPORTACAO_LINHAS_POR_BLOCO
+        inicio = time.monotonic()
+        total = 0
+
+        with get_session() as db:
+            resultado = db.execute(query.execution_options(yield_per=por_bloco))
+
+            if formato == "csv":
+                buffer = io.StringIO()
+                escritor = csv.writer(buffer)
+                escritor.writerow(campos)
+                for bloco in resultado.partitions():
+                    escritor.writerows(
+                        [_texto_csv(valor) for valor in linha] for linha in bloco
+                    )
+                    total += len(bloco)
+                    yield buffer.getvalue().encode("utf-8")
+                    buffer.seek(0)
+                    buffer.truncate()
+                if total == 0:
+                    yield buffer.getvalue().encode("utf-8")
+            else:
+                for bloco in resultado.mappings().partitions():
+                    total += len(bloco)
+                    yield b"".join(
+                        json_rapido.dumps(dict(linha)) + b"\n" for linha in bloco
+                    )
+
+        logger.info(
+            f"📤 Exportação {formato.upper()} concluída: {total} guias em "
+            f"{time.monotonic() - inicio:.1f}s"
+        )
+
+
+# Instância global do serviço
+exportacao_service = ExportacaoService()
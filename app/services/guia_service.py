@@ -3,9 +3,13 @@ from typing import Dict, Any
 from pathlib import Path
 import logging
 import base64
+import time
+import structlog
 from app.models import Guia, Anexo, Procedimento, Diagnostico
-from app.utils.logger import drg_logger
+from app.utils.logger import drg_logger, novo_id_correlacao
 from app.config.config import get_settings
+from app.utils.metricas import registrar_codificacao_anexo
+from app.utils.rastreamento import span
 
 
 class AttachmentProcessingError(Exception):
@@ -219,8 +223,9 @@ class GuiaService:
                 f"arquivo excede o limite de 20MB (tamanho atual: {tamanho / (1024 * 1024):.2f}MB)"
             )
 
+        inicio = time.perf_counter()
         try:
-            with arquivo_path.open("rb") as arquivo:
+            with span("ler_anexo", bytes=tamanho), arquivo_path.open("rb") as arquivo:
                 conteudo = arquivo.read()
         except OSError as exc:
             raise AttachmentProcessingError(f"erro ao ler arquivo: {exc}") from exc
@@ -228,7 +233,10 @@ class GuiaService:
         if not conteudo:
             raise AttachmentProcessingError("arquivo vazio")
 
-        return base64.b64encode(conteudo).decode("utf-8")
+        with span("codificar_base64", bytes=len(conteudo)):
+            conteudo_base64 = base64.b64encode(conteudo).decode("utf-8")
+        registrar_codificacao_anexo(time.perf_counter() - inicio)
+        return conteudo_base64
 
     def _montar_procedimentos(self, procedimentos) -> list:
         """Monta lista de procedimentos."""
@@ -320,11 +328,19 @@ class GuiaService:
 
             self.logger.info(f"📦 Processando lote de {len(guias)} guias")
 
+            # Carregar relacionamentos antes da montagem para medir os lazy loads
+            # separadamente da montagem do JSON
+            with span("carregar_relacionamentos", guias=len(guias)):
+                for guia in guias:
+                    guia.anexos, guia.procedimentos, guia.diagnosticos
+
             # Montar JSON do lote
-            json_lote = self.montar_lote_drg(guias)
+            with span("montar_json", guias=len(guias)):
+                json_lote = self.montar_lote_drg(guias)
 
-            # Enviar lote para DRG
-            resultado = drg_service.enviar_lote(json_lote)
+            # Enviar lote para DRG (lote_id identifica o lote nos logs)
+            with structlog.contextvars.bound_contextvars(lote_id=novo_id_correlacao()):
+                resultado = drg_service.enviar_lote(json_lote)
 
             if resultado.get("sucesso"):
                 # Log resumido (log detalhado já foi feito em drg_service)
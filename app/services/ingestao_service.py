@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+"""
+Ingestão de lotes de guias (payload `loteGuias`)
+
+Valida cada guia com o GuiaSchema, descarta duplicatas dentro do lote e guias
+já existentes no banco (pelo numero_guia) e grava as novas com INSERTs em lote
+(executemany) para guias, anexos, procedimentos e diagnósticos, em vez de um
+INSERT por objeto via ORM. Reenviar o mesmo lote é idempotente: as guias já
+gravadas voltam com status "existente" e o id original.
+
+Cargas grandes (milhares a centenas de milhares de guias) usam
+ImportacaoNDJSON: uma guia por linha, lida em streaming e gravada em blocos
+de INGESTAO_NDJSON_COMMIT_SIZE, com memória constante.
+"""
+
+import logging
+import os
+import time
+from collections import Counter
+from datetime import datetime, date
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.config.config import get_settings
+from app.models import Anexo, Diagnostico, Guia, Procedimento
+from app.schemas.guia_schema import GuiaSchema
+from app.services.arquivamento_service import arquivamento_service
+from app.services.contadores_service import CAMPOS_STATUS, contadores_service
+from app.services.estatisticas_service import estatisticas_service
+from app.utils import json_rapido
+
+logger = logging.getLogger(__name__)
+
+# Tamanho dos blocos do IN (...) ao consultar numero_guia existentes
+_BLOCO_CONSULTA = 500
+
+# Status de cada guia no resultado da ingestão
+INSERIDA = "inserida"
+EXISTENTE = "existente"
+INVALIDA = "invalida"
+DUPLICADA_NO_LOTE = "duplicada_no_lote"
+
+# Campos do schema que não são colunas da tabela de guias
+_RELACIONAMENTOS = ("anexo", "procedimento", "diagnostico")
+
+
+def _em_blocos(itens: List[Any], tamanho: int) -> Iterable[List[Any]]:
+    for inicio in range(0, len(itens), tamanho):
+        yield itens[inicio : inicio + tamanho]
+
+
+def _valores_padrao() -> Dict[str, Any]:
+    """Defaults escalares das colunas de guias (aplicados também a campos None)."""
+    padroes = {}
+    for coluna in Guia.__table__.columns:
+        if coluna.default is not None and coluna.default.is_scalar:
+            padroes[coluna.name] = coluna.default.arg
+    return padroes
+
+
+class IngestaoService:
+    """Validação e gravação em lote de guias recebidas via API"""
+
+    def __init__(self):
+        self.settings = get_settings()
+        self._padroes = _valores_padrao()
+
+    def ingerir_lote(self, db: Session, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Valida e grava um lote `{"loteGuias": {"guia": [...]}}`.
+
+        Returns:
+            Dict: totais por status e o resultado de cada guia, na ordem do lote
+        """
+        # Corpo JSON arbitrário: qualquer nível fora do formato esperado
+        # (lista, texto, null...) é o mesmo erro de loteGuias.guia ausente
+        lote = payload.get("loteGuias") if isinstance(payload, dict) else None
+        guias = lote.get("guia") if isinstance(lote, dict) else None
+        if not isinstance(guias, list) or not guias:
+            return {
+                "sucesso": False,
+                "erro": "Payload deve conter 'loteGuias.guia' com ao menos uma guia",
+            }
+
+        limite = self.settings.INGESTAO_MAX_GUIAS
+        if len(guias) > limite:
+            return {
+                "sucesso": False,
+                "erro": f"Lote com {len(guias)} guias excede o limite de {limite}",
+            }
+
+        resultados = self.processar(db, enumerate(guias), "indice")
+
+        totais = Counter(resultado["status"] for resultado in resultados)
+        logger.info(
+            f"📥 Lote ingerido: {len(guias)} guias | "
+            f"{totais[INSERIDA]} inseridas | {totais[EXISTENTE]} existentes | "
+            f"{totais[INVALIDA]} inválidas | {totais[DUPLICADA_NO_LOTE]} duplicadas"
+        )
+
+        return {
+            "sucesso": totais[INVALIDA] == 0,
+            "total": len(guias),
+            "inseridas": totais[INSERIDA],
+            "existentes": totais[EXISTENTE],
+            "invalidas": totais[INVALIDA],
+            "duplicadas": totais[DUPLICADA_NO_LOTE],
+            "resultados": resultados,
+        }
+
+    def processar(self, db: Session, itens, chave: str) -> List[Dict[str, Any]]:
+        """
+        Valida, deduplica e grava um bloco de guias.
+
+        Args:
+            itens: pares (posição, dados da guia)
+            chave: nome do campo de posição no resultado ("indice" ou "linha")
+
+        Returns:
+            List[Dict]: resultado de cada guia, na ordem recebida
+        """
+        resultados, validas = self._validar_guias(itens, chave)
+        self._concluir(db, resultados, validas)
+        return resultados
+
+    def _validar_guias(self, itens, chave: str):
+        """
+        Valida as guias e descarta repetições (a primeira ocorrência vence).
+
+        Dados que sejam uma exceção (linha NDJSON que não pôde ser decodificada)
+        são registrados como guia inválida.
+
+        Returns:
+            tuple: (resultados na ordem recebida, numero_guia -> GuiaSchema)
+        """
+        resultados: List[Dict[str, Any]] = []
+        validas: Dict[str, GuiaSchema] = {}
+
+        for posicao, dados in itens:
+            if isinstance(dados, ValueError):
+                resultados.append(
+                    {
+                        chave: posicao,
+                        "numero_guia": None,
+                        "status": INVALIDA,
+                        "erros": [{"campo": "", "mensagem": f"JSON inválido: {dados}"}],
+                    }
+                )
+                continue
+
+            try:
+                guia = GuiaSchema.model_validate(dados)
+            except ValidationError as e:
+                resultados.append(
+                    {
+                        chave: posicao,
+                        "numero_guia": (
+                            dados.get("numeroGuia") or dados.get("numero_guia")
+                            if isinstance(dados, dict)
+                            else None
+                        ),
+                        "status": INVALIDA,
+                        "erros": [
+                            {
+                                "campo": ".".join(str(p) for p in erro["loc"]),
+                                "mensagem": erro["msg"],
+                            }
+                            for erro in e.errors()
+                        ],
+                    }
+                )
+                continue
+
+            status = DUPLICADA_NO_LOTE if guia.numero_guia in validas else None
+            if status is None:
+                validas[guia.numero_guia] = guia
+            resultados.append(
+                {chave: posicao, "numero_guia": guia.numero_guia, "status": status}
+            )
+
+        return resultados, validas
+
+    def _concluir(
+        self,
+        db: Session,
+        resultados: List[Dict[str, Any]],
+        validas: Dict[str, GuiaSchema],
+    ):
+        """Grava as guias válidas e preenche status/id nos resultados."""
+        # Uma nova tentativa se outro processo inserir a mesma guia
+        try:
+            ids, existentes = self._gravar(db, validas)
+        except IntegrityError:
+            db.rollback()
+            logger.warning("⚠️ Conflito de numero_guia na ingestão, repetindo...")
+            ids, existentes = self._gravar(db, validas)
+
+        for resultado in resultados:
+            numero = resultado["numero_guia"]
+            if resultado["status"] is None:
+                resultado["status"] = EXISTENTE if numero in existentes else INSERIDA
+                resultado["id"] = ids[numero]
+
+    def _gravar(self, db: Session, validas: Dict[str, GuiaSchema]):
+        """
+        Insere as guias ainda inexistentes e seus filhos em uma transação.
+
+        Returns:
+            tuple: (numero_guia -> id, conjunto de numero_guia que já existiam)
+        """
+        ids = self._consultar_ids(db, list(validas))
+        # Guias finalizadas já movidas para o arquivo também não são reinseridas
+        pendentes = [numero for numero in validas if numero not in ids]
+        for bloco in _em_blocos(pendentes, _BLOCO_CONSULTA):
+            ids.update(arquivamento_service.numeros_arquivados(db, bloco))
+        existentes = set(ids)
+        novas = [guia for numero, guia in validas.items() if numero not in existentes]
+
+        if not novas:
+            return ids, existentes
+
+        db.execute(insert(Guia), [self._linha_guia(guia) for guia in novas])
+        ids.update(self._consultar_ids(db, [guia.numero_guia for guia in novas]))
+
+        anexos, procedimentos, diagnosticos = [], [], []
+        for guia in novas:
+            guia_id = ids[guia.numero_guia]
+            for filho, destino in (
+                (guia.anexo, anexos),
+                (guia.procedimento, procedimentos),
+                (guia.diagnostico, diagnosticos),
+            ):
+                destino.extend(
+                    {**item.model_dump(), "guia_id": guia_id} for item in filho or ()
+                )
+
+        for modelo, linhas in (
+            (Anexo, anexos),
+            (Procedimento, procedimentos),
+            (Diagnostico, diagnosticos),
+        ):
+            if linhas:
+                db.execute(insert(modelo), linhas)
+
+        # INSERT em lote não passa pelo evento de flush dos contadores
+        if contadores_service.habilitado:
+            chave = tuple(self._padroes[campo] for campo in CAMPOS_STATUS)
+            contadores_service.aplicar_variacoes(db, Counter({chave: len(novas)}))
+
+        db.commit()
+        estatisticas_service.invalidar()
+        return ids, existentes
+
+    def _consultar_ids(self, db: Session, numeros: List[str]) -> Dict[str, int]:
+        ids = {}
+        for bloco in _em_blocos(numeros, _BLOCO_CONSULTA):
+            ids.update(
+                db.execute(
+                    select(Guia.numero_guia, Guia.id).where(Guia.numero_guia.in_(bloco))
+                ).all()
+            )
+        return ids
+
+    def _linha_guia(self, guia: GuiaSchema) -> Dict[str, Any]:
+        """Linha da tabela de guias; todas as linhas têm as mesmas chaves (executemany)."""
+        linha = guia.model_dump(exclude=set(_RELACIONAMENTOS))
+        for campo, padrao in self._padroes.items():
+            if linha.get(campo) is None:
+                linha[campo] = padrao
+
+        # Coluna DateTime; o schema recebe apenas a data
+        nascimento = linha["data_nascimento"]
+        if isinstance(nascimento, date) and not isinstance(nascimento, datetime):
+            linha["data_nascimento"] = datetime.combine(nascimento, datetime.min.time())
+
+        agora = datetime.utcnow()
+        linha["data_criacao"] = agora
+        linha["data_atualizacao"] = agora
+        return linha
+
+
+class DivisorLinhas:
+    """Separa um fluxo de bytes em linhas, descartando linhas acima do limite"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._resto = b""
+        self._descartando = False
+
+    def alimentar(self, parte: bytes) -> List[Optional[bytes]]:
+        """
+        Returns:
+            List: linhas completas; None no lugar de cada linha acima do limite
+        """
+        linhas: List[Optional[bytes]] = []
+        inicio = 0
+        while True:
+            fim = parte.find(b"\n", inicio)
+            if fim < 0:
+                break
+            if self._descartando:
+                linhas.append(None)
+                self._descartando = False
+            else:
+                linha = self._resto + parte[inicio:fim]
+                linhas.append(linha if len(linha) <= self.max_bytes else None)
+            self._resto = b""
+            inicio = fim + 1
+
+        if not self._descartando:
+            self._resto += parte[inicio:]
+            if len(self._resto) > self.max_bytes:
+                # Não acumular uma linha gigante em memória
+                self._resto = b""
+                self._descartando = True
+        return linhas
+
+    def finalizar(self) -> List[Optional[bytes]]:
+        """Última linha, se o fluxo não terminar com quebra de linha."""
+        if self._descartando:
+            self._descartando = False
+            return [None]
+        linha, self._resto = self._resto, b""
+        return [linha] if linha.strip() else []
+
+
+class ImportacaoNDJSON:
+    """
+    Importação em streaming de guias NDJSON (um GuiaSchema por linha).
+
+    Os bytes chegam em partes (alimentar); as linhas são decodificadas e
+    acumuladas até tamanho_commit e então validadas e gravadas em bloco
+    (descarregar), com um commit por bloco. Guias rejeitadas vão para
+    arquivo_rejeitos (NDJSON com linha, numero_guia e erros). Apenas um bloco
+    fica em memória, independentemente do tamanho do arquivo.
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        tamanho_commit: Optional[int] = None,
+        arquivo_rejeitos: Optional[str] = None,
+        ao_progredir: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ):
+        settings = get_settings()
+        self.db = db
+        self.tamanho_commit = tamanho_commit or settings.INGESTAO_NDJSON_COMMIT_SIZE
+        self.arquivo_rejeitos = arquivo_rejeitos
+        self.ao_progredir = ao_progredir
+        self.linhas = 0
+        self.totais: Counter = Counter()
+        self._bloco: List[Any] = []
+        self._divisor = DivisorLinhas(settings.INGESTAO_MAX_KB * 1024)
+        self._rejeitos = None
+        self._inicio = time.monotonic()
+
+    def alimentar(self, parte: bytes) -> bool:
+        """
+        Recebe uma parte do fluxo.
+
+        Returns:
+            bool: True quando o bloco atingiu tamanho_commit e deve ser descarregado
+        """
+        for linha in self._divisor.alimentar(parte):
+            self._adicionar(linha)
+        return len(self._bloco) >= self.tamanho_commit
+
+    def _adicionar(self, linha: Optional[bytes]):
+        self.linhas += 1
+        if linha is None:
+            self._bloco.append(
+                (self.linhas, ValueError("linha excede INGESTAO_MAX_KB"))
+            )
+            return
+        if not linha.strip():
+            return
+        try:
+            self._bloco.append((self.linhas, json_rapido.loads(linha)))
+        except ValueError as e:
+            self._bloco.append((self.linhas, e))
+
+    def descarregar(self):
+        """Valida e grava o bloco acumulado (um commit)."""
+        if not self._bloco:
+            return
+
+        bloco, self._bloco = self._bloco, []
+        resultados = ingestao_service.processar(self.db, bloco, "linha")
+
+        for resultado in resultados:
+            self.totais[resultado["status"]] += 1
+            if resultado["status"] == INVALIDA:
+                self._registrar_rejeito(resultado)
+
+        resumo = self.resumo()
+        logger.info(
+            f"📦 Importação NDJSON: {resumo['linhas']} linhas | "
+            f"{resumo['inseridas']} inseridas | {resumo['existentes']} existentes | "
+            f"{resumo['invalidas']} inválidas | {resumo['guias_por_segundo']} guias/s"
+        )
+        if self.ao_progredir:
+            self.ao_progredir(resumo)
+
+    def _registrar_rejeito(self, resultado: Dict[str, Any]):
+        if not self.arquivo_rejeitos:
+            return
+        if self._rejeitos is None:
+            diretorio = os.path.dirname(self.arquivo_rejeitos)
+            if diretorio:
+                os.makedirs(diretorio, exist_ok=True)
+            self._rejeitos = open(self.arquivo_rejeitos, "wb")
+        self._rejeitos.write(json_rapido.dumps(resultado) + b"\n")
+
+    def finalizar(self) -> Dict[str, Any]:
+        """Grava o último bloco, fecha o arquivo de rejeitos e retorna o resumo."""
+        try:
+            for linha in self._divisor.finalizar():
+                self._adicionar(linha)
+            self.descarregar()
+        finally:
+            if self._rejeitos is not None:
+                self._rejeitos.close()
+                self._rejeitos = None
+
+        return self.resumo()
+
+    def resumo(self) -> Dict[str, Any]:
+        duracao = time.monotonic() - self._inicio
+        processadas = sum(self.totais.values())
+        return {
+            "sucesso": True,
+            "linhas": self.linhas,
+            "inseridas": self.totais[INSERIDA],
+            "existentes": self.totais[EXISTENTE],
+            "invalidas": self.totais[INVALIDA],
+            "duplicadas": self.totais[DUPLICADA_NO_LOTE],
+            "arquivo_rejeitos": (
+                self.arquivo_rejeitos if self.totais[INVALIDA] else None
+            ),
+            "duracao_segundos": round(duracao, 2),
+            "guias_por_segundo": round(processadas / duracao) if duracao > 0 else 0,
+        }
+
+
+# Instância global do serviço
+ingestao_service = IngestaoService()
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Eleição de líder entre workers via lease no banco de dados
+
+Com vários processos (uvicorn --workers N) apenas o worker que detém o lease
+da tabela inovemed_tbl_lideranca executa as tarefas em segundo plano. O lease
+é renovado periodicamente; se o líder parar de renovar (queda, travamento),
+outro worker assume quando o lease expira. Usa apenas UPDATE/INSERT
+condicionais, portanto funciona em qualquer banco suportado (SQLite,
+PostgreSQL, Oracle, Firebird).
+
+A renovação roda em uma thread própria, e não no event loop: os monitores
+fazem chamadas HTTP e consultas síncronas que podem segurar o loop por até
+HTTP_TIMEOUT, e o lease não pode expirar no meio de um ciclo. Mesmo assim, os
+monitores conferem `detem_lease()` antes de cada lote (fencing) e reservam as
+guias com UPDATE condicional antes de enviar.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from sqlalchemy import or_, update
+from sqlalchemy.exc import IntegrityError
+
+from app.config.config import get_settings
+from app.database.database import get_session
+from app.models import Lideranca
+
+logger = logging.getLogger(__name__)
+
+# Papel disputado pelos workers
+PAPEL_MONITORES = "monitores"
+
+Callback = Callable[[], Awaitable[None]]
+
+
+class LiderancaService:
+    """Disputa e renovação do lease de liderança"""
+
+    def __init__(self, nome: str = PAPEL_MONITORES):
+        self.settings = get_settings()
+        self.habilitado = self.settings.LEADER_ELECTION_ENABLED
+        self.nome = nome
+        self.id_worker = (
+            f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        )
+        self.duracao_lease = timedelta(seconds=self._segundos_lease())
+        self.lider = False
+        self._expira_em: Optional[datetime] = None
+
+        # Controle de execução da thread de renovação
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+        self._parar_thread = threading.Event()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._detem = False  # Resultado da última renovação (thread)
+        self._transicao = asyncio.Lock()
+        self._ao_assumir: Optional[Callback] = None
+        self._ao_perder: Optional[Callback] = None
+
+    def _segundos_lease(self) -> int:
+        """
+        Validade do lease, nunca menor que o pior bloqueio de um ciclo.
+
+        Uma chamada à DRG pode levar até HTTP_TIMEOUT; com um lease mais curto
+        outro worker assumiria enquanto o líder ainda envia.
+        """
+        configurado = self.settings.LEADER_LEASE_SECONDS
+        minimo = self.settings.HTTP_TIMEOUT + 2 * self.settings.LEADER_RENEW_SECONDS
+        if configurado < minimo:
+            logger.warning(
+                f"⚠️ LEADER_LEASE_SECONDS={configurado}s menor que o pior bloqueio "
+                f"(HTTP_TIMEOUT + 2 x LEADER_RENEW_SECONDS = {minimo}s): usando {minimo}s"
+            )
+            return minimo
+        return configurado
+
+    def tentar_assumir(self) -> bool:
+        """
+        Assume ou renova o lease (síncrono, executado fora do event loop).
+
+        O UPDATE só afeta a linha se este worker já é o dono ou se o lease do
+        dono atual expirou; o banco garante que apenas um worker vença.
+
+        Returns:
+            bool: True se este worker detém o lease
+        """
+        agora = datetime.utcnow()
+        expira_em = agora + self.duracao_lease
+
+        with get_session() as db:
+            try:
+                assumiu = db.execute(
+                    update(Lideranca)
+                    .where(
+                        Lideranca.nome == self.nome,
+                        or_(
+                            Lideranca.dono == self.id_worker,
+                            Lideranca.expira_em < agora,
+                        ),
+                    )
+                    .values(dono=self.id_worker, expira_em=expira_em)
+                ).rowcount
+
+                if not assumiu and db.get(Lideranca, self.nome) is None:
+                    # Primeira execução: criar a linha do papel
+                    db.add(
+                        Lideranca(
+                            nome=self.nome, dono=self.id_worker, expira_em=expira_em
+                        )
+                    )
+                    db.flush()
+                    assumiu = 1
+
+                db.commit()
+            except IntegrityError:
+                # Outro worker criou a linha ao mesmo tempo
+                db.rollback()
+                assumiu = 0
+
+        self._expira_em = expira_em if assumiu else None
+        return bool(assumiu)
+
+    def detem_lease(self) -> bool:
+        """
+        Fencing: True se este worker ainda detém um lease válido.
+
+        Os monitores chamam antes de cada lote; sem eleição de líder é sempre
+        True.
+        """
+        if not self.habilitado:
+            return True
+        expira_em = self._expira_em
+        return expira_em is not None and datetime.utcnow() < expira_em
+
+    def liberar(self):
+        """Expira o lease deste worker para que outro assuma imediatamente."""
+        with get_session() as db:
+            db.execute(
+                update(Lideranca)
+                .where(Lideranca.nome == self.nome, Lideranca.dono == self.id_worker)
+                .values(expira_em=datetime.utcnow())
+            )
+            db.commit()
+        self._expira_em = None
+
+    def estado(self) -> Dict[str, Any]:
+        """Situação da liderança deste worker (para as rotas de status)."""
+        return {
+            "habilitada": self.habilitado,
+            "worker": self.id_worker,
+            "lider": self.lider if self.habilitado else True,
+            "lease_expira_em": (
+                self._expira_em.isoformat() if self.lider and self._expira_em else None
+            ),
+        }
+
+    async def iniciar(self, ao_assumir: Callback, ao_perder: Callback):
+        """Inicia a disputa; os callbacks rodam ao ganhar e ao perder a liderança."""
+        if self._running:
+            return
+
+        self._ao_assumir = ao_assumir
+        self._ao_perder = ao_perder
+        self._loop = asyncio.get_running_loop()
+        self._running = True
+        self._parar_thread.clear()
+        self._thread = threading.Thread(
+            target=self._loop_eleicao, name="lideranca-lease", daemon=True
+        )
+        self._thread.start()
+
+    async def parar(self):
+        """Para a disputa, encerra as tarefas do líder e libera o lease."""
+        self._running = False
+        self._parar_thread.set()
+        if self._thread:
+            await asyncio.to_thread(self._thread.join)
+            self._thread = None
+        self._detem = False
+
+        async with self._transicao:
+            if self.lider:
+                self.lider = False
+                await self._ao_perder()
+                try:
+                    await asyncio.to_thread(self.liberar)
+                    logger.info("👑 Liderança liberada")
+                except Exception as e:
+                    logger.warning(f"⚠️ Não foi possível liberar a liderança: {e}")
+
+    def _loop_eleicao(self):
+        """Renova/disputa o lease periodicamente (thread própria)"""
+        intervalo = self.settings.LEADER_RENEW_SECONDS
+        logger.info(
+            f"🗳️ Eleição de líder iniciada (worker {self.id_worker}, "
+            f"lease {int(self.duracao_lease.total_seconds())}s, renovação {intervalo}s)"
+        )
+
+        while self._running:
+            try:
+                lider = self.tentar_assumir()
+            except Exception as e:
+                # Sem acesso ao banco: continuar líder só enquanto o lease vale
+                lider = self.detem_lease()
+                logger.error(f"❌ Erro ao renovar liderança: {e}")
+
+            if lider != self._detem:
+                self._detem = lider
+                # Os callbacks iniciam/param tasks: rodam no event loop
+                asyncio.run_coroutine_threadsafe(self._aplicar_transicao(), self._loop)
+
+            self._parar_thread.wait(intervalo)
+
+        logger.info("🛑 Eleição de líder finalizada")
+
+    async def _aplicar_transicao(self):
+        """Inicia ou para as tarefas conforme o resultado da última renovação"""
+        async with self._transicao:
+            if not self._running:
+                return
+            try:
+                if self._detem and not self.lider:
+                    self.lider = True
+                    logger.info(
+                        f"👑 Worker {self.id_worker} assumiu a liderança: "
+                        f"iniciando tarefas em segundo plano"
+                    )
+                    await self._ao_assumir()
+                elif not self._detem and self.lider:
+                    self.lider = False
+                    logger.warning(
+                        f"⚠️ Worker {self.id_worker} perdeu a liderança: "
+                        f"parando tarefas em segundo plano"
+                    )
+                    await self._ao_perder()
+            except Exception as e:
+                logger.error(f"❌ Erro na eleição de líder: {e}")
+
+
+# Instância global do serviço
+lideranca_service = LiderancaService()
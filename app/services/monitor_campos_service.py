@@ -7,14 +7,19 @@ import asyncio
 import logging
 from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+import structlog
 
 from app.database.database import get_session
 from app.models import Guia
 from app.services.drg_service import DRGService
+from app.services.estatisticas_service import estatisticas_service
 from app.services.guia_service import GuiaService
+from app.services.lideranca_service import lideranca_service
 from app.config.config import get_settings
-from app.utils.logger import drg_logger
+from app.utils.logger import drg_logger, novo_id_correlacao
+from app.utils.metricas import medir_ciclo_monitor
 
 
 class MonitorCamposService:
@@ -51,6 +56,10 @@ class MonitorCamposService:
             self.settings, "MONITOR_CAMPOS_INTERVALO_MINUTES", 10
         )
 
+    def consulta_monitoradas(self):
+        """SELECT das guias com status_monitoramento = "M" """
+        return select(Guia).where(Guia.status_monitoramento == "M")
+
     async def monitorar_guias(self) -> Dict[str, Any]:
         """
         Monitora guias com status_monitoramento = "M" e detecta mudanças
@@ -60,9 +69,7 @@ class MonitorCamposService:
 
             with get_session() as db:
                 # Buscar guias que estão sendo monitoradas
-                guias_monitoramento = (
-                    db.query(Guia).filter(Guia.status_monitoramento == "M").all()
-                )
+                guias_monitoramento = db.scalars(self.consulta_monitoradas()).all()
 
                 if not guias_monitoramento:
                     self.logger.info("📭 Nenhuma guia em monitoramento encontrada")
@@ -119,6 +126,14 @@ class MonitorCamposService:
                 puts_enviados = 0
 
                 for guia in guias_validas:
+                    # Fencing (execução contínua, só no líder): sem o lease,
+                    # outro worker pode já estar enviando as mesmas guias
+                    if self._running and not lideranca_service.detem_lease():
+                        self.logger.warning(
+                            "⚠️ Lease de liderança perdido: interrompendo o monitoramento de campos"
+                        )
+                        break
+
                     try:
                         resultado = await self._processar_guia(db, guia)
                         guias_processadas += 1
@@ -325,7 +340,9 @@ class MonitorCamposService:
             json_completo = self.guia_service.montar_json_drg(guia)
 
             # Enviar JSON completo para DRG usando POST (mesma rota)
-            resultado = self.drg_service.enviar_guia(json_completo)
+            resultado = await asyncio.to_thread(
+                self.drg_service.enviar_guia, json_completo
+            )
 
             if resultado["sucesso"]:
                 # Atualizar status da guia
@@ -384,7 +401,9 @@ class MonitorCamposService:
 
             # O JSON já está completo com todos os campos, incluindo senha_autorizacao
             # Enviar JSON completo para DRG usando POST (mesma rota)
-            resultado = self.drg_service.enviar_guia(json_completo)
+            resultado = await asyncio.to_thread(
+                self.drg_service.enviar_guia, json_completo
+            )
 
             if resultado["sucesso"]:
                 # Atualizar status da guia
@@ -445,7 +464,11 @@ class MonitorCamposService:
 
         while self._running:
             try:
-                await self.monitorar_guias()
+                # Correlation id por ciclo para agrupar os logs das chamadas
+                with structlog.contextvars.bound_contextvars(
+                    correlation_id=novo_id_correlacao()
+                ), medir_ciclo_monitor("campos"):
+                    await self.monitorar_guias()
 
                 # Aguardar próximo ciclo
                 await asyncio.sleep(self.intervalo_monitoramento * 60)
@@ -464,33 +487,24 @@ class MonitorCamposService:
         Obtém estatísticas do monitoramento
         """
         try:
-            with get_session() as db:
-                # Contar guias por status de monitoramento
-                total_guias = db.query(Guia).count()
-                nao_monitorando = (
-                    db.query(Guia).filter(Guia.status_monitoramento == "N").count()
-                )
-                monitorando = (
-                    db.query(Guia).filter(Guia.status_monitoramento == "M").count()
-                )
-                finalizadas = (
-                    db.query(Guia).filter(Guia.status_monitoramento == "F").count()
-                )
+            # Contar guias por status de monitoramento (consulta agregada única)
+            contagens = estatisticas_service.obter_contagens()
+            por_status = contagens["por_status_monitoramento"]
 
-                return {
-                    "timestamp": datetime.utcnow().isoformat(),
-                    "estatisticas": {
-                        "total_guias": total_guias,
-                        "nao_monitorando": nao_monitorando,
-                        "monitorando": monitorando,
-                        "finalizadas": finalizadas,
-                    },
-                    "configuracoes": {
-                        "intervalo_minutos": self.intervalo_monitoramento,
-                        "campos_criticos": self.campos_criticos,
-                        "status_final": self.status_final,
-                    },
-                }
+            return {
+                "timestamp": datetime.utcnow().isoformat(),
+                "estatisticas": {
+                    "total_guias": contagens["total"],
+                    "nao_monitorando": por_status.get("N", 0),
+                    "monitorando": por_status.get("M", 0),
+                    "finalizadas": por_status.get("F", 0),
+                },
+                "configuracoes": {
+                    "intervalo_minutos": self.intervalo_monitoramento,
+                    "campos_criticos": self.campos_criticos,
+                    "status_final": self.status_final,
+                },
+            }
 
         except Exception as e:
             self.logger.error(f"❌ Erro ao obter estatísticas: {e}")
@@ -8,14 +8,18 @@ import asyncio
 import logging
 from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+import structlog
 
 from app.database.database import get_session
 from app.models import Guia
 from app.services.drg_service import DRGService
 from app.services.guia_service import GuiaService
+from app.services.lideranca_service import lideranca_service
 from app.config.config import get_settings
-from app.utils.logger import drg_logger
+from app.utils.logger import drg_logger, novo_id_correlacao
+from app.utils.metricas import medir_ciclo_monitor
 
 
 class MonitorPullService:
@@ -84,8 +88,11 @@ class MonitorPullService:
                         await asyncio.sleep(10)  # Aguardar 10 segundos
                         continue
                     
-                    # Processar atualizações
-                    await self._processar_atualizacoes_pull()
+                    # Processar atualizações (correlation id por ciclo)
+                    with structlog.contextvars.bound_contextvars(
+                        correlation_id=novo_id_correlacao()
+                    ), medir_ciclo_monitor("pull"):
+                        await self._processar_atualizacoes_pull()
                 except Exception as e:
                     self.logger.error(f"❌ Erro no monitoramento PULL: {e}")
 
@@ -142,16 +149,7 @@ class MonitorPullService:
             # Usar tp_status='T' (Transmitido) para guias enviadas com sucesso
             data_limite = datetime.utcnow() - timedelta(hours=24)
             
-            guias_enviadas = (
-                session.query(Guia)
-                .filter(
-                    Guia.tp_status == 'T',  # Status 'T' = Transmitido (enviado com sucesso)
-                    Guia.data_processamento.isnot(None),
-                    Guia.data_processamento >= data_limite,
-                    Guia.numero_guia.isnot(None)
-                )
-                .all()
-            )
+            guias_enviadas = session.scalars(self.consulta_enviadas(data_limite)).all()
 
             if not guias_enviadas:
                 self.logger.info("📭 Nenhuma guia enviada recentemente encontrada")
@@ -163,6 +161,11 @@ class MonitorPullService:
             lotes = self._agrupar_em_lotes(guias_enviadas, self.settings.MONITOR_PULL_MAX_PAGE_SIZE)
 
             for i, lote in enumerate(lotes, 1):
+                # Fencing: sem o lease, outro worker assumiu o PULL
+                if not lideranca_service.detem_lease():
+                    self.logger.warning("⚠️ Lease de liderança perdido: interrompendo o PULL")
+                    return
+
                 self.logger.info(f"📦 Processando lote {i}/{len(lotes)} ({len(lote)} guias)...")
                 
                 # Buscar atualizações para este lote
@@ -179,6 +182,20 @@ class MonitorPullService:
             if session:
                 session.close()
 
+    def consulta_enviadas(self, data_limite: datetime):
+        """
+        SELECT das guias transmitidas (tp_status 'T') desde data_limite.
+        
+        Args:
+            data_limite: data_processamento mínima
+        """
+        return select(Guia).where(
+            Guia.tp_status == 'T',  # Status 'T' = Transmitido (enviado com sucesso)
+            Guia.data_processamento.isnot(None),
+            Guia.data_processamento >= data_limite,
+            Guia.numero_guia.isnot(None)
+        )
+
     def _agrupar_em_lotes(self, guias: List[Guia], tamanho_lote: int) -> List[List[Guia]]:
         """
         Agrupa guias em lotes.
@@ -207,8 +224,8 @@ class MonitorPullService:
             numeros_guias = [guia.numero_guia for guia in guias]
 
             # Chamar API PULL
-            resultado = self.drg_service.consumir_exportacao_guias(
-                numero_guia=numeros_guias
+            resultado = await asyncio.to_thread(
+                self.drg_service.consumir_exportacao_guias, numero_guia=numeros_guias
             )
 
             if not resultado.get("sucesso"):
@@ -6,17 +6,24 @@ Serviço de monitoramento automático da tabela de guias
 import asyncio
 import logging
 import os
+from collections import Counter
 from datetime import datetime, timedelta
 from typing import Dict, Any, List
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_
+from sqlalchemy import or_, and_, case, func, select, update
+import structlog
 
 from app.database.database import get_session
 from app.models import Guia
 from app.services.drg_service import DRGService
 from app.services.guia_service import GuiaService
+from app.services.contadores_service import contadores_service
+from app.services.estatisticas_service import estatisticas_service
+from app.services.lideranca_service import lideranca_service
 from app.config.config import get_settings
-from app.utils.logger import drg_logger
+from app.utils.logger import drg_logger, novo_id_correlacao
+from app.utils.metricas import medir_ciclo_monitor, registrar_guias_processadas
+from app.utils.rastreamento import span
 
 
 class MonitorService:
@@ -114,7 +121,11 @@ class MonitorService:
         try:
             while self._running:
                 try:
-                    await self._process_pending_guias()
+                    # Correlation id por ciclo para agrupar os logs das chamadas
+                    with structlog.contextvars.bound_contextvars(
+                        correlation_id=novo_id_correlacao()
+                    ), medir_ciclo_monitor("envio"):
+                        await self._process_pending_guias()
                 except Exception as e:
                     self.logger.error(f"❌ Erro no monitoramento: {e}")
 
@@ -135,48 +146,12 @@ class MonitorService:
             session = get_session()
 
             try:
-                # Buscar TODAS as guias aguardando processamento (sem limite)
-                if self.auto_reprocess:
-                    # Buscar todas as guias aguardando (tp_status = 'A')
-                    # E também guias com erro retentável (tp_status = 'E' mas com erro 504, 500, timeout, etc)
+                with span("buscar_pendentes") as busca:
+                    # Buscar TODAS as guias aguardando processamento (sem limite)
                     guias_pendentes = (
-                        session.query(Guia)
-                        .filter(
-                            or_(
-                                Guia.tp_status == "A",  # Aguardando
-                                # Guias com erro mas que são retentáveis (504, 500, timeout, etc)
-                                and_(
-                                    Guia.tp_status == "E",
-                                    or_(
-                                        Guia.mensagem_erro.like("%504%"),
-                                        Guia.mensagem_erro.like("%500%"),
-                                        Guia.mensagem_erro.like("%timeout%"),
-                                        Guia.mensagem_erro.like("%Timeout%"),
-                                        Guia.mensagem_erro.like("%TIMEOUT%"),
-                                        Guia.mensagem_erro.like("%Gateway Timeout%"),
-                                        Guia.mensagem_erro.like("%gateway timeout%"),
-                                        Guia.mensagem_erro.like("%connection%"),
-                                        Guia.mensagem_erro.like("%Connection%"),
-                                        Guia.mensagem_erro.like("%conexão%"),
-                                        Guia.mensagem_erro.like("%Conexão%"),
-                                        Guia.mensagem_erro.like("%502%"),
-                                        Guia.mensagem_erro.like("%503%"),
-                                    ),
-                                ),
-                            )
-                        )
-                        .all()
-                    )
-                else:
-                    # Buscar apenas guias que nunca foram tentadas
-                    guias_pendentes = (
-                        session.query(Guia)
-                        .filter(Guia.tp_status == "A")  # Aguardando
-                        .filter(
-                            (Guia.tentativas == 0) | (Guia.tentativas.is_(None))
-                        )  # Só primeira tentativa
-                        .all()
+                        session.scalars(self.consulta_pendentes()).all()
                     )
+                    busca.definir_atributo("guias", len(guias_pendentes))
 
                 if not guias_pendentes:
                     self.logger.debug("📋 Nenhuma guia pendente encontrada")
@@ -203,6 +178,13 @@ class MonitorService:
                         f"📦 Processando lote {lote_num + 1}/{total_lotes} ({len(lote_guias)} guias: {inicio + 1}-{fim})"
                     )
 
+                    # Fencing: sem o lease, outro worker pode já estar enviando
+                    if not lideranca_service.detem_lease():
+                        self.logger.warning(
+                            "⚠️ Lease de liderança perdido: interrompendo o ciclo de envio"
+                        )
+                        return
+
                     # Processar este lote
                     await self._process_lote_guias(session, lote_guias)
 
@@ -220,52 +202,162 @@ class MonitorService:
         except Exception as e:
             self.logger.error(f"❌ Erro ao acessar banco de dados: {e}")
 
+    def consulta_pendentes(self):
+        """SELECT das guias pendentes de envio (todas, sem limite)"""
+        return select(Guia).where(*self._filtro_pendentes())
+
+    def _filtro_pendentes(self) -> tuple:
+        """Condições de uma guia pendente de envio (busca e reserva do lote)"""
+        if self.auto_reprocess:
+            # Guias aguardando (tp_status = 'A') e também guias com erro
+            # retentável (tp_status = 'E' mas com erro 504, 500, timeout, etc)
+            return (
+                or_(
+                    Guia.tp_status == "A",  # Aguardando
+                    # Guias com erro mas que são retentáveis (504, 500, timeout, etc)
+                    and_(
+                        Guia.tp_status == "E",
+                        or_(
+                            Guia.mensagem_erro.like("%504%"),
+                            Guia.mensagem_erro.like("%500%"),
+                            Guia.mensagem_erro.like("%timeout%"),
+                            Guia.mensagem_erro.like("%Timeout%"),
+                            Guia.mensagem_erro.like("%TIMEOUT%"),
+                            Guia.mensagem_erro.like("%Gateway Timeout%"),
+                            Guia.mensagem_erro.like("%gateway timeout%"),
+                            Guia.mensagem_erro.like("%connection%"),
+                            Guia.mensagem_erro.like("%Connection%"),
+                            Guia.mensagem_erro.like("%conexão%"),
+                            Guia.mensagem_erro.like("%Conexão%"),
+                            Guia.mensagem_erro.like("%502%"),
+                            Guia.mensagem_erro.like("%503%"),
+                        ),
+                    ),
+                ),
+            )
+
+        # Apenas guias que nunca foram tentadas
+        return (
+            Guia.tp_status == "A",  # Aguardando
+            (Guia.tentativas == 0) | (Guia.tentativas.is_(None)),  # Só primeira tentativa
+        )
+
+    def _reservar_guias(self, session: Session, guias: List[Guia]) -> List[Guia]:
+        """
+        Reserva as guias do lote (tp_status 'P') com UPDATE condicional.
+
+        Só reserva a guia quem a encontra ainda pendente e no mesmo tp_status
+        lido; guias já reservadas por outro worker (ex.: um líder antigo que
+        ainda está enviando) ficam fora do lote e não são enviadas duas vezes.
+
+        Returns:
+            List[Guia]: guias reservadas por esta execução
+        """
+        agora = datetime.utcnow()
+        if self.auto_reprocess:
+            tentativas = func.coalesce(Guia.tentativas, 0) + 1
+        else:
+            # Sem incremento de tentativas quando reprocessamento está desabilitado
+            tentativas = case(
+                (func.coalesce(Guia.tentativas, 0) == 0, 1), else_=Guia.tentativas
+            )
+
+        reservadas = []
+        variacoes = Counter()
+        for guia in guias:
+            chave = (guia.tp_status, guia.status_consulta, guia.status_monitoramento)
+            reservou = session.execute(
+                update(Guia)
+                .where(
+                    Guia.id == guia.id,
+                    Guia.tp_status == guia.tp_status,
+                    *self._filtro_pendentes(),
+                )
+                .values(tp_status="P", tentativas=tentativas, data_processamento=agora)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            if reservou:
+                reservadas.append(guia)
+                # UPDATE em Core não passa pelo after_flush dos contadores
+                variacoes[chave] -= 1
+                variacoes[("P",) + chave[1:]] += 1
+
+        if variacoes and contadores_service.habilitado:
+            contadores_service.aplicar_variacoes(session, variacoes)
+
+        # O commit expira as guias: os valores gravados são recarregados
+        with span("commit"):
+            session.commit()
+        return reservadas
+
     async def _process_lote_guias(self, session: Session, guias: List[Guia]):
-        """Processa um lote de guias"""
+        """Processa um lote de guias registrando o tempo de cada fase no log"""
+        resultado = "erro"
+        try:
+            with span("lote_guias", guias=len(guias)) as lote:
+                resultado = await self._executar_lote_guias(session, guias)
+                lote.definir_atributo("resultado", resultado)
+        finally:
+            drg_logger.log_lote(len(guias), resultado, lote.duracao_ms, lote.fases_ms())
+
+    async def _executar_lote_guias(self, session: Session, guias: List[Guia]) -> str:
+        """
+        Processa um lote de guias
+
+        Returns:
+            str: resultado do lote (transmitida, retentavel, erro ou ignorado)
+        """
+        reservadas: List[Guia] = []
         try:
             self.logger.info(f"🚀 Processando lote de {len(guias)} guias")
 
-            # Marcar todas as guias como processando
-            # Se alguma guia estava com tp_status = "E" mas tem erro retentável, apenas logar
-            for guia in guias:
-                # Se estava com erro mas é retentável, logar para debug
-                if guia.tp_status == "E" and guia.mensagem_erro:
-                    erro_msg_lower = (guia.mensagem_erro or "").lower()
-                    erros_retentaveis = [
-                        "504",
-                        "500",
-                        "502",
-                        "503",
-                        "timeout",
-                        "connection",
-                        "conexão",
-                        "gateway",
-                    ]
-                    if any(erro in erro_msg_lower for erro in erros_retentaveis):
-                        self.logger.info(
-                            f"🔄 Reprocessando guia {guia.numero_guia} com erro retentável (era 'E', agora será processada)"
-                        )
+            # Reservar as guias como processando
+            # (guias expiradas pelo commit do lote anterior são recarregadas aqui)
+            with span("marcar_processando"):
+                # Se alguma guia estava com tp_status = "E" mas tem erro retentável, apenas logar
+                for guia in guias:
+                    # Se estava com erro mas é retentável, logar para debug
+                    if guia.tp_status == "E" and guia.mensagem_erro:
+                        erro_msg_lower = (guia.mensagem_erro or "").lower()
+                        erros_retentaveis = [
+                            "504",
+                            "500",
+                            "502",
+                            "503",
+                            "timeout",
+                            "connection",
+                            "conexão",
+                            "gateway",
+                        ]
+                        if any(erro in erro_msg_lower for erro in erros_retentaveis):
+                            self.logger.info(
+                                f"🔄 Reprocessando guia {guia.numero_guia} com erro retentável (era 'E', agora será processada)"
+                            )
 
-                guia.tp_status = "P"
-                if self.auto_reprocess:
-                    # Garantir que tentativas não seja None
-                    guia.tentativas = (guia.tentativas or 0) + 1
-                else:
-                    # Sem incremento de tentativas quando reprocessamento está desabilitado
-                    if guia.tentativas is None or guia.tentativas == 0:
-                        guia.tentativas = 1
-                guia.data_processamento = datetime.utcnow()
+                reservadas = self._reservar_guias(session, guias)
 
-            session.commit()
+            if not reservadas:
+                self.logger.info("⏭️ Guias do lote já reservadas por outro worker")
+                return "ignorado"
+            if len(reservadas) < len(guias):
+                self.logger.warning(
+                    f"⚠️ {len(guias) - len(reservadas)} guias do lote já reservadas "
+                    f"por outro worker: enviando {len(reservadas)}"
+                )
+            guias = reservadas
 
-            # Processar lote usando GuiaService
-            resultado = self.guia_service.processar_lote_guias(guias, self.drg_service)
+            # Processar lote usando GuiaService (HTTP síncrono: fora do event loop)
+            resultado = await asyncio.to_thread(
+                self.guia_service.processar_lote_guias, guias, self.drg_service
+            )
 
             if resultado.get("sucesso"):
                 # Sucesso - marcar todas como transmitidas
                 for guia in guias:
                     guia.tp_status = "T"
                     guia.mensagem_erro = None
+                registrar_guias_processadas("transmitida", len(guias))
+                situacao = "transmitida"
 
                 self.logger.info(
                     f"✅ Lote de {len(guias)} guias processado com sucesso"
@@ -286,6 +378,8 @@ class MonitorService:
                         guia.tp_status = "A"  # Voltar para Aguardando
                         guia.mensagem_erro = erro_msg
                         # Não incrementar tentativas aqui, já foi incrementado antes
+                    registrar_guias_processadas("retentavel", len(guias))
+                    situacao = "retentavel"
 
                     self.logger.warning(
                         f"⚠️ Erro retentável no lote (será reenviado): {erro_msg}"
@@ -295,6 +389,8 @@ class MonitorService:
                     for guia in guias:
                         guia.tp_status = "E"
                         guia.mensagem_erro = erro_msg
+                    registrar_guias_processadas("erro", len(guias))
+                    situacao = "erro"
 
                     self.logger.error(f"❌ Erro ao processar lote: {erro_msg}")
 
@@ -302,16 +398,20 @@ class MonitorService:
             for guia in guias:
                 guia.data_processamento = datetime.utcnow()
 
-            session.commit()
+            with span("commit"):
+                session.commit()
+            return situacao
 
         except Exception as e:
             # Erro crítico - verificar se é retentável (ex: erro de conexão com banco)
             error_msg = f"Erro crítico: {str(e)}"
+            session.rollback()
 
             # Verificar se é erro retentável usando a função auxiliar
             is_retentable = self._is_retentable_error_from_message(error_msg)
 
-            for guia in guias:
+            # Só as guias reservadas por esta execução voltam para A/E
+            for guia in reservadas:
                 if is_retentable:
                     # Erro retentável (500, 504, timeout, connection, etc) - manter status 'A'
                     guia.tp_status = "A"
@@ -330,6 +430,9 @@ class MonitorService:
                 guia.data_processamento = datetime.utcnow()
 
             session.commit()
+            registrar_guias_processadas(
+                "retentavel" if is_retentable else "erro", len(reservadas)
+            )
             if is_retentable:
                 self.logger.warning(
                     f"⚠️ Erro crítico retentável ao processar lote (será reenviado): {e}"
@@ -426,29 +529,22 @@ class MonitorService:
 
     async def get_monitoring_status(self) -> Dict[str, Any]:
         """Retorna status do monitoramento"""
-        session = get_session()
-        try:
-            # Contar guias por status
-            total_guias = session.query(Guia).count()
-            aguardando = session.query(Guia).filter(Guia.tp_status == "A").count()
-            processando = session.query(Guia).filter(Guia.tp_status == "P").count()
-            transmitidas = session.query(Guia).filter(Guia.tp_status == "T").count()
-            com_erro = session.query(Guia).filter(Guia.tp_status == "E").count()
-
-            return {
-                "monitoramento_ativo": self._running,
-                "intervalo_minutos": self.settings.MONITOR_INTERVAL_MINUTES,
-                "auto_monitor_enabled": self.settings.AUTO_MONITOR_ENABLED,
-                "auto_reprocess_enabled": self.auto_reprocess,
-                "total_guias": total_guias,
-                "aguardando": aguardando,
-                "processando": processando,
-                "transmitidas": transmitidas,
-                "com_erro": com_erro,
-                "ultima_verificacao": datetime.utcnow().isoformat(),
-            }
-        finally:
-            session.close()
+        # Contar guias por status (consulta agregada única, em cache)
+        contagens = estatisticas_service.obter_contagens()
+        por_status = contagens["por_tp_status"]
+
+        return {
+            "monitoramento_ativo": self._running,
+            "intervalo_minutos": self.settings.MONITOR_INTERVAL_MINUTES,
+            "auto_monitor_enabled": self.settings.AUTO_MONITOR_ENABLED,
+            "auto_reprocess_enabled": self.auto_reprocess,
+            "total_guias": contagens["total"],
+            "aguardando": por_status.get("A", 0),
+            "processando": por_status.get("P", 0),
+            "transmitidas": por_status.get("T", 0),
+            "com_erro": por_status.get("E", 0),
+            "ultima_verificacao": datetime.utcnow().isoformat(),
+        }
 
 
 # Instância global do monitor
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Tarefas em segundo plano que devem rodar em um único worker
+
+Envio (monitor_service), monitoramento de campos, monitoramento PULL,
+reconciliação dos contadores e arquivamento das guias finalizadas. Com a eleição de líder habilitada elas só
+rodam no worker líder; os demais atendem apenas HTTP.
+"""
+
+import asyncio
+import logging
+
+from app.config.config import get_settings
+from app.services.arquivamento_service import arquivamento_service
+from app.services.contadores_service import contadores_service
+from app.services.lideranca_service import lideranca_service
+from app.services.monitor_campos_service import monitor_campos_service
+from app.services.monitor_pull_service import monitor_pull_service
+from app.services.monitor_service import monitor_service
+
+logger = logging.getLogger(__name__)
+
+
+class TarefasService:
+    """Inicia e para os monitores, respeitando a eleição de líder"""
+
+    def __init__(self):
+        self.settings = get_settings()
+
+    async def iniciar(self):
+        """Inicia as tarefas direto ou via eleição de líder (LEADER_ELECTION_ENABLED)."""
+        if lideranca_service.habilitado:
+            await lideranca_service.iniciar(self.iniciar_monitores, self.parar_monitores)
+        else:
+            await self.iniciar_monitores()
+
+    async def parar(self):
+        if lideranca_service.habilitado:
+            await lideranca_service.parar()
+        else:
+            await self.parar_monitores()
+
+    async def iniciar_monitores(self):
+        """Inicia monitores e reconciliação (apenas no líder)."""
+        # Iniciar monitoramento automático
+        await monitor_service.start_monitoring()
+
+        # Iniciar monitoramento de campos se habilitado
+        if self.settings.MONITOR_CAMPOS_ENABLED:
+            logger.info("🚀 Iniciando monitoramento automático de campos...")
+            monitor_campos_service._running = True
+            monitor_campos_service._task = asyncio.create_task(
+                monitor_campos_service.iniciar_monitoramento_continuo()
+            )
+            logger.info("✅ Monitoramento de campos iniciado")
+        else:
+            logger.info("🔕 Monitoramento de campos desabilitado")
+
+        # Iniciar monitoramento PULL se habilitado
+        await monitor_pull_service.iniciar_monitoramento_pull()
+
+        # Iniciar reconciliação dos contadores materializados se habilitados
+        if contadores_service.habilitado:
+            contadores_service._running = True
+            contadores_service._task = asyncio.create_task(
+                contadores_service.iniciar_reconciliacao_continua()
+            )
+
+        # Iniciar arquivamento das guias finalizadas se habilitado
+        if arquivamento_service.habilitado:
+            arquivamento_service._running = True
+            arquivamento_service._task = asyncio.create_task(
+                arquivamento_service.iniciar_arquivamento_continuo()
+            )
+
+    async def parar_monitores(self):
+        """Para monitores e reconciliação."""
+        # Parar monitoramento automático
+        if monitor_service._running:
+            await monitor_service.stop_monitoring()
+
+        # Parar monitoramento de campos
+        if monitor_campos_service._running:
+            logger.info("🛑 Parando monitoramento de campos...")
+            monitor_campos_service._running = False
+            if monitor_campos_service._task:
+                monitor_campos_service._task.cancel()
+                try:
+                    await monitor_campos_service._task
+                except asyncio.CancelledError:
+                    pass
+            logger.info("✅ Monitoramento de campos parado")
+
+        # Parar monitoramento PULL
+        if monitor_pull_service._running:
+            await monitor_pull_service.parar_monitoramento_pull()
+
+        # Parar reconciliação dos contadores
+        contadores_service._running = False
+        if contadores_service._task:
+            contadores_service._task.cancel()
+            try:
+                await contadores_service._task
+            except asyncio.CancelledError:
+                pass
+            contadores_service._task = None
+
+        # Parar arquivamento das guias finalizadas
+        arquivamento_service._running = False
+        if arquivamento_service._task:
+            arquivamento_service._task.cancel()
+            try:
+                await arquivamento_service._task
+            except asyncio.CancelledError:
+                pass
+            arquivamento_service._task = None
+
+    def pode_iniciar_manualmente(self) -> bool:
+        """Monitores só podem ser iniciados via API no worker líder."""
+        return not lideranca_service.habilitado or lideranca_service.lider
+
+
+# Instância global do serviço
+tarefas_service = TarefasService()
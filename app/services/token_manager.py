@@ -6,6 +6,7 @@ import time
 import threading
 from typing import Optional, Dict, Any
 from app.config.config import get_settings
+from app.utils.metricas import registrar_renovacao_token
 
 
 class TokenManager:
@@ -45,7 +46,7 @@ class TokenManager:
         with self._lock:
             # Se não tem token ou precisa renovar preventivamente
             if self._should_refresh():
-                return self._refresh_token()
+                return self._refresh_token(motivo="preventiva")
 
             return self._token
 
@@ -60,7 +61,7 @@ class TokenManager:
             Exception: Se não conseguir renovar token
         """
         with self._lock:
-            return self._refresh_token()
+            return self._refresh_token(motivo="forcada")
 
     def _should_refresh(self) -> bool:
         """
@@ -77,10 +78,13 @@ class TokenManager:
         time_since_auth = time.time() - self._last_auth
         return time_since_auth >= self._refresh_interval
 
-    def _refresh_token(self) -> str:
+    def _refresh_token(self, motivo: str = "preventiva") -> str:
         """
         Renova o token fazendo nova autenticação.
 
+        Args:
+            motivo: preventiva (intervalo/sem token) ou forcada (token expirado)
+
         Returns:
             str: Novo token JWT
 
@@ -99,6 +103,7 @@ class TokenManager:
             # Atualizar token e timestamp
             self._token = auth_result["token"]
             self._last_auth = time.time()
+            registrar_renovacao_token(motivo, sucesso=True)
 
             return self._token
 
@@ -106,6 +111,7 @@ class TokenManager:
             # Limpar token inválido em caso de erro
             self._token = None
             self._last_auth = None
+            registrar_renovacao_token(motivo, sucesso=False)
             raise Exception(f"Erro ao renovar token: {str(e)}")
 
     def get_token_info(self) -> Dict[str, Any]:
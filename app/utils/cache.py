@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Cache em memória com expiração (TTL) e limite de entradas
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class CacheTTL:
+    """
+    Cache em memória com expiração por entrada e descarte LRU.
+
+    - Cada entrada expira após `ttl_segundos`
+    - Ao atingir `max_entradas`, a entrada menos recentemente usada é descartada
+    - Contadores de acertos (hits) e falhas (misses) para estatísticas
+    - Lock para uso seguro entre threads (rotas síncronas rodam no threadpool)
+    """
+
+    def __init__(self, ttl_segundos: float, max_entradas: int = 10000):
+        self.ttl_segundos = ttl_segundos
+        self.max_entradas = max_entradas
+        self._dados: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def obter(self, chave: Hashable) -> Optional[Any]:
+        """
+        Retorna o valor da chave se existir e não estiver expirado.
+
+        Returns:
+            Valor armazenado ou None (miss)
+        """
+        agora = time.monotonic()
+        with self._lock:
+            entrada = self._dados.get(chave)
+            if entrada is None:
+                self.misses += 1
+                return None
+
+            expira_em, valor = entrada
+            if agora >= expira_em:
+                # Entrada expirada - remover e contar como miss
+                del self._dados[chave]
+                self.misses += 1
+                return None
+
+            self._dados.move_to_end(chave)
+            self.hits += 1
+            return valor
+
+    def definir(
+        self, chave: Hashable, valor: Any, ttl_segundos: Optional[float] = None
+    ):
+        """Armazena um valor com expiração (usa o TTL padrão se não informado)."""
+        ttl = self.ttl_segundos if ttl_segundos is None else ttl_segundos
+        if ttl <= 0:
+            return
+
+        with self._lock:
+            self._dados[chave] = (time.monotonic() + ttl, valor)
+            self._dados.move_to_end(chave)
+
+            # Descartar as entradas menos usadas se exceder o limite
+            while len(self._dados) > self.max_entradas:
+                self._dados.popitem(last=False)
+
+    def invalidar(self, chave: Hashable):
+        """Remove uma entrada do cache (se existir)."""
+        with self._lock:
+            self._dados.pop(chave, None)
+
+    def limpar(self):
+        """Remove todas as entradas (mantém os contadores)."""
+        with self._lock:
+            self._dados.clear()
+
+    def estatisticas(self) -> Dict[str, Any]:
+        """Retorna contadores de uso do cache."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "taxa_acerto": round(self.hits / total * 100, 2) if total else 0,
+                "entradas": len(self._dados),
+                "max_entradas": self.max_entradas,
+                "ttl_segundos": self.ttl_segundos,
+            }
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Leitura do corpo da requisição com limite de tamanho
+
+O tamanho é verificado nos bytes recebidos, antes de qualquer parse: um
+Content-Length acima do limite é rejeitado sem ler o corpo, e o corpo lido em
+streaming é interrompido assim que ultrapassa o limite (413). O JSON só é
+decodificado e validado uma vez, depois de aceito.
+"""
+
+from typing import Any, Awaitable, Callable
+
+from fastapi import HTTPException, Request
+
+from app.utils import json_rapido
+
+
+def _corpo_excedido(limite_kb: int, tamanho: int) -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail={
+            "sucesso": False,
+            "erro": (
+                f"Lote excede o limite de {limite_kb}KB. "
+                f"Tamanho recebido: {tamanho / 1024:.2f}KB"
+            ),
+        },
+    )
+
+
+async def ler_corpo_limitado(request: Request, limite_kb: int) -> bytes:
+    """Lê o corpo em streaming, abortando com 413 ao passar de limite_kb."""
+    limite = limite_kb * 1024
+
+    declarado = request.headers.get("content-length", "")
+    if declarado.isdigit() and int(declarado) > limite:
+        raise _corpo_excedido(limite_kb, int(declarado))
+
+    partes = []
+    recebido = 0
+    async for parte in request.stream():
+        recebido += len(parte)
+        if recebido > limite:
+            raise _corpo_excedido(limite_kb, recebido)
+        partes.append(parte)
+
+    return b"".join(partes)
+
+
+def corpo_json_limitado(limite_kb: int) -> Callable[[Request], Awaitable[Any]]:
+    """Dependência FastAPI que entrega o corpo JSON já limitado em tamanho."""
+
+    async def dependencia(request: Request) -> Any:
+        corpo = await ler_corpo_limitado(request, limite_kb)
+        try:
+            return json_rapido.loads(corpo)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=400,
+                detail={"sucesso": False, "erro": f"JSON inválido: {e}"},
+            )
+
+    return dependencia
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Serialização JSON rápida (orjson)
+
+Um único codificador para as respostas da API e para os corpos enviados à
+DRG. Com o `orjson` instalado a serialização é feita em C, direto para bytes,
+incluindo date/datetime (ISO 8601) e Decimal; sem ele, cai no `json` da
+biblioteca padrão com o mesmo formato de saída.
+"""
+
+import json
+from datetime import date
+from decimal import Decimal
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+
+    ORJSON_DISPONIVEL = True
+except ImportError:  # pragma: no cover - dependência opcional
+    ORJSON_DISPONIVEL = False
+
+
+def _padrao(obj: Any) -> Any:
+    """Tipos que nenhum dos codificadores serializa nativamente."""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, date):
+        return obj.isoformat()
+    raise TypeError(f"Tipo não serializável em JSON: {type(obj).__name__}")
+
+
+def dumps(obj: Any) -> bytes:
+    """Serializa para bytes UTF-8 (sem espaços, caracteres não ASCII preservados)."""
+    if ORJSON_DISPONIVEL:
+        return orjson.dumps(obj, default=_padrao, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        obj, default=_padrao, ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def loads(dados: Any) -> Any:
+    if ORJSON_DISPONIVEL:
+        return orjson.loads(dados)
+    return json.loads(dados)
+
+
+class RespostaJSON(JSONResponse):
+    """Resposta JSON padrão da aplicação, renderizada com `dumps`."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
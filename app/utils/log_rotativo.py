@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Handler de arquivo de log com rotação por tamanho e por tempo,
+compressão gzip em segundo plano e política de retenção
+"""
+
+import gzip
+import logging
+import logging.handlers
+import os
+import re
+import shutil
+import threading
+import time
+from datetime import datetime
+from typing import List, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+# Extensões dos arquivos gerados pela rotação
+_EXTENSAO_GZIP = ".gz"
+_EXTENSAO_TEMPORARIA = ".tmp"
+_EXTENSAO_LOCK = ".lock"
+
+# Sufixo exato dos arquivos rotacionados: .20250101-120000[-N][.gz][.tmp]
+_SUFIXO_ROTACIONADO = re.compile(r"\.\d{8}-\d{6}(?:-\d+)?(?:\.gz)?(?:\.tmp)?")
+
+# Espera antes de comprimir um arquivo recém-rotacionado, para que os outros
+# processos percebam a troca e parem de gravar nele
+_ESPERA_ESCRITORES_SEGUNDOS = 2.0
+# Intervalo entre tentativas de assumir a rotação (processos não rotacionadores)
+_INTERVALO_TENTATIVA_LOCK_SEGUNDOS = 60
+
+
+class ArquivoLogRotativo(logging.handlers.BaseRotatingHandler):
+    """
+    Grava em `filename` e rotaciona quando o arquivo atinge `max_bytes` ou
+    quando passam `intervalo_horas` desde a última rotação.
+
+    - O arquivo rotacionado recebe o sufixo com data/hora (app.log.20250101-120000)
+    - A compressão gzip e a limpeza rodam em uma thread separada, sem
+      bloquear quem está gravando o log
+    - Retenção: mantém no máximo `backup_count` arquivos rotacionados e
+      remove os mais antigos que `retencao_dias`; só considera arquivos com
+      o sufixo exato da rotação
+
+    Vários processos (uvicorn --workers N, app.worker) podem gravar no mesmo
+    arquivo, mas só um rotaciona, comprime e limpa: o que obtém o lock
+    exclusivo de `filename.lock`. Os demais apenas gravam e reabrem o arquivo
+    quando ele é substituído pela rotação; se o rotacionador encerrar, outro
+    assume o lock. Sem fcntl (Windows) o processo é tratado como único
+    escritor: use um LOG_FILE por processo.
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        max_bytes: int = 0,
+        intervalo_horas: float = 0,
+        backup_count: int = 0,
+        retencao_dias: float = 0,
+        comprimir: bool = True,
+        encoding: Optional[str] = "utf-8",
+    ):
+        super().__init__(filename, "a", encoding=encoding, delay=False)
+        self.max_bytes = max_bytes
+        self.intervalo_segundos = intervalo_horas * 3600
+        self.backup_count = backup_count
+        self.retencao_dias = retencao_dias
+        self.comprimir = comprimir
+        self.proxima_rotacao = self._calcular_proxima_rotacao()
+        self._lock_manutencao = threading.Lock()
+        self._arquivo_lock = None
+        self._proxima_tentativa_lock = 0.0
+        self._id_arquivo = self._identificar_stream()
+        self.rotacionador = self._assumir_rotacao()
+
+        # Comprimir/limpar o que tiver sobrado de execuções anteriores
+        if self.rotacionador:
+            self._iniciar_manutencao()
+
+    def _assumir_rotacao(self) -> bool:
+        """Tenta obter o lock de rotação (um único processo rotaciona o arquivo)"""
+        if fcntl is None:
+            return True
+
+        self._proxima_tentativa_lock = time.time() + _INTERVALO_TENTATIVA_LOCK_SEGUNDOS
+        arquivo = open(self.baseFilename + _EXTENSAO_LOCK, "a")
+        try:
+            fcntl.flock(arquivo.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            arquivo.close()
+            return False
+
+        self._arquivo_lock = arquivo
+        return True
+
+    def _identificar_stream(self):
+        if self.stream is None:
+            return None
+        estado = os.fstat(self.stream.fileno())
+        return (estado.st_dev, estado.st_ino)
+
+    def _reabrir_se_substituido(self):
+        """Reabre o arquivo se outro processo o rotacionou (como o WatchedFileHandler)"""
+        try:
+            estado = os.stat(self.baseFilename)
+            atual = (estado.st_dev, estado.st_ino)
+        except FileNotFoundError:
+            atual = None
+
+        if self.stream is not None and atual == self._id_arquivo:
+            return
+
+        if self.stream:
+            self.stream.flush()
+            self.stream.close()
+        self.stream = self._open()
+        self._id_arquivo = self._identificar_stream()
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        if not self.rotacionador:
+            self._reabrir_se_substituido()
+            if time.time() < self._proxima_tentativa_lock or not self._assumir_rotacao():
+                return False
+            # Assumiu a rotação: o prazo por tempo conta a partir de agora
+            self.rotacionador = True
+            self.proxima_rotacao = self._calcular_proxima_rotacao()
+
+        if self.intervalo_segundos and time.time() >= self.proxima_rotacao:
+            return True
+
+        if self.max_bytes > 0:
+            if self.stream is None:
+                self.stream = self._open()
+            # Estimativa pelo tamanho atual; evita formatar a mensagem duas vezes
+            if self.stream.tell() >= self.max_bytes:
+                return True
+
+        return False
+
+    def doRollover(self):
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+
+        if os.path.exists(self.baseFilename) and os.path.getsize(self.baseFilename):
+            os.replace(self.baseFilename, self._nome_rotacionado())
+
+        self.stream = self._open()
+        self._id_arquivo = self._identificar_stream()
+        self.proxima_rotacao = self._calcular_proxima_rotacao()
+        self._iniciar_manutencao(espera=_ESPERA_ESCRITORES_SEGUNDOS)
+
+    def close(self):
+        super().close()
+        if self._arquivo_lock is not None:
+            # Fechar o arquivo libera o lock para outro processo assumir
+            self._arquivo_lock.close()
+            self._arquivo_lock = None
+
+    def _calcular_proxima_rotacao(self) -> float:
+        if not self.intervalo_segundos:
+            return float("inf")
+        return time.time() + self.intervalo_segundos
+
+    def _nome_rotacionado(self) -> str:
+        base = f"{self.baseFilename}.{datetime.now():%Y%m%d-%H%M%S}"
+        nome = base
+        sequencia = 1
+        while os.path.exists(nome) or os.path.exists(nome + _EXTENSAO_GZIP):
+            nome = f"{base}-{sequencia}"
+            sequencia += 1
+        return nome
+
+    def _iniciar_manutencao(self, espera: float = 0):
+        threading.Thread(
+            target=self._executar_manutencao,
+            args=(espera,),
+            name="log-rotativo",
+            daemon=True,
+        ).start()
+
+    def _executar_manutencao(self, espera: float = 0):
+        """Comprime os arquivos rotacionados e aplica a retenção"""
+        time.sleep(espera)
+        with self._lock_manutencao:
+            try:
+                if self.comprimir:
+                    for caminho in self._arquivos_rotacionados():
+                        if not caminho.endswith(_EXTENSAO_GZIP):
+                            self._comprimir(caminho)
+
+                self._aplicar_retencao()
+            except Exception as e:
+                # Falha na manutenção não pode interromper o logging
+                logging.getLogger(__name__).warning(
+                    f"⚠️ Erro na manutenção dos arquivos de log: {e}"
+                )
+
+    def _arquivos_rotacionados(self) -> List[str]:
+        """Arquivos rotacionados do log atual, do mais antigo para o mais novo"""
+        diretorio = os.path.dirname(self.baseFilename) or "."
+        base = os.path.basename(self.baseFilename)
+        arquivos = []
+
+        for nome in os.listdir(diretorio):
+            # Só o sufixo exato da rotação (não app.log.bak, app.log.lock...)
+            if not (
+                nome.startswith(base)
+                and _SUFIXO_ROTACIONADO.fullmatch(nome, len(base))
+            ):
+                continue
+
+            caminho = os.path.join(diretorio, nome)
+            if nome.endswith(_EXTENSAO_TEMPORARIA):
+                # Compressão interrompida em execução anterior
+                os.remove(caminho)
+                continue
+            arquivos.append(caminho)
+
+        return sorted(
+            arquivos, key=lambda caminho: (os.path.getmtime(caminho), caminho)
+        )
+
+    def _comprimir(self, caminho: str):
+        destino = caminho + _EXTENSAO_GZIP
+        temporario = destino + _EXTENSAO_TEMPORARIA
+
+        with open(caminho, "rb") as origem, gzip.open(temporario, "wb") as saida:
+            shutil.copyfileobj(origem, saida)
+
+        # Manter a data do arquivo original para a retenção por idade
+        estado = os.stat(caminho)
+        os.utime(temporario, (estado.st_atime, estado.st_mtime))
+        os.replace(temporario, destino)
+        os.remove(caminho)
+
+    def _aplicar_retencao(self):
+        arquivos = self._arquivos_rotacionados()
+
+        remover = []
+        if self.backup_count > 0 and len(arquivos) > self.backup_count:
+            remover.extend(arquivos[: len(arquivos) - self.backup_count])
+
+        if self.retencao_dias > 0:
+            limite = time.time() - self.retencao_dias * 86400
+            remover.extend(
+                caminho
+                for caminho in arquivos
+                if caminho not in remover and os.path.getmtime(caminho) < limite
+            )
+
+        for caminho in remover:
+            os.remove(caminho)
@@ -3,12 +3,246 @@
 Sistema de logging para monitoramento da integração DRG
 """
 
+import atexit
+import hashlib
 import logging
+import logging.handlers
 import json
 import os
+import queue
+import threading
+import time
+import uuid
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterator, List, Optional
+
+import structlog
+
 from app.config.config import get_settings
+from app.utils.log_rotativo import ArquivoLogRotativo
+
+# Políticas de descarte quando a fila de logs está cheia
+POLITICA_DESCARTAR_NOVOS = "descartar_novos"
+POLITICA_DESCARTAR_ANTIGOS = "descartar_antigos"
+
+# Modos de log dos payloads (corpos de requisição/resposta)
+MODO_PAYLOAD_RESUMIDO = "resumido"
+MODO_PAYLOAD_COMPLETO = "completo"
+
+# Trecho do início e do fim de strings longas usado no hash curto
+_BORDA_HASH = 64
+
+# Formatos do arquivo de log
+FORMATO_LOG_TEXTO = "texto"
+FORMATO_LOG_JSON = "json"
+
+
+def novo_id_correlacao() -> str:
+    """Gera um identificador de correlação/lote."""
+    return uuid.uuid4().hex
+
+
+def classificar_resultado(
+    resultado: Dict[str, Any], status_code: Optional[int] = None
+) -> str:
+    """
+    Classifica o resultado de uma chamada à DRG para análise dos logs.
+
+    Classes: sucesso, timeout, erro_conexao, erro_servidor,
+    erro_autenticacao, erro_validacao e erro.
+    """
+    if resultado.get("sucesso"):
+        return "sucesso"
+
+    status_code = resultado.get("status_code", status_code)
+    erro = str(resultado.get("erro", "")).lower()
+
+    if "timeout" in erro:
+        return "timeout"
+    if "conexão" in erro or "connection" in erro:
+        return "erro_conexao"
+    if status_code and status_code >= 500:
+        return "erro_servidor"
+    if status_code in (401, 403):
+        return "erro_autenticacao"
+    if status_code:
+        return "erro_validacao"
+    return "erro"
+
+
+class ChamadaDRG:
+    """Métricas de uma chamada HTTP à DRG, registradas em um único log."""
+
+    def __init__(self, operacao: str, url: str, guias: Optional[List[str]] = None):
+        self.operacao = operacao
+        self.url = url
+        self.guias = [g for g in (guias or []) if g]
+        self.status_code: Optional[int] = None
+        self.bytes_enviados = 0
+        self.bytes_recebidos = 0
+        self.resultado = "erro"
+        self.erro: Optional[str] = None
+        self._inicio = time.perf_counter()
+        self.latencia_ms: Optional[float] = None
+
+    def registrar_resposta(
+        self, status_code: int, bytes_enviados: int, bytes_recebidos: int
+    ):
+        self.status_code = status_code
+        self.bytes_enviados = bytes_enviados
+        self.bytes_recebidos = bytes_recebidos
+
+    def finalizar(self, resultado: Dict[str, Any]):
+        """Define a classe de resultado a partir do dict retornado pelo serviço."""
+        self.resultado = classificar_resultado(resultado, self.status_code)
+        if not resultado.get("sucesso"):
+            self.erro = str(resultado.get("erro", ""))[:500]
+
+    def encerrar(self):
+        self.latencia_ms = round((time.perf_counter() - self._inicio) * 1000, 1)
+
+    def como_dict(self) -> Dict[str, Any]:
+        return {
+            "operacao": self.operacao,
+            "url": self.url,
+            "guias": self.guias,
+            "quantidade_guias": len(self.guias),
+            "status_code": self.status_code,
+            "latencia_ms": self.latencia_ms,
+            "bytes_enviados": self.bytes_enviados,
+            "bytes_recebidos": self.bytes_recebidos,
+            "resultado": self.resultado,
+            "erro": self.erro,
+        }
+
+
+class FiltroContextoLog(logging.Filter):
+    """
+    Copia o contexto (correlation_id, lote_id...) para o registro de log.
+
+    Roda na thread/tarefa de origem, antes do registro ir para a fila do
+    modo assíncrono, onde as contextvars já não estariam disponíveis.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.contexto = structlog.contextvars.get_contextvars()
+        return True
+
+
+def _mesclar_campos_registro(logger, method_name, event_dict):
+    """Processor structlog: inclui contexto e campos extras do LogRecord."""
+    record = event_dict.get("_record")
+    if record is not None:
+        event_dict.update(getattr(record, "contexto", None) or {})
+        event_dict.update(getattr(record, "campos", None) or {})
+    return event_dict
+
+
+def criar_formatter_json() -> logging.Formatter:
+    """Formatter JSON-lines (um objeto JSON por linha) baseado no structlog."""
+    return structlog.stdlib.ProcessorFormatter(
+        processors=[
+            structlog.stdlib.ProcessorFormatter.remove_processors_meta,
+            structlog.processors.JSONRenderer(ensure_ascii=False),
+        ],
+        foreign_pre_chain=[
+            structlog.processors.TimeStamper(fmt="iso", utc=True, key="timestamp"),
+            structlog.stdlib.add_log_level,
+            structlog.stdlib.add_logger_name,
+            _mesclar_campos_registro,
+            structlog.processors.format_exc_info,
+        ],
+    )
+
+
+class JsonTardio:
+    """
+    Serializa um objeto em JSON apenas quando a mensagem de log é formatada.
+
+    No modo assíncrono a formatação acontece na thread do listener, fora do
+    caminho de envio para a DRG; só o json.dumps é adiado. Quem registra deve
+    passar uma cópia já resumida/mascarada (ver DRGLogger._payload), e não o
+    payload original, que pode ser alterado ou ficar retido na fila. Com
+    `max_caracteres`, a serialização é feita em partes e interrompida ao
+    atingir o limite, sem gerar o texto completo.
+    """
+
+    __slots__ = ("dados", "max_caracteres")
+
+    def __init__(self, dados: Any, max_caracteres: Optional[int] = None):
+        self.dados = dados
+        self.max_caracteres = max_caracteres
+
+    def __str__(self) -> str:
+        dados = self.dados
+        encoder = json.JSONEncoder(indent=2, ensure_ascii=False, default=str)
+
+        if not self.max_caracteres:
+            return encoder.encode(dados)
+
+        partes = []
+        total = 0
+        for parte in encoder.iterencode(dados):
+            partes.append(parte)
+            total += len(parte)
+            if total >= self.max_caracteres:
+                return "".join(partes)[: self.max_caracteres] + " ... (truncado)"
+
+        return "".join(partes)
+
+
+class FilaLogHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler com fila limitada e política de descarte.
+
+    Nunca bloqueia quem registra o log: com a fila cheia o registro novo
+    (ou o mais antigo, conforme a política) é descartado e contabilizado.
+    """
+
+    def __init__(self, fila: queue.Queue, politica: str = POLITICA_DESCARTAR_NOVOS):
+        super().__init__(fila)
+        self.politica = politica
+        self.descartados = 0
+        self._lock_contador = threading.Lock()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Não formatar aqui: a formatação fica a cargo do listener
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+            return
+        except queue.Full:
+            pass
+
+        if self.politica == POLITICA_DESCARTAR_ANTIGOS:
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                pass
+            self._contar_descarte()
+            try:
+                self.queue.put_nowait(record)
+            except queue.Full:
+                self._contar_descarte()
+        else:
+            self._contar_descarte()
+
+    def _contar_descarte(self):
+        with self._lock_contador:
+            self.descartados += 1
+
+
+class OuvinteFilaLog(logging.handlers.QueueListener):
+    """QueueListener que aguarda espaço na fila para o sinal de parada."""
+
+    def enqueue_sentinel(self):
+        try:
+            self.queue.put(self._sentinel, timeout=5)
+        except queue.Full:
+            pass
 
 
 class DRGLogger:
@@ -16,7 +250,10 @@ class DRGLogger:
 
     def __init__(self):
         settings = get_settings()
+        self.settings = settings
         self.log_level = getattr(logging, settings.LOG_LEVEL.upper(), logging.INFO)
+        self._fila_handler: Optional[FilaLogHandler] = None
+        self._ouvinte: Optional[OuvinteFilaLog] = None
 
         # Configurar logger
         self.logger = logging.getLogger("drg_integration")
@@ -32,23 +269,54 @@ class DRGLogger:
             os.makedirs(log_dir, exist_ok=True)
 
         # Configurar formatter
-        formatter = logging.Formatter(
-            "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-            datefmt="%Y-%m-%d %H:%M:%S",
-        )
+        self.formato_json = settings.LOG_FORMAT == FORMATO_LOG_JSON
+        if self.formato_json:
+            formatter = criar_formatter_json()
+        else:
+            formatter = logging.Formatter(
+                "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+                datefmt="%Y-%m-%d %H:%M:%S",
+            )
+
+        # Contexto da requisição/lote capturado na origem de cada registro
+        self.logger.filters.clear()
+        self.logger.addFilter(FiltroContextoLog())
 
-        # Handler para arquivo
-        file_handler = logging.FileHandler(settings.LOG_FILE, encoding="utf-8")
+        handlers: List[logging.Handler] = []
+
+        # Handler para arquivo (rotação por tamanho/tempo, gzip e retenção)
+        file_handler = ArquivoLogRotativo(
+            settings.LOG_FILE,
+            max_bytes=settings.LOG_MAX_BYTES,
+            intervalo_horas=settings.LOG_ROTATION_HOURS,
+            backup_count=settings.LOG_BACKUP_COUNT,
+            retencao_dias=settings.LOG_RETENTION_DAYS,
+            comprimir=settings.LOG_COMPRESS,
+        )
         file_handler.setLevel(self.log_level)
         file_handler.setFormatter(formatter)
-        self.logger.addHandler(file_handler)
+        handlers.append(file_handler)
 
         # Handler para console (apenas em desenvolvimento)
         if settings.DEVELOPMENT:
             console_handler = logging.StreamHandler()
             console_handler.setLevel(self.log_level)
             console_handler.setFormatter(formatter)
-            self.logger.addHandler(console_handler)
+            handlers.append(console_handler)
+
+        if settings.LOG_ASYNC_ENABLED:
+            # Modo assíncrono: apenas enfileira; formatação e escrita em disco
+            # ficam na thread do listener
+            fila = queue.Queue(maxsize=settings.LOG_QUEUE_MAX_SIZE)
+            self._fila_handler = FilaLogHandler(fila, settings.LOG_QUEUE_DROP_POLICY)
+            self.logger.addHandler(self._fila_handler)
+
+            self._ouvinte = OuvinteFilaLog(fila, *handlers, respect_handler_level=True)
+            self._ouvinte.start()
+            atexit.register(self.parar)
+        else:
+            for handler in handlers:
+                self.logger.addHandler(handler)
 
     def log_request(
         self,
@@ -59,28 +327,24 @@ class DRGLogger:
         json_data: Optional[Dict[str, Any]] = None,
     ):
         """Log de requisição HTTP"""
+        if self.formato_json:
+            # No modo JSON a chamada é registrada em um único log (log_chamada)
+            return
+
         self.logger.info("=" * 80)
         self.logger.info(f"🚀 REQUISIÇÃO DRG - {method} {url}")
         self.logger.info("=" * 80)
 
         # Log headers (mascarando dados sensíveis)
         safe_headers = self._mask_sensitive_headers(headers)
-        self.logger.info(
-            f"📋 Headers: {json.dumps(safe_headers, indent=2, ensure_ascii=False)}"
-        )
+        self.logger.info("📋 Headers: %s", JsonTardio(safe_headers))
 
-        # Log dados
+        # Log dados (mascaramento e serialização feitos na formatação)
         if data:
-            safe_data = self._mask_sensitive_data(data)
-            self.logger.info(
-                f"📦 Data: {json.dumps(safe_data, indent=2, ensure_ascii=False)}"
-            )
+            self.logger.info("📦 Data: %s", self._payload(data))
 
         if json_data:
-            safe_json = self._mask_sensitive_data(json_data)
-            self.logger.info(
-                f"📦 JSON: {json.dumps(safe_json, indent=2, ensure_ascii=False)}"
-            )
+            self.logger.info("📦 JSON: %s", self._payload(json_data))
 
     def log_response(
         self,
@@ -90,20 +354,19 @@ class DRGLogger:
         response_json: Optional[Dict[str, Any]] = None,
     ):
         """Log de resposta HTTP"""
+        if self.formato_json:
+            return
+
         self.logger.info("-" * 80)
         self.logger.info(f"📥 RESPOSTA DRG - Status: {status_code}")
         self.logger.info("-" * 80)
 
         # Log headers da resposta
-        self.logger.info(
-            f"📋 Response Headers: {json.dumps(dict(headers), indent=2, ensure_ascii=False)}"
-        )
+        self.logger.info("📋 Response Headers: %s", JsonTardio(dict(headers)))
 
         # Log corpo da resposta
         if response_json:
-            self.logger.info(
-                f"📦 Response JSON: {json.dumps(response_json, indent=2, ensure_ascii=False)}"
-            )
+            self.logger.info("📦 Response JSON: %s", self._payload(response_json))
         else:
             # Limitar tamanho do texto se for muito grande
             text_preview = (
@@ -115,6 +378,19 @@ class DRGLogger:
 
     def log_error(self, error: Exception, context: str = ""):
         """Log de erro"""
+        if self.formato_json:
+            self.logger.error(
+                "erro_drg",
+                extra={
+                    "campos": {
+                        "contexto_erro": context,
+                        "tipo": type(error).__name__,
+                        "mensagem": str(error),
+                    }
+                },
+            )
+            return
+
         self.logger.error("❌" + "=" * 78)
         self.logger.error(f"❌ ERRO DRG - {context}")
         self.logger.error("❌" + "=" * 78)
@@ -126,6 +402,19 @@ class DRGLogger:
         self, success: bool, token: Optional[str] = None, error: Optional[str] = None
     ):
         """Log específico para autenticação"""
+        if self.formato_json:
+            campos = {"sucesso": success}
+            if success:
+                campos["token"] = self._mask_token(token) if token else "None"
+            else:
+                campos["erro"] = error
+            self.logger.log(
+                logging.INFO if success else logging.ERROR,
+                "autenticacao_drg",
+                extra={"campos": campos},
+            )
+            return
+
         self.logger.info("🔐" + "=" * 78)
         if success:
             masked_token = self._mask_token(token) if token else "None"
@@ -146,6 +435,9 @@ class DRGLogger:
         erro: Optional[str] = None,
     ):
         """Log específico para processamento de guia"""
+        if self.formato_json:
+            return
+
         self.logger.info("📋" + "=" * 78)
         self.logger.info(
             f"📋 PROCESSAMENTO GUIA - ID: {guia_id} | Número: {numero_guia}"
@@ -153,17 +445,12 @@ class DRGLogger:
         self.logger.info("📋" + "=" * 78)
 
         # Log JSON enviado (com dados mascarados)
-        safe_json = self._mask_sensitive_data(json_enviado)
-        self.logger.info(
-            f"📤 JSON Enviado: {json.dumps(safe_json, indent=2, ensure_ascii=False)}"
-        )
+        self.logger.info("📤 JSON Enviado: %s", self._payload(json_enviado))
 
         if sucesso:
             self.logger.info("✅ PROCESSAMENTO SUCESSO")
             if resposta:
-                self.logger.info(
-                    f"📥 Resposta: {json.dumps(resposta, indent=2, ensure_ascii=False)}"
-                )
+                self.logger.info("📥 Resposta: %s", self._payload(resposta))
         else:
             self.logger.error("❌ PROCESSAMENTO FALHA")
             if erro:
@@ -171,6 +458,167 @@ class DRGLogger:
 
         self.logger.info("📋" + "=" * 78)
 
+    @contextmanager
+    def chamada(
+        self, operacao: str, url: str, guias: Optional[List[str]] = None
+    ) -> Iterator[ChamadaDRG]:
+        """
+        Mede uma chamada à DRG e registra um único log ao final.
+
+        Uso:
+            with drg_logger.chamada("envio_lote", url, guias) as chamada:
+                ...
+                chamada.registrar_resposta(status, enviados, recebidos)
+                chamada.finalizar(resultado)
+        """
+        chamada = ChamadaDRG(operacao, url, guias)
+        try:
+            yield chamada
+        except Exception as e:
+            chamada.finalizar({"sucesso": False, "erro": str(e)})
+            raise
+        finally:
+            chamada.encerrar()
+            self.log_chamada(chamada)
+
+    def log_chamada(self, chamada: ChamadaDRG):
+        """Log resumido de uma chamada à DRG (um registro por chamada)"""
+        nivel = logging.INFO if chamada.resultado == "sucesso" else logging.WARNING
+
+        if self.formato_json:
+            self.logger.log(nivel, "chamada_drg", extra={"campos": chamada.como_dict()})
+            return
+
+        self.logger.log(
+            nivel,
+            f"📊 CHAMADA DRG - {chamada.operacao} | {chamada.resultado} | "
+            f"HTTP {chamada.status_code} | {chamada.latencia_ms} ms | "
+            f"enviados {chamada.bytes_enviados} B | recebidos {chamada.bytes_recebidos} B | "
+            f"guias {len(chamada.guias)}",
+        )
+
+    def log_lote(
+        self, guias: int, resultado: str, duracao_ms: float, fases: Dict[str, float]
+    ):
+        """Log resumido de um lote enviado, com o tempo gasto em cada fase"""
+        nivel = logging.INFO if resultado == "transmitida" else logging.WARNING
+
+        if self.formato_json:
+            self.logger.log(
+                nivel,
+                "lote_drg",
+                extra={
+                    "campos": {
+                        "guias": guias,
+                        "resultado": resultado,
+                        "duracao_ms": round(duracao_ms, 2),
+                        "fases_ms": fases,
+                    }
+                },
+            )
+            return
+
+        detalhe = " | ".join(f"{fase} {ms} ms" for fase, ms in fases.items())
+        self.logger.log(
+            nivel,
+            f"⏱️ LOTE DRG - {guias} guias | {resultado} | {round(duracao_ms, 2)} ms | "
+            f"{detalhe}",
+        )
+
+    def estatisticas(self) -> Dict[str, Any]:
+        """Retorna o modo de logging e os contadores da fila (modo assíncrono)."""
+        if not self._fila_handler:
+            return {"modo": "sincrono"}
+
+        fila = self._fila_handler.queue
+        return {
+            "modo": "assincrono",
+            "fila_tamanho": fila.qsize(),
+            "fila_max": fila.maxsize,
+            "politica_descarte": self._fila_handler.politica,
+            "descartados": self._fila_handler.descartados,
+        }
+
+    def parar(self):
+        """Esvazia a fila e encerra a thread do listener (modo assíncrono)."""
+        if self._ouvinte is None:
+            return
+
+        ouvinte, self._ouvinte = self._ouvinte, None
+        ouvinte.stop()
+
+        if self._fila_handler and self._fila_handler.descartados:
+            logging.getLogger(__name__).warning(
+                f"⚠️ {self._fila_handler.descartados} registros de log descartados "
+                "por fila cheia"
+            )
+
+    def _payload(self, dados: Any) -> JsonTardio:
+        """
+        Prepara um payload para log conforme LOG_PAYLOAD_MODE.
+
+        - resumido: strings longas (ex.: conteudoBase64) viram tamanho + hash
+          curto, com profundidade, itens e tamanho final limitados
+        - completo: payload inteiro, apenas com dados sensíveis mascarados
+
+        O resumo/mascaramento roda aqui, na thread de quem registra, e gera
+        uma cópia: alterações posteriores no payload não aparecem no log e a
+        fila não retém o payload original. Só o json.dumps fica para depois.
+        """
+        if self.settings.LOG_PAYLOAD_MODE == MODO_PAYLOAD_COMPLETO:
+            return JsonTardio(self._mask_sensitive_data(dados))
+
+        return JsonTardio(
+            self._resumir_dados(dados),
+            max_caracteres=self.settings.LOG_PAYLOAD_MAX_CARACTERES,
+        )
+
+    def _resumir_dados(self, data: Any, profundidade: int = 0) -> Any:
+        """Resume e mascara o payload em uma única passada"""
+        sensitive_keys = ["password", "senha", "token", "api_key", "secret"]
+
+        if profundidade >= self.settings.LOG_PAYLOAD_MAX_PROFUNDIDADE and isinstance(
+            data, (dict, list)
+        ):
+            return f"<{type(data).__name__} com {len(data)} itens>"
+
+        if isinstance(data, dict):
+            safe_data = {}
+            for key, value in data.items():
+                if any(sensitive in str(key).lower() for sensitive in sensitive_keys):
+                    if isinstance(value, str) and len(value) > 4:
+                        safe_data[key] = f"***{value[-4:]}"
+                    else:
+                        safe_data[key] = "***"
+                else:
+                    safe_data[key] = self._resumir_dados(value, profundidade + 1)
+            return safe_data
+
+        if isinstance(data, list):
+            max_itens = self.settings.LOG_PAYLOAD_MAX_ITENS
+            itens = [self._resumir_dados(item, profundidade + 1) for item in data[:max_itens]]
+            if len(data) > max_itens:
+                itens.append(f"<mais {len(data) - max_itens} itens>")
+            return itens
+
+        if isinstance(data, str) and len(data) > self.settings.LOG_PAYLOAD_MAX_STRING:
+            return self._resumir_string(data)
+
+        return data
+
+    def _resumir_string(self, valor: str) -> str:
+        """
+        Substitui uma string longa por tamanho + hash curto.
+
+        O hash usa apenas o início e o fim da string, então o custo não depende
+        do tamanho do conteúdo (ex.: anexos em Base64 de vários MB).
+        """
+        bordas = (valor[:_BORDA_HASH] + valor[-_BORDA_HASH:]).encode(
+            "utf-8", errors="replace"
+        )
+        hash_curto = hashlib.sha1(bordas).hexdigest()[:8]
+        return f"<{len(valor)} caracteres, hash {hash_curto}>"
+
     def _mask_sensitive_headers(self, headers: Dict[str, str]) -> Dict[str, str]:
         """Mascarar headers sensíveis"""
         sensitive_keys = ["authorization", "x-api-key", "api-key"]
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Métricas Prometheus da integração DRG
+
+Se o pacote `prometheus_client` não estiver instalado as funções de registro
+viram no-op e o endpoint /metrics responde 503.
+"""
+
+import logging
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+try:
+    from prometheus_client import (
+        CONTENT_TYPE_LATEST,
+        CollectorRegistry,
+        Counter,
+        Histogram,
+        generate_latest,
+    )
+    from prometheus_client.core import GaugeMetricFamily
+
+    PROMETHEUS_DISPONIVEL = True
+except ImportError:  # pragma: no cover - dependência opcional
+    PROMETHEUS_DISPONIVEL = False
+    CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+logger = logging.getLogger(__name__)
+
+# Faixas (segundos) para chamadas HTTP à DRG - lotes podem levar minutos
+_FAIXAS_LATENCIA = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+# Faixas (bytes) para payloads com anexos em Base64
+_FAIXAS_BYTES = (1e3, 1e4, 1e5, 5e5, 1e6, 5e6, 1e7, 2.5e7, 5e7, 1e8)
+# Faixas (segundos) para ciclos de monitoramento e codificação de anexos
+_FAIXAS_CICLO = (0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 900)
+
+
+class ColetorEstado:
+    """
+    Coletor avaliado a cada scrape: backlog por tp_status e uso do pool de
+    conexões do banco.
+    """
+
+    def collect(self):
+        # Imports tardios para não criar ciclo com os serviços
+        from app.database import database
+        from app.services.estatisticas_service import estatisticas_service
+
+        backlog = GaugeMetricFamily(
+            "drg_guias_backlog",
+            "Quantidade de guias por tp_status",
+            labels=["tp_status"],
+        )
+        try:
+            contagens = estatisticas_service.obter_contagens()
+            for tp_status, quantidade in contagens["por_tp_status"].items():
+                backlog.add_metric([str(tp_status)], quantidade)
+        except Exception as e:
+            logger.warning(f"⚠️ Não foi possível obter o backlog para métricas: {e}")
+        yield backlog
+
+        pool = GaugeMetricFamily(
+            "drg_db_pool_conexoes",
+            "Conexões do pool do banco de dados por estado",
+            labels=["estado"],
+        )
+        engine_pool = getattr(database.engine, "pool", None)
+        for estado, metodo in (
+            ("tamanho", "size"),
+            ("em_uso", "checkedout"),
+            ("livres", "checkedin"),
+            ("overflow", "overflow"),
+        ):
+            funcao = getattr(engine_pool, metodo, None)
+            if callable(funcao):
+                try:
+                    pool.add_metric([estado], funcao())
+                except Exception:
+                    pass
+        yield pool
+
+
+if PROMETHEUS_DISPONIVEL:
+    registro = CollectorRegistry()
+
+    duracao_chamada_drg = Histogram(
+        "drg_chamada_duracao_segundos",
+        "Latência das chamadas HTTP à DRG",
+        ["operacao"],
+        buckets=_FAIXAS_LATENCIA,
+        registry=registro,
+    )
+    bytes_chamada_drg = Histogram(
+        "drg_chamada_bytes",
+        "Tamanho dos payloads enviados/recebidos nas chamadas à DRG",
+        ["operacao", "direcao"],
+        buckets=_FAIXAS_BYTES,
+        registry=registro,
+    )
+    chamadas_drg = Counter(
+        "drg_chamadas",
+        "Chamadas à DRG por operação e classe de resultado",
+        ["operacao", "resultado"],
+        registry=registro,
+    )
+    guias_processadas = Counter(
+        "drg_guias_processadas",
+        "Guias processadas no envio por resultado (transmitida, retentavel, erro)",
+        ["resultado"],
+        registry=registro,
+    )
+    renovacoes_token = Counter(
+        "drg_token_renovacoes",
+        "Renovações de token de autenticação por motivo",
+        ["motivo", "resultado"],
+        registry=registro,
+    )
+    duracao_codificacao_anexo = Histogram(
+        "drg_anexo_codificacao_segundos",
+        "Tempo de leitura e codificação Base64 de anexos",
+        buckets=_FAIXAS_CICLO,
+        registry=registro,
+    )
+    duracao_ciclo_monitor = Histogram(
+        "drg_monitor_ciclo_duracao_segundos",
+        "Duração dos ciclos dos monitores",
+        ["monitor"],
+        buckets=_FAIXAS_CICLO,
+        registry=registro,
+    )
+    registro.register(ColetorEstado())
+
+
+def registrar_chamada_drg(chamada):
+    """Registra latência, bytes e resultado de uma ChamadaDRG."""
+    if not PROMETHEUS_DISPONIVEL:
+        return
+
+    if chamada.latencia_ms is not None:
+        duracao_chamada_drg.labels(chamada.operacao).observe(chamada.latencia_ms / 1000)
+    if chamada.status_code is not None:
+        bytes_chamada_drg.labels(chamada.operacao, "enviado").observe(
+            chamada.bytes_enviados
+        )
+        bytes_chamada_drg.labels(chamada.operacao, "recebido").observe(
+            chamada.bytes_recebidos
+        )
+    chamadas_drg.labels(chamada.operacao, chamada.resultado).inc()
+
+
+def registrar_guias_processadas(resultado: str, quantidade: int = 1):
+    """Conta guias processadas no envio (transmitida, retentavel ou erro)."""
+    if PROMETHEUS_DISPONIVEL and quantidade:
+        guias_processadas.labels(resultado).inc(quantidade)
+
+
+def registrar_renovacao_token(motivo: str, sucesso: bool):
+    """Conta renovações de token (motivo: preventiva ou forcada)."""
+    if PROMETHEUS_DISPONIVEL:
+        renovacoes_token.labels(motivo, "sucesso" if sucesso else "erro").inc()
+
+
+def registrar_codificacao_anexo(segundos: float):
+    """Registra o tempo de leitura + Base64 de um anexo."""
+    if PROMETHEUS_DISPONIVEL:
+        duracao_codificacao_anexo.observe(segundos)
+
+
+@contextmanager
+def medir_ciclo_monitor(monitor: str) -> Iterator[None]:
+    """Mede a duração de um ciclo de monitoramento."""
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        if PROMETHEUS_DISPONIVEL:
+            duracao_ciclo_monitor.labels(monitor).observe(time.perf_counter() - inicio)
+
+
+def gerar_metricas() -> bytes:
+    """Exporta as métricas no formato texto do Prometheus."""
+    return generate_latest(registro)
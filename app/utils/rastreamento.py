@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Rastreamento leve (spans) das fases do envio de lotes à DRG
+
+Cada `span()` mede uma fase (busca no banco, montagem do JSON, Base64,
+serialização, HTTP, commit...). A duração de cada fase é acumulada nos spans
+ancestrais em `fases`, o que permite registrar no log do lote o tempo gasto
+em cada fase. Com TRACING_ENABLED, ao terminar o span raiz o trace completo é
+exportado no formato OTLP/JSON do OpenTelemetry (uma linha por trace), em
+arquivo ou no console, sem depender do SDK do OpenTelemetry.
+"""
+
+import contextvars
+import json
+import logging
+import os
+import secrets
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from app.config.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+EXPORTADOR_ARQUIVO = "arquivo"
+EXPORTADOR_CONSOLE = "console"
+
+NOME_SERVICO = "drg-integracao-guias"
+
+# Códigos de status do OTLP (STATUS_CODE_UNSET, STATUS_CODE_OK, STATUS_CODE_ERROR)
+_STATUS_OK = 1
+_STATUS_ERRO = 2
+# SPAN_KIND_INTERNAL
+_KIND_INTERNO = 1
+
+_span_atual: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar(
+    "span_atual", default=None
+)
+
+
+class Span:
+    """Uma fase medida; filhos acumulam sua duração em `fases` dos ancestrais"""
+
+    __slots__ = (
+        "nome",
+        "trace_id",
+        "span_id",
+        "pai",
+        "atributos",
+        "inicio_ns",
+        "fim_ns",
+        "_inicio_perf",
+        "duracao_ms",
+        "fases",
+        "erro",
+        "_finalizados",
+    )
+
+    def __init__(self, nome: str, pai: Optional["Span"], atributos: Dict[str, Any]):
+        self.nome = nome
+        self.pai = pai
+        self.trace_id = pai.trace_id if pai else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.atributos = atributos
+        self.inicio_ns = time.time_ns()
+        self.fim_ns: Optional[int] = None
+        self._inicio_perf = time.perf_counter()
+        self.duracao_ms: Optional[float] = None
+        self.fases: Dict[str, float] = {}
+        self.erro: Optional[str] = None
+        # Spans encerrados do trace, compartilhados com o span raiz
+        self._finalizados: List["Span"] = pai._finalizados if pai else []
+
+    def definir_atributo(self, chave: str, valor: Any):
+        self.atributos[chave] = valor
+
+    def fases_ms(self) -> Dict[str, float]:
+        """Tempo acumulado por fase (ms); fases aninhadas também contam no pai."""
+        return {nome: round(ms, 2) for nome, ms in self.fases.items()}
+
+    def _encerrar(self):
+        self.fim_ns = time.time_ns()
+        self.duracao_ms = (time.perf_counter() - self._inicio_perf) * 1000
+
+        ancestral = self.pai
+        while ancestral is not None:
+            ancestral.fases[self.nome] = (
+                ancestral.fases.get(self.nome, 0.0) + self.duracao_ms
+            )
+            ancestral = ancestral.pai
+
+        self._finalizados.append(self)
+
+    def como_otlp(self) -> Dict[str, Any]:
+        """Span no formato OTLP/JSON (ids em hexadecimal, tempos em ns)."""
+        dados = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.nome,
+            "kind": _KIND_INTERNO,
+            "startTimeUnixNano": str(self.inicio_ns),
+            "endTimeUnixNano": str(self.fim_ns),
+            "attributes": [
+                _atributo_otlp(chave, valor) for chave, valor in self.atributos.items()
+            ],
+            "status": (
+                {"code": _STATUS_ERRO, "message": self.erro}
+                if self.erro
+                else {"code": _STATUS_OK}
+            ),
+        }
+        if self.pai is not None:
+            dados["parentSpanId"] = self.pai.span_id
+        return dados
+
+
+def _atributo_otlp(chave: str, valor: Any) -> Dict[str, Any]:
+    if isinstance(valor, bool):
+        return {"key": chave, "value": {"boolValue": valor}}
+    if isinstance(valor, int):
+        return {"key": chave, "value": {"intValue": str(valor)}}
+    if isinstance(valor, float):
+        return {"key": chave, "value": {"doubleValue": valor}}
+    return {"key": chave, "value": {"stringValue": str(valor)}}
+
+
+class ExportadorSpans:
+    """Grava traces encerrados em OTLP/JSON (arquivo ou console)"""
+
+    def __init__(self):
+        self.settings = get_settings()
+        self.habilitado = self.settings.TRACING_ENABLED
+        self.destino = self.settings.TRACING_EXPORTER
+        self.arquivo = self.settings.TRACING_FILE
+        self._lock = threading.Lock()
+
+        if self.destino not in (EXPORTADOR_ARQUIVO, EXPORTADOR_CONSOLE):
+            logger.warning(
+                f"⚠️ TRACING_EXPORTER inválido ({self.destino}), usando '{EXPORTADOR_ARQUIVO}'"
+            )
+            self.destino = EXPORTADOR_ARQUIVO
+
+    def exportar(self, spans: List[Span]):
+        if not self.habilitado or not spans:
+            return
+
+        linha = json.dumps(
+            {
+                "resourceSpans": [
+                    {
+                        "resource": {
+                            "attributes": [
+                                _atributo_otlp("service.name", NOME_SERVICO)
+                            ]
+                        },
+                        "scopeSpans": [
+                            {
+                                "scope": {"name": __name__},
+                                "spans": [span.como_otlp() for span in spans],
+                            }
+                        ],
+                    }
+                ]
+            },
+            ensure_ascii=False,
+            default=str,
+        )
+
+        try:
+            with self._lock:
+                if self.destino == EXPORTADOR_CONSOLE:
+                    sys.stdout.write(linha + "\n")
+                    sys.stdout.flush()
+                else:
+                    diretorio = os.path.dirname(self.arquivo)
+                    if diretorio:
+                        os.makedirs(diretorio, exist_ok=True)
+                    with open(self.arquivo, "a", encoding="utf-8") as saida:
+                        saida.write(linha + "\n")
+        except Exception as e:
+            # Falha na exportação não pode interromper o envio das guias
+            logger.warning(f"⚠️ Erro ao exportar spans: {e}")
+
+
+# Instância global do exportador
+exportador_spans = ExportadorSpans()
+
+
+@contextmanager
+def span(nome: str, **atributos: Any) -> Iterator[Span]:
+    """
+    Mede uma fase como span filho do span atual (ou inicia um novo trace).
+
+    Exceções são registradas no status do span e propagadas normalmente.
+    """
+    pai = _span_atual.get()
+    atual = Span(nome, pai, atributos)
+    token = _span_atual.set(atual)
+    try:
+        yield atual
+    except BaseException as e:
+        atual.erro = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _span_atual.reset(token)
+        atual._encerrar()
+        if pai is None:
+            exportador_spans.exportar(atual._finalizados)
+
+
+def span_atual() -> Optional[Span]:
+    """Span em andamento no contexto atual (None fora de um span)."""
+    return _span_atual.get()
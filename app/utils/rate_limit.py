@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Rate limiter (slowapi) compartilhado pela aplicação
+
+Um único `Limiter` usado por main.py e pelas rotas. O armazenamento dos
+contadores vem de RATE_LIMIT_STORAGE_URI:
+
+- memory://                     contadores por processo (padrão)
+- sqlite:///database/limites.db contadores compartilhados entre workers da
+                                mesma máquina, sem Redis
+- redis://host:6379             qualquer storage suportado pela biblioteca limits
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from limits.storage import Storage
+from slowapi import Limiter
+from slowapi.util import get_remote_address
+
+from app.config.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# A cada N incrementos, remover as chaves expiradas do arquivo
+_LIMPEZA_A_CADA = 1000
+
+
+class SQLiteStorage(Storage):
+    """
+    Storage da biblioteca `limits` em um arquivo SQLite.
+
+    Os contadores ficam em um arquivo local compartilhado por todos os
+    processos (workers do uvicorn) da máquina. O incremento é um único UPSERT,
+    atômico entre processos; o modo WAL permite leituras concorrentes.
+
+    URI no formato do SQLAlchemy: sqlite:///relativo.db ou sqlite:////absoluto.db
+    """
+
+    STORAGE_SCHEME = ["sqlite"]
+
+    def __init__(self, uri: str, wrap_exceptions: bool = False, **options):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        caminho = uri.split("://", 1)[1]
+        # sqlite:///arquivo.db -> "/arquivo.db" (relativo, como no SQLAlchemy)
+        self.caminho = caminho[1:] if caminho.startswith("/") else caminho
+        self.timeout = float(options.get("timeout", 5))
+
+        diretorio = os.path.dirname(self.caminho)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+
+        self._local = threading.local()
+        self._incrementos = 0
+
+        conexao = self._conexao()
+        conexao.execute("PRAGMA journal_mode=WAL")
+        conexao.execute(
+            "CREATE TABLE IF NOT EXISTS limites ("
+            "chave TEXT PRIMARY KEY, contador INTEGER NOT NULL, expira_em REAL NOT NULL)"
+        )
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def _conexao(self) -> sqlite3.Connection:
+        """Uma conexão por thread (sqlite3 não compartilha conexões entre threads)."""
+        conexao = getattr(self._local, "conexao", None)
+        if conexao is None:
+            conexao = sqlite3.connect(
+                self.caminho, timeout=self.timeout, isolation_level=None
+            )
+            self._local.conexao = conexao
+        return conexao
+
+    def incr(self, key: str, expiry: int, amount: int = 1) -> int:
+        agora = time.time()
+        conexao = self._conexao()
+        (contador,) = conexao.execute(
+            "INSERT INTO limites (chave, contador, expira_em) VALUES (?, ?, ?) "
+            "ON CONFLICT(chave) DO UPDATE SET "
+            "contador = CASE WHEN expira_em <= ? THEN excluded.contador "
+            "ELSE contador + excluded.contador END, "
+            "expira_em = CASE WHEN expira_em <= ? THEN excluded.expira_em "
+            "ELSE expira_em END "
+            "RETURNING contador",
+            (key, amount, agora + expiry, agora, agora),
+        ).fetchone()
+
+        self._incrementos += 1
+        if self._incrementos % _LIMPEZA_A_CADA == 0:
+            conexao.execute("DELETE FROM limites WHERE expira_em <= ?", (agora,))
+
+        return contador
+
+    def get(self, key: str) -> int:
+        linha = self._conexao().execute(
+            "SELECT contador FROM limites WHERE chave = ? AND expira_em > ?",
+            (key, time.time()),
+        ).fetchone()
+        return linha[0] if linha else 0
+
+    def get_expiry(self, key: str) -> float:
+        linha = self._conexao().execute(
+            "SELECT expira_em FROM limites WHERE chave = ? AND expira_em > ?",
+            (key, time.time()),
+        ).fetchone()
+        return linha[0] if linha else time.time()
+
+    def check(self) -> bool:
+        try:
+            self._conexao().execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self) -> Optional[int]:
+        return self._conexao().execute("DELETE FROM limites").rowcount
+
+    def clear(self, key: str) -> None:
+        self._conexao().execute("DELETE FROM limites WHERE chave = ?", (key,))
+
+
+def criar_limiter() -> Limiter:
+    """Cria o Limiter com o storage configurado em RATE_LIMIT_STORAGE_URI."""
+    storage_uri = get_settings().RATE_LIMIT_STORAGE_URI
+    logger.info(f"🚦 Rate limiting com storage '{storage_uri.split('://', 1)[0]}'")
+    return Limiter(
+        key_func=get_remote_address,
+        storage_uri=storage_uri,
+        # Se o storage compartilhado falhar, limitar por processo em memória
+        in_memory_fallback_enabled=True,
+    )
+
+
+# Instância global do rate limiter
+limiter = criar_limiter()
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Worker de tarefas em segundo plano (processo separado da API)
+
+Executa os monitores de envio, PULL e campos fora do processo do FastAPI, para
+que ciclos pesados não disputem CPU/event loop com as requisições HTTP. A API
+pode então rodar com API_BACKGROUND_TASKS_ENABLED=False e cada processo ser
+dimensionado separadamente.
+
+Uso:
+    python -m app.worker
+
+- Encerramento gracioso em SIGTERM/SIGINT (aguarda até
+  WORKER_SHUTDOWN_TIMEOUT_SECONDS para parar os monitores)
+- Health check HTTP em WORKER_HEALTH_PORT (GET /health) e métricas
+  Prometheus do worker (GET /metrics), atendidos por uma thread própria para
+  responder mesmo com o event loop ocupado por um ciclo dos monitores
+- Limites próprios: threads do executor (WORKER_THREADS) e memória
+  (WORKER_MAX_MEMORY_MB, apenas Linux/Unix)
+"""
+
+import asyncio
+import json
+import logging
+import signal
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from app.config.config import get_settings
+from app.database.database import init_db
+from app.services.lideranca_service import lideranca_service
+from app.services.monitor_campos_service import monitor_campos_service
+from app.services.monitor_pull_service import monitor_pull_service
+from app.services.monitor_service import monitor_service
+from app.services.tarefas_service import tarefas_service
+from app.utils import metricas
+
+logger = logging.getLogger("app.worker")
+
+
+class Worker:
+    """Processo dedicado aos monitores, com health check e parada graciosa"""
+
+    def __init__(self):
+        self.settings = get_settings()
+        self.iniciado_em = datetime.utcnow()
+        self._parar = asyncio.Event()
+        self._servidor_health = None
+
+    # ------------------------------------------------------------------
+    # Limites de recursos
+    # ------------------------------------------------------------------
+
+    def aplicar_limites(self, loop: asyncio.AbstractEventLoop):
+        """Limita threads do executor padrão e memória do processo."""
+        loop.set_default_executor(
+            ThreadPoolExecutor(
+                max_workers=self.settings.WORKER_THREADS,
+                thread_name_prefix="worker",
+            )
+        )
+
+        limite_mb = self.settings.WORKER_MAX_MEMORY_MB
+        if limite_mb <= 0:
+            return
+
+        try:
+            import resource
+
+            limite = limite_mb * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (limite, limite))
+            logger.info(f"📏 Limite de memória do worker: {limite_mb} MB")
+        except (ImportError, ValueError, OSError) as e:
+            # Windows não tem o módulo resource
+            logger.warning(f"⚠️ Não foi possível aplicar WORKER_MAX_MEMORY_MB: {e}")
+
+    # ------------------------------------------------------------------
+    # Health check
+    # ------------------------------------------------------------------
+
+    def estado(self) -> dict:
+        """Situação do worker e dos monitores."""
+        monitores = {}
+        saudavel = True
+        for nome, servico in (
+            ("envio", monitor_service),
+            ("pull", monitor_pull_service),
+            ("campos", monitor_campos_service),
+        ):
+            rodando = bool(servico._running)
+            # Task terminada com o monitor marcado como rodando = loop morreu
+            falhou = rodando and servico._task is not None and servico._task.done()
+            saudavel = saudavel and not falhou
+            if falhou:
+                monitores[nome] = "falhou"
+            else:
+                monitores[nome] = "rodando" if rodando else "parado"
+
+        return {
+            "status": "healthy" if saudavel else "unhealthy",
+            "encerrando": self._parar.is_set(),
+            "iniciado_em": self.iniciado_em.isoformat(),
+            "uptime_segundos": int(
+                (datetime.utcnow() - self.iniciado_em).total_seconds()
+            ),
+            "lideranca": lideranca_service.estado(),
+            "monitores": monitores,
+            "timestamp": datetime.utcnow().isoformat(),
+        }
+
+    def _criar_handler(self):
+        """Handler HTTP mínimo: /metrics ou o estado do worker a qualquer GET."""
+        worker = self
+
+        class HealthHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] == "/metrics":
+                    if metricas.PROMETHEUS_DISPONIVEL:
+                        self._responder(
+                            200, metricas.CONTENT_TYPE_LATEST, metricas.gerar_metricas()
+                        )
+                    else:
+                        self._responder(
+                            503,
+                            "text/plain; charset=utf-8",
+                            "prometheus_client não está instalado".encode("utf-8"),
+                        )
+                    return
+
+                estado = worker.estado()
+                corpo = json.dumps(estado, ensure_ascii=False).encode("utf-8")
+                self._responder(
+                    200 if estado["status"] == "healthy" else 503,
+                    "application/json",
+                    corpo,
+                )
+
+            def _responder(self, status: int, tipo: str, corpo: bytes):
+                self.send_response(status)
+                self.send_header("Content-Type", tipo)
+                self.send_header("Content-Length", str(len(corpo)))
+                self.send_header("Connection", "close")
+                self.end_headers()
+                self.wfile.write(corpo)
+
+            def log_message(self, formato, *args):
+                # Sondas a cada poucos segundos: não poluir o log
+                logger.debug(f"health {self.address_string()} {formato % args}")
+
+        return HealthHandler
+
+    def iniciar_health(self):
+        porta = self.settings.WORKER_HEALTH_PORT
+        if porta <= 0:
+            logger.info("🔕 Health check HTTP do worker desabilitado")
+            return
+
+        # Thread própria: as sondas não dependem do event loop dos monitores
+        self._servidor_health = ThreadingHTTPServer(
+            ("0.0.0.0", porta), self._criar_handler()
+        )
+        self._servidor_health.daemon_threads = True
+        threading.Thread(
+            target=self._servidor_health.serve_forever,
+            name="worker-health",
+            daemon=True,
+        ).start()
+        logger.info(
+            f"💓 Health check do worker em http://0.0.0.0:{porta}/health "
+            f"(métricas em /metrics)"
+        )
+
+    # ------------------------------------------------------------------
+    # Ciclo de vida
+    # ------------------------------------------------------------------
+
+    def solicitar_parada(self, *_):
+        if not self._parar.is_set():
+            logger.info("🛑 Sinal de parada recebido, encerrando worker...")
+            self._parar.set()
+
+    def _registrar_sinais(self, loop: asyncio.AbstractEventLoop):
+        for sinal in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.add_signal_handler(sinal, self.solicitar_parada)
+            except (NotImplementedError, RuntimeError):
+                # Windows: sem add_signal_handler no event loop
+                signal.signal(
+                    sinal,
+                    lambda *_: loop.call_soon_threadsafe(self.solicitar_parada),
+                )
+
+    async def executar(self):
+        loop = asyncio.get_running_loop()
+        self.aplicar_limites(loop)
+        self._registrar_sinais(loop)
+
+        logger.info("🚀 Iniciando worker de tarefas em segundo plano...")
+        init_db()
+        self.iniciar_health()
+        await tarefas_service.iniciar()
+        logger.info("✅ Worker iniciado")
+
+        await self._parar.wait()
+
+        try:
+            await asyncio.wait_for(
+                tarefas_service.parar(),
+                timeout=self.settings.WORKER_SHUTDOWN_TIMEOUT_SECONDS,
+            )
+        except asyncio.TimeoutError:
+            logger.warning(
+                "⚠️ Monitores não pararam em "
+                f"{self.settings.WORKER_SHUTDOWN_TIMEOUT_SECONDS}s; encerrando mesmo assim"
+            )
+
+        if self._servidor_health:
+            await asyncio.to_thread(self._servidor_health.shutdown)
+            self._servidor_health.server_close()
+
+        logger.info("✅ Worker encerrado")
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(Worker().executar())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
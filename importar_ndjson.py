@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Importação de guias a partir de um arquivo NDJSON
+
+Cada linha do arquivo é uma guia no formato de loteGuias (GuiaSchema). O
+arquivo é lido em partes e gravado em blocos com um commit por bloco, com
+memória constante mesmo para centenas de milhares de guias. Guias já
+existentes (mesmo numero_guia) são ignoradas, então a importação pode ser
+repetida após uma interrupção.
+
+Uso:
+    python importar_ndjson.py guias.ndjson [--commit 1000] [--rejeitos arquivo]
+"""
+
+import argparse
+import sys
+
+from app.database.database import get_session, init_db
+from app.services.ingestao_service import ImportacaoNDJSON
+
+# Bytes lidos do arquivo por vez
+TAMANHO_LEITURA = 64 * 1024
+
+
+def mostrar_progresso(resumo: dict):
+    print(
+        f"📦 {resumo['linhas']} linhas | {resumo['inseridas']} inseridas | "
+        f"{resumo['existentes']} existentes | {resumo['invalidas']} inválidas | "
+        f"{resumo['guias_por_segundo']} guias/s"
+    )
+
+
+def importar(caminho: str, tamanho_commit: int, arquivo_rejeitos: str) -> dict:
+    init_db()
+    with get_session() as db, open(caminho, "rb") as arquivo:
+        importacao = ImportacaoNDJSON(
+            db,
+            tamanho_commit=tamanho_commit,
+            arquivo_rejeitos=arquivo_rejeitos,
+            ao_progredir=mostrar_progresso,
+        )
+        for parte in iter(lambda: arquivo.read(TAMANHO_LEITURA), b""):
+            if importacao.alimentar(parte):
+                importacao.descarregar()
+        return importacao.finalizar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Importa guias de um arquivo NDJSON")
+    parser.add_argument("arquivo", help="Arquivo NDJSON (uma guia por linha)")
+    parser.add_argument(
+        "--commit",
+        type=int,
+        default=None,
+        help="Guias por bloco/commit (padrão: INGESTAO_NDJSON_COMMIT_SIZE)",
+    )
+    parser.add_argument(
+        "--rejeitos",
+        default=None,
+        help="Arquivo das guias rejeitadas (padrão: <arquivo>.rejeitos.ndjson)",
+    )
+    args = parser.parse_args()
+
+    arquivo_rejeitos = args.rejeitos or f"{args.arquivo}.rejeitos.ndjson"
+
+    print(f"🚀 Importando guias de {args.arquivo}...")
+    resumo = importar(args.arquivo, args.commit, arquivo_rejeitos)
+
+    print("\n📋 RESUMO DA IMPORTAÇÃO:")
+    print(f"   Linhas: {resumo['linhas']}")
+    print(f"   ✅ Inseridas: {resumo['inseridas']}")
+    print(f"   ♻️ Já existentes: {resumo['existentes']}")
+    print(f"   🔁 Duplicadas no arquivo: {resumo['duplicadas']}")
+    print(f"   ❌ Inválidas: {resumo['invalidas']}")
+    if resumo["arquivo_rejeitos"]:
+        print(f"   📁 Rejeitos: {resumo['arquivo_rejeitos']}")
+    print(f"   ⏱️ {resumo['duracao_segundos']}s ({resumo['guias_por_segundo']} guias/s)")
+
+    return 0 if resumo["invalidas"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -11,24 +11,22 @@ import logging
 import asyncio
 
 # Rate limiting
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
+from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Configurar rate limiter
-limiter = Limiter(key_func=get_remote_address)
-
 # Importar configurações e serviços
 from app.config.config import get_settings
 from app.database.database import init_db
-from app.services.monitor_service import monitor_service
-from app.services.monitor_campos_service import monitor_campos_service
-from app.services.monitor_pull_service import monitor_pull_service
+from app.services.consulta_externa_service import consulta_externa_service
+from app.services.tarefas_service import tarefas_service
 from app.middleware.security import setup_security_middleware
+from app.middleware.correlacao import setup_correlacao_middleware
+from app.utils.rate_limit import limiter
+from app.utils.json_rapido import RespostaJSON
 
 
 @asynccontextmanager
@@ -40,23 +38,19 @@ async def lifespan(app: FastAPI):
     # Inicializar banco de dados
     init_db()
 
-    # Iniciar monitoramento automático
-    await monitor_service.start_monitoring()
-
-    # Iniciar monitoramento de campos se habilitado
+    # Iniciar monitores (apenas no worker líder, se a eleição estiver habilitada)
     settings = get_settings()
-    if settings.MONITOR_CAMPOS_ENABLED:
-        logger.info("🚀 Iniciando monitoramento automático de campos...")
-        monitor_campos_service._running = True
-        monitor_campos_service._task = asyncio.create_task(
-            monitor_campos_service.iniciar_monitoramento_continuo()
-        )
-        logger.info("✅ Monitoramento de campos iniciado")
+    if settings.API_BACKGROUND_TASKS_ENABLED:
+        await tarefas_service.iniciar()
     else:
-        logger.info("🔕 Monitoramento de campos desabilitado")
+        logger.info("🔕 Monitores desabilitados na API (executados por app.worker)")
 
-    # Iniciar monitoramento PULL se habilitado
-    await monitor_pull_service.iniciar_monitoramento_pull()
+    # Iniciar fila de retentativas adiadas da consulta externa
+    # (em todos os workers: a fila é em memória, de cada processo)
+    consulta_externa_service._running = True
+    consulta_externa_service._task = asyncio.create_task(
+        consulta_externa_service.iniciar_fila_retentativas_continua()
+    )
 
     logger.info("Aplicação FastAPI iniciada com sucesso!")
 
@@ -65,23 +59,17 @@ async def lifespan(app: FastAPI):
     # Shutdown
     logger.info("Encerrando aplicação FastAPI...")
 
-    # Parar monitoramento automático
-    await monitor_service.stop_monitoring()
+    # Parar monitores (e liberar a liderança)
+    await tarefas_service.parar()
 
-    # Parar monitoramento de campos
-    if monitor_campos_service._running:
-        logger.info("🛑 Parando monitoramento de campos...")
-        monitor_campos_service._running = False
-        if monitor_campos_service._task:
-            monitor_campos_service._task.cancel()
-            try:
-                await monitor_campos_service._task
-            except asyncio.CancelledError:
-                pass
-        logger.info("✅ Monitoramento de campos parado")
-
-    # Parar monitoramento PULL
-    await monitor_pull_service.parar_monitoramento_pull()
+    # Parar fila de retentativas adiadas da consulta externa
+    consulta_externa_service._running = False
+    if consulta_externa_service._task:
+        consulta_externa_service._task.cancel()
+        try:
+            await consulta_externa_service._task
+        except asyncio.CancelledError:
+            pass
 
 
 def create_app() -> FastAPI:
@@ -95,6 +83,8 @@ def create_app() -> FastAPI:
         docs_url="/docs",
         redoc_url="/redoc",
         lifespan=lifespan,
+        # Respostas serializadas com orjson (ver app.utils.json_rapido)
+        default_response_class=RespostaJSON,
     )
 
     # Configurar rate limiting
@@ -113,6 +103,9 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
 
+    # Correlation id por requisição (mais externo, vale para toda a pilha)
+    setup_correlacao_middleware(app)
+
     # Registrar rotas
     from app.routes.fastapi_routes import router
 
@@ -1,6 +1,9 @@
 #!/usr/bin/env python3
 """
 Script de migração para adicionar novos campos de consulta externa
+
+OBSOLETO: as colunas de consulta externa fazem parte da migração Alembic
+0001 (migrations/versions). Use `alembic upgrade head`.
 """
 
 import sqlite3
@@ -150,4 +153,5 @@ def main():
 
 
 if __name__ == "__main__":
+    print("⚠️ Script obsoleto: prefira `alembic upgrade head` (migrations/)")
     main()
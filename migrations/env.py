@@ -0,0 +1,75 @@
+"""
+Ambiente do Alembic
+
+Usa o mesmo engine da aplicação (app.database.database.criar_engine), então
+SQLite, Oracle e PostgreSQL são configurados apenas pelo .env. Quando chamado
+pela aplicação (DATABASE_INIT_MODE=migrate) reaproveita a conexão recebida em
+config.attributes["connection"], que deve chegar sem transação aberta (as
+transações são abertas aqui, uma por revisão).
+"""
+
+from logging.config import fileConfig
+
+from alembic import context
+
+from app.database.database import Base, criar_engine
+import app.models  # noqa: F401  (registra as tabelas em Base.metadata)
+
+config = context.config
+
+# Logging do alembic.ini apenas na linha de comando (não sobrescrever o da API)
+if config.config_file_name and "connection" not in config.attributes:
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = Base.metadata
+
+
+def _opcoes(dialeto: str) -> dict:
+    # SQLite não suporta a maioria dos ALTER TABLE: usar modo batch.
+    # Uma transação por revisão: revisões com autocommit_block (índices
+    # CONCURRENTLY) só confirmam o que veio antes delas.
+    return {
+        "target_metadata": target_metadata,
+        "render_as_batch": dialeto == "sqlite",
+        "compare_type": True,
+        "transaction_per_migration": True,
+    }
+
+
+def run_migrations_offline():
+    """Gera o SQL das migrações sem conectar (alembic upgrade head --sql)."""
+    url = criar_engine().url
+    context.configure(
+        url=url,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        **_opcoes(url.get_backend_name()),
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def _executar(conexao):
+    context.configure(connection=conexao, **_opcoes(conexao.dialect.name))
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    conexao = config.attributes.get("connection")
+    if conexao is not None:
+        _executar(conexao)
+        return
+
+    engine = criar_engine()
+    try:
+        with engine.connect() as conexao:
+            _executar(conexao)
+    finally:
+        engine.dispose()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,230 @@
+"""Esquema inicial (tabelas de guias, filhos, contadores e liderança)
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19 00:00:00
+
+Idempotente para adotar bancos criados antes do Alembic (create_all ou
+scripts SQL): cria apenas as tabelas ausentes e, na tabela de guias, adiciona
+as colunas da consulta externa que faltarem (substitui o antigo
+migrar_consulta_externa.py). As colunas novas são anuláveis ou têm default no
+servidor, o que no Oracle 11g+ e no PostgreSQL 11+ é só alteração de
+metadados (sem reescrever a tabela).
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# Colunas da consulta externa adicionadas depois da primeira versão da tabela
+COLUNAS_CONSULTA_EXTERNA = (
+    ("status_consulta", sa.String(length=1), "P"),
+    ("data_ultima_consulta", sa.DateTime(), None),
+    ("dados_retornados", sa.Text(), None),
+    ("senha_autorizacao", sa.String(length=20), None),
+    ("status_monitoramento", sa.String(length=1), "N"),
+)
+
+
+def upgrade():
+    if op.get_context().as_sql:
+        # Modo offline (--sql): gerar o esquema completo
+        inspetor = None
+        tabelas = set()
+    else:
+        inspetor = sa.inspect(op.get_bind())
+        tabelas = set(inspetor.get_table_names())
+
+    if "inovemed_tbl_guias" not in tabelas:
+        op.create_table(
+            "inovemed_tbl_guias",
+            sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+            sa.Column("numero_guia", sa.String(length=20), nullable=False),
+            sa.Column("codigo_operadora", sa.String(length=6), nullable=False),
+            sa.Column("numero_guia_operadora", sa.String(length=20), nullable=True),
+            sa.Column("numero_guia_internacao", sa.String(length=20), nullable=True),
+            sa.Column("data_autorizacao", sa.Date(), nullable=False),
+            sa.Column("senha", sa.String(length=20), nullable=True),
+            sa.Column("data_validade", sa.Date(), nullable=True),
+            sa.Column("numero_carteira", sa.String(length=20), nullable=False),
+            sa.Column("data_validade_carteira", sa.Date(), nullable=True),
+            sa.Column("rn", sa.String(length=1), nullable=True),
+            sa.Column("data_nascimento", sa.DateTime(), nullable=False),
+            sa.Column("sexo", sa.String(length=1), nullable=False),
+            sa.Column("situacao_beneficiario", sa.String(length=1), nullable=False),
+            sa.Column("nome_beneficiario", sa.String(length=100), nullable=False),
+            sa.Column("codigo_prestador", sa.String(length=14), nullable=False),
+            sa.Column("nome_prestador", sa.String(length=70), nullable=False),
+            sa.Column("nome_profissional", sa.String(length=70), nullable=True),
+            sa.Column("codigo_profissional", sa.String(length=2), nullable=False),
+            sa.Column(
+                "numero_registro_profissional",
+                sa.String(length=15),
+                nullable=False,
+            ),
+            sa.Column("uf_profissional", sa.String(length=2), nullable=False),
+            sa.Column("codigo_cbo", sa.String(length=6), nullable=False),
+            sa.Column("codigo_contratado", sa.String(length=14), nullable=False),
+            sa.Column("nome_hospital", sa.String(length=70), nullable=False),
+            sa.Column("porte_hospital", sa.String(length=1), nullable=True),
+            sa.Column("complexidade_hospital", sa.String(length=1), nullable=True),
+            sa.Column("esfera_administrativa", sa.String(length=1), nullable=True),
+            sa.Column("endereco_hospital", sa.Text(), nullable=True),
+            sa.Column("data_sugerida_internacao", sa.Date(), nullable=False),
+            sa.Column("carater_atendimento", sa.String(length=1), nullable=False),
+            sa.Column("tipo_internacao", sa.String(length=1), nullable=False),
+            sa.Column("regime_internacao", sa.String(length=1), nullable=False),
+            sa.Column("diarias_solicitadas", sa.Integer(), nullable=False),
+            sa.Column("previsao_uso_opme", sa.String(length=1), nullable=True),
+            sa.Column(
+                "previsao_uso_quimioterapico",
+                sa.String(length=1),
+                nullable=True,
+            ),
+            sa.Column("indicacao_clinica", sa.Text(), nullable=False),
+            sa.Column("indicacao_acidente", sa.String(length=1), nullable=False),
+            sa.Column("tipo_acomodacao_solicitada", sa.String(length=2), nullable=True),
+            sa.Column("data_admissao_estimada", sa.Date(), nullable=True),
+            sa.Column("qtde_diarias_autorizadas", sa.Integer(), nullable=True),
+            sa.Column("tipo_acomodacao_autorizada", sa.String(length=2), nullable=True),
+            sa.Column("cnes_autorizado", sa.String(length=7), nullable=True),
+            sa.Column("senha_autorizacao", sa.String(length=20), nullable=True),
+            sa.Column("observacao_guia", sa.Text(), nullable=True),
+            sa.Column("data_solicitacao", sa.Date(), nullable=False),
+            sa.Column("justificativa_operadora", sa.Text(), nullable=True),
+            sa.Column("natureza_guia", sa.String(length=1), nullable=False),
+            sa.Column("guia_complementar", sa.String(length=1), nullable=False),
+            sa.Column("situacao_guia", sa.String(length=2), nullable=False),
+            sa.Column("tipo_doenca", sa.String(length=1), nullable=True),
+            sa.Column("tempo_doenca", sa.Integer(), nullable=True),
+            sa.Column("longa_permanencia", sa.String(length=1), nullable=True),
+            sa.Column("motivo_encerramento", sa.String(length=2), nullable=True),
+            sa.Column("tipo_alta", sa.String(length=2), nullable=True),
+            sa.Column("data_alta", sa.Date(), nullable=True),
+            sa.Column("data_criacao", sa.DateTime(), nullable=True),
+            sa.Column("data_atualizacao", sa.DateTime(), nullable=True),
+            sa.Column("tp_status", sa.String(length=1), nullable=False),
+            sa.Column("data_processamento", sa.DateTime(), nullable=True),
+            sa.Column("mensagem_erro", sa.Text(), nullable=True),
+            sa.Column("tentativas", sa.Integer(), nullable=True),
+            sa.Column("status_consulta", sa.String(length=1), nullable=False),
+            sa.Column("data_ultima_consulta", sa.DateTime(), nullable=True),
+            sa.Column("dados_retornados", sa.Text(), nullable=True),
+            sa.Column("status_monitoramento", sa.String(length=1), nullable=False),
+            sa.PrimaryKeyConstraint("id")
+        )
+        op.create_index(
+            "ix_inovemed_tbl_guias_numero_guia",
+            "inovemed_tbl_guias",
+            ["numero_guia"],
+            unique=True,
+        )
+    else:
+        existentes = {c["name"] for c in inspetor.get_columns("inovemed_tbl_guias")}
+        for nome, tipo, padrao in COLUNAS_CONSULTA_EXTERNA:
+            if nome in existentes:
+                continue
+            with op.batch_alter_table("inovemed_tbl_guias") as batch_op:
+                batch_op.add_column(
+                    sa.Column(
+                        nome,
+                        tipo,
+                        nullable=padrao is None,
+                        server_default=padrao,
+                    )
+                )
+
+    if "inovemed_tbl_anexos" not in tabelas:
+        op.create_table(
+            "inovemed_tbl_anexos",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("numero_lote_documento", sa.String(length=12), nullable=True),
+            sa.Column(
+                "numero_protocolo_documento",
+                sa.String(length=12),
+                nullable=True,
+            ),
+            sa.Column("formato_documento", sa.String(length=2), nullable=False),
+            sa.Column("sequencial_documento", sa.Integer(), nullable=True),
+            sa.Column("data_criacao", sa.Date(), nullable=False),
+            sa.Column("nome", sa.String(length=500), nullable=False),
+            sa.Column("caminho_documento", sa.String(length=500), nullable=False),
+            sa.Column("observacao_documento", sa.String(length=500), nullable=True),
+            sa.Column("tipo_documento", sa.String(length=2), nullable=False),
+            sa.Column("guia_id", sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(["guia_id"], ["inovemed_tbl_guias.id"]),
+            sa.PrimaryKeyConstraint("id")
+        )
+
+    if "inovemed_tbl_procedimentos" not in tabelas:
+        op.create_table(
+            "inovemed_tbl_procedimentos",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("tabela", sa.String(length=2), nullable=False),
+            sa.Column("codigo", sa.String(length=10), nullable=False),
+            sa.Column("descricao", sa.String(length=150), nullable=False),
+            sa.Column("qtde_solicitada", sa.Integer(), nullable=False),
+            sa.Column(
+                "valor_unitario",
+                sa.Numeric(precision=8, scale=2),
+                nullable=False,
+            ),
+            sa.Column("qtde_autorizada", sa.Integer(), nullable=False),
+            sa.Column("guia_id", sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(["guia_id"], ["inovemed_tbl_guias.id"]),
+            sa.PrimaryKeyConstraint("id")
+        )
+
+    if "inovemed_tbl_diagnosticos" not in tabelas:
+        op.create_table(
+            "inovemed_tbl_diagnosticos",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("codigo", sa.String(length=4), nullable=False),
+            sa.Column("tipo", sa.String(length=1), nullable=False),
+            sa.Column("guia_id", sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(["guia_id"], ["inovemed_tbl_guias.id"]),
+            sa.PrimaryKeyConstraint("id")
+        )
+
+    if "inovemed_tbl_contadores_guias" not in tabelas:
+        op.create_table(
+            "inovemed_tbl_contadores_guias",
+            sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+            sa.Column("tp_status", sa.String(length=1), nullable=False),
+            sa.Column("status_consulta", sa.String(length=1), nullable=False),
+            sa.Column("status_monitoramento", sa.String(length=1), nullable=False),
+            sa.Column("quantidade", sa.Integer(), nullable=False),
+            sa.Column("data_atualizacao", sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint(
+                "tp_status",
+                "status_consulta",
+                "status_monitoramento",
+                name="uq_contadores_guias_status",
+            ),
+        )
+
+    if "inovemed_tbl_lideranca" not in tabelas:
+        op.create_table(
+            "inovemed_tbl_lideranca",
+            sa.Column("nome", sa.String(length=50), nullable=False),
+            sa.Column("dono", sa.String(length=120), nullable=False),
+            sa.Column("expira_em", sa.DateTime(), nullable=False),
+            sa.Column("data_atualizacao", sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint("nome")
+        )
+
+
+def downgrade():
+    op.drop_table("inovemed_tbl_lideranca")
+    op.drop_table("inovemed_tbl_contadores_guias")
+    op.drop_table("inovemed_tbl_diagnosticos")
+    op.drop_table("inovemed_tbl_procedimentos")
+    op.drop_table("inovemed_tbl_anexos")
+    op.drop_index("ix_inovemed_tbl_guias_numero_guia", table_name="inovemed_tbl_guias")
+    op.drop_table("inovemed_tbl_guias")
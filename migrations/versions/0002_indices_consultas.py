@@ -0,0 +1,81 @@
+"""Índices das consultas dos monitores e rotas
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 00:00:01
+
+Criação sem bloquear escritas na tabela de guias:
+- PostgreSQL: CREATE INDEX CONCURRENTLY (fora de transação)
+- Oracle: CREATE INDEX ... ONLINE
+- SQLite/Firebird: CREATE INDEX comum
+
+Índices já existentes (criados pelo create_all) são mantidos.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+# (nome, tabela, colunas)
+INDICES = (
+    ("ix_guias_tp_status_id", "inovemed_tbl_guias", ["tp_status", "id"]),
+    (
+        "ix_guias_tp_status_dt_proc",
+        "inovemed_tbl_guias",
+        ["tp_status", "data_processamento"],
+    ),
+    (
+        "ix_guias_status",
+        "inovemed_tbl_guias",
+        ["tp_status", "status_consulta", "status_monitoramento"],
+    ),
+    (
+        "ix_guias_status_monitoramento",
+        "inovemed_tbl_guias",
+        ["status_monitoramento"],
+    ),
+    ("ix_guias_dt_ultima_consulta", "inovemed_tbl_guias", ["data_ultima_consulta"]),
+    ("ix_guias_data_atualizacao", "inovemed_tbl_guias", ["data_atualizacao"]),
+    ("ix_anexos_guia_id", "inovemed_tbl_anexos", ["guia_id"]),
+    ("ix_procedimentos_guia_id", "inovemed_tbl_procedimentos", ["guia_id"]),
+    ("ix_diagnosticos_guia_id", "inovemed_tbl_diagnosticos", ["guia_id"]),
+)
+
+
+def _criar_indice(dialeto: str, nome: str, tabela: str, colunas: list):
+    if dialeto == "postgresql":
+        # CONCURRENTLY não pode rodar dentro de uma transação
+        with op.get_context().autocommit_block():
+            op.create_index(nome, tabela, colunas, postgresql_concurrently=True)
+    elif dialeto == "oracle":
+        op.execute(f"CREATE INDEX {nome} ON {tabela} ({', '.join(colunas)}) ONLINE")
+    else:
+        op.create_index(nome, tabela, colunas)
+
+
+def upgrade():
+    if op.get_context().as_sql:
+        # Modo offline (--sql): sem banco para inspecionar, gerar todos
+        existentes = set()
+    else:
+        inspetor = sa.inspect(op.get_bind())
+        existentes = {
+            indice["name"]
+            for tabela in {tabela for _, tabela, _ in INDICES}
+            for indice in inspetor.get_indexes(tabela)
+        }
+
+    dialeto = op.get_context().dialect.name
+    for nome, tabela, colunas in INDICES:
+        if nome not in existentes:
+            _criar_indice(dialeto, nome, tabela, colunas)
+
+
+def downgrade():
+    for nome, tabela, _ in reversed(INDICES):
+        op.drop_index(nome, table_name=tabela)
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark do middleware de segurança
+
+Mede o custo por requisição do SecurityMiddleware chamando-o diretamente com
+um scope ASGI e uma aplicação vazia (sem HTTP, sem FastAPI), comparando com a
+implementação anterior (Request por chamada, lista de caminhos e dicionário
+de contadores sem limite), reproduzida abaixo como referência.
+
+Uso:
+    python tests/benchmark_security_middleware.py [requisicoes]
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from fastapi import Request  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+
+from app.middleware.security import SecurityMiddleware  # noqa: E402
+
+# IPs distintos usados no benchmark (nenhum atinge o limite por hora)
+QUANTIDADE_IPS = 500
+
+
+class MiddlewareLegado:
+    """Implementação anterior do SecurityMiddleware (referência)"""
+
+    def __init__(self, app):
+        self.app = app
+        self.suspicious_paths = [
+            "/login",
+            "/admin",
+            "/wp-admin",
+            "/wp-login.php",
+            "/administrator",
+            "/phpmyadmin",
+            "/.env",
+            "/config",
+            "/backup",
+            "/test",
+            "/api/login",
+            "/api/admin",
+        ]
+        self.blocked_ips = set()
+        self.request_counts = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            request = Request(scope, receive)
+            client_ip = request.client.host
+            if client_ip in self.blocked_ips:
+                response = JSONResponse(status_code=403, content={})
+                await response(scope, receive, send)
+                return
+
+            if request.url.path in self.suspicious_paths:
+                logging.getLogger("security").warning(
+                    f"🚨 Tentativa suspeita detectada - IP: {client_ip} | "
+                    f"Path: {request.url.path} | "
+                    f"User-Agent: {request.headers.get('user-agent', 'Unknown')}"
+                )
+                response = JSONResponse(status_code=404, content={})
+                await response(scope, receive, send)
+                return
+
+            current_time = time.time()
+            if client_ip not in self.request_counts:
+                self.request_counts[client_ip] = {
+                    "count": 0,
+                    "reset_time": current_time + 3600,
+                }
+            if current_time > self.request_counts[client_ip]["reset_time"]:
+                self.request_counts[client_ip] = {
+                    "count": 0,
+                    "reset_time": current_time + 3600,
+                }
+            self.request_counts[client_ip]["count"] += 1
+            if self.request_counts[client_ip]["count"] > 1000:
+                self.blocked_ips.add(client_ip)
+                response = JSONResponse(status_code=429, content={})
+                await response(scope, receive, send)
+                return
+
+        await self.app(scope, receive, send)
+
+
+async def app_vazia(scope, receive, send):
+    """Aplicação ASGI que não faz nada (isola o custo do middleware)"""
+
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def send(message):
+    pass
+
+
+def montar_scope(path: str, ip: str) -> dict:
+    return {
+        "type": "http",
+        "method": "GET",
+        "scheme": "http",
+        "server": ("testserver", 80),
+        "client": (ip, 50000),
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"testserver"), (b"user-agent", b"benchmark")],
+    }
+
+
+async def medir(middleware, path: str, requisicoes: int) -> float:
+    """Retorna o custo médio por requisição em microssegundos"""
+    scopes = [
+        montar_scope(path, f"10.0.{i // 256}.{i % 256}") for i in range(QUANTIDADE_IPS)
+    ]
+
+    inicio = time.perf_counter()
+    for i in range(requisicoes):
+        await middleware(scopes[i % QUANTIDADE_IPS], receive, send)
+    return (time.perf_counter() - inicio) / requisicoes * 1_000_000
+
+
+def app_vazia_middleware():
+    """Chamada direta à aplicação vazia, para descontar o custo do laço"""
+
+    async def chamar(scope, receive, send):
+        await app_vazia(scope, receive, send)
+
+    return chamar
+
+
+async def executar(requisicoes: int):
+    base = await medir(app_vazia_middleware(), "/api/v1/guias", requisicoes)
+    print(f"📏 Aplicação vazia (sem middleware): {base:.2f} µs/req")
+    print()
+    print(f"{'Cenário':<36}{'Antes':>12}{'Depois':>12}")
+    print("-" * 60)
+
+    for descricao, path in (
+        ("Rota comum (/api/v1/guias)", "/api/v1/guias"),
+        ("Health check (/api/v1/health)", "/api/v1/health"),
+        ("Caminho suspeito (/wp-admin)", "/wp-admin"),
+    ):
+        antes = await medir(MiddlewareLegado(app_vazia), path, requisicoes)
+        depois = await medir(SecurityMiddleware(app_vazia), path, requisicoes)
+        print(f"{descricao:<36}{antes - base:>9.2f} µs{depois - base:>9.2f} µs")
+
+
+def main():
+    requisicoes = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+
+    # Não registrar os caminhos suspeitos durante a medição
+    logging.getLogger("security").setLevel(logging.CRITICAL)
+
+    print("⏱️ BENCHMARK DO MIDDLEWARE DE SEGURANÇA")
+    print("=" * 60)
+    print(f"Requisições por cenário: {requisicoes} ({QUANTIDADE_IPS} IPs)")
+    print()
+    asyncio.run(executar(requisicoes))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,549 @@
+#!/usr/bin/env python3
+"""
+Simulador local da API DRG para testes de carga e de latência
+
+Implementa os três contratos usados pelo DRGService, sem depender da API real:
+
+- POST /login: devolve o token como texto puro (userName/password/origin)
+- POST /integracao/guias/save: recebe loteGuias e responde
+  {"guias": [{"numeroGuia", "status", "erro"}]}
+- POST /guiainternacao/search: PULL das guias já recebidas, paginado
+  (numeroGuia e/ou dataUltimaAlteracao, 100 por página)
+
+Comportamentos configuráveis (linha de comando ou PUT /_config em execução):
+
+- Latência por distribuição: fixa:MS, uniforme:MIN,MAX, normal:MEDIA,DESVIO
+  ou lognormal:MEDIANA,SIGMA (milissegundos)
+- Injeção de falhas: 500/502/503 (--taxa-5xx) e 504 após um atraso
+  (--taxa-504, --atraso-504)
+- Expiração de token (--token-segundos): após o prazo, 401 "jwt expired"
+- Erros de validação por guia: numeroGuia iniciado por --prefixo-erro ou
+  sorteados com --taxa-erro-guia (status 200 com erro na guia, como a DRG)
+- Estatísticas das requisições em GET /_estatisticas (por rota: status,
+  latência p50/p95/p99, guias aceitas e rejeitadas, falhas injetadas)
+
+Para apontar a aplicação para o simulador, no .env:
+    AUTH_API_URL=http://127.0.0.1:9000/login
+    DRG_API_URL=http://127.0.0.1:9000/integracao/guias/save
+    DRG_API_PULL_URL=http://127.0.0.1:9000/guiainternacao/search
+
+Uso:
+    python tests/simulador_drg.py [--porta 9000] [--latencia lognormal:300,0.6]
+        [--taxa-5xx 0.01] [--taxa-504 0.01] [--token-segundos 600]
+        [--taxa-erro-guia 0.02] [--semente 42]
+"""
+
+import argparse
+import asyncio
+import math
+import random
+import secrets
+import string
+import time
+from collections import Counter, OrderedDict, deque
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+# Guias por página no PULL (limite da API real)
+GUIAS_POR_PAGINA = 100
+
+# Latências guardadas por rota para os percentis
+AMOSTRAS_LATENCIA = 10000
+
+# Rotas de negócio (as de controle, /_*, não entram nas estatísticas)
+ROTAS_DRG = ("/login", "/integracao/guias/save", "/guiainternacao/search")
+
+# Campos configuráveis em execução (PUT /_config)
+CAMPOS_CONFIG = (
+    "latencia",
+    "latencia_login",
+    "taxa_5xx",
+    "taxa_504",
+    "atraso_504",
+    "token_segundos",
+    "taxa_erro_guia",
+    "prefixo_erro",
+)
+
+
+class Latencia:
+    """Distribuição de latência em milissegundos, a partir de 'tipo:parametros'."""
+
+    TIPOS = ("fixa", "uniforme", "normal", "lognormal")
+
+    def __init__(self, especificacao: str, aleatorio: random.Random):
+        self.especificacao = especificacao
+        self.aleatorio = aleatorio
+
+        tipo, _, parametros = especificacao.partition(":")
+        if tipo not in self.TIPOS:
+            raise ValueError(
+                f"Distribuição inválida '{tipo}' (use {', '.join(self.TIPOS)})"
+            )
+        valores = [float(valor) for valor in parametros.split(",") if valor]
+        esperados = 1 if tipo == "fixa" else 2
+        if len(valores) != esperados:
+            raise ValueError(
+                f"'{tipo}' exige {esperados} parâmetro(s): {especificacao}"
+            )
+
+        self.tipo = tipo
+        self.valores = valores
+
+    def amostrar(self) -> float:
+        """Latência sorteada, em segundos (nunca negativa)."""
+        if self.tipo == "fixa":
+            ms = self.valores[0]
+        elif self.tipo == "uniforme":
+            ms = self.aleatorio.uniform(*self.valores)
+        elif self.tipo == "normal":
+            ms = self.aleatorio.gauss(*self.valores)
+        else:
+            mediana, sigma = self.valores
+            ms = self.aleatorio.lognormvariate(math.log(max(mediana, 0.001)), sigma)
+        return max(ms, 0.0) / 1000
+
+
+def _percentil(valores: List[float], fracao: float) -> Optional[float]:
+    if not valores:
+        return None
+    ordenados = sorted(valores)
+    indice = min(len(ordenados) - 1, int(round(fracao * (len(ordenados) - 1))))
+    return round(ordenados[indice] * 1000, 1)
+
+
+class Estatisticas:
+    """Contagem das requisições recebidas, por rota"""
+
+    def __init__(self):
+        self.zerar()
+
+    def zerar(self):
+        self.iniciado_em = time.monotonic()
+        self.por_status: Dict[str, Counter] = {rota: Counter() for rota in ROTAS_DRG}
+        self.latencias: Dict[str, deque] = {
+            rota: deque(maxlen=AMOSTRAS_LATENCIA) for rota in ROTAS_DRG
+        }
+        self.eventos: Counter = Counter()
+
+    def registrar(self, rota: str, status: int, duracao: float):
+        if rota in self.por_status:
+            self.por_status[rota][status] += 1
+            self.latencias[rota].append(duracao)
+
+    def resumo(self) -> Dict[str, Any]:
+        decorrido = time.monotonic() - self.iniciado_em
+        rotas = {}
+        for rota in ROTAS_DRG:
+            latencias = list(self.latencias[rota])
+            total = sum(self.por_status[rota].values())
+            rotas[rota] = {
+                "requisicoes": total,
+                "por_segundo": round(total / decorrido, 2) if decorrido else 0,
+                "por_status": {
+                    str(status): quantidade
+                    for status, quantidade in sorted(self.por_status[rota].items())
+                },
+                "latencia_ms": {
+                    "p50": _percentil(latencias, 0.50),
+                    "p95": _percentil(latencias, 0.95),
+                    "p99": _percentil(latencias, 0.99),
+                    "max": _percentil(latencias, 1.0),
+                },
+            }
+        return {
+            "segundos": round(decorrido, 1),
+            "rotas": rotas,
+            "eventos": dict(self.eventos),
+        }
+
+
+class SimuladorDRG:
+    """Estado do simulador: configuração, tokens emitidos e guias recebidas"""
+
+    def __init__(
+        self,
+        latencia: str = "fixa:0",
+        latencia_login: str = "fixa:0",
+        taxa_5xx: float = 0.0,
+        taxa_504: float = 0.0,
+        atraso_504: float = 0.0,
+        token_segundos: float = 4 * 3600,
+        taxa_erro_guia: float = 0.0,
+        prefixo_erro: str = "ERRO",
+        usuario: Optional[str] = None,
+        senha: Optional[str] = None,
+        api_key: Optional[str] = None,
+        max_guias: int = 100000,
+        semente: Optional[int] = None,
+    ):
+        self.aleatorio = random.Random(semente)
+        self.usuario = usuario
+        self.senha = senha
+        self.api_key = api_key
+        self.max_guias = max_guias
+
+        self.configurar(
+            {
+                "latencia": latencia,
+                "latencia_login": latencia_login,
+                "taxa_5xx": taxa_5xx,
+                "taxa_504": taxa_504,
+                "atraso_504": atraso_504,
+                "token_segundos": token_segundos,
+                "taxa_erro_guia": taxa_erro_guia,
+                "prefixo_erro": prefixo_erro,
+            }
+        )
+
+        # token -> instante de expiração (time.monotonic)
+        self.tokens: Dict[str, float] = {}
+        # numeroGuia -> guia no formato do PULL (as mais antigas saem primeiro)
+        self.guias: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.estatisticas = Estatisticas()
+
+    # ------------------------------------------------------------------
+    # Configuração
+    # ------------------------------------------------------------------
+
+    def configurar(self, valores: Dict[str, Any]):
+        """Aplica os campos informados (valida tudo antes de alterar)."""
+        if not isinstance(valores, dict):
+            raise ValueError("Configuração deve ser um objeto JSON")
+        desconhecidos = sorted(set(valores) - set(CAMPOS_CONFIG))
+        if desconhecidos:
+            raise ValueError(f"Campos desconhecidos: {', '.join(desconhecidos)}")
+
+        novos = {campo: valores[campo] for campo in CAMPOS_CONFIG if campo in valores}
+        for campo in ("latencia", "latencia_login"):
+            if campo in novos:
+                novos[campo] = Latencia(str(novos[campo]), self.aleatorio)
+        numericos = ("taxa_5xx", "taxa_504", "atraso_504", "token_segundos")
+        for campo in numericos + ("taxa_erro_guia",):
+            if campo in novos:
+                novos[campo] = float(novos[campo])
+        for campo in ("taxa_5xx", "taxa_504", "taxa_erro_guia"):
+            if campo in novos and not 0 <= novos[campo] <= 1:
+                raise ValueError(f"{campo} deve estar entre 0 e 1")
+
+        for campo, valor in novos.items():
+            setattr(self, campo, valor)
+
+    def configuracao(self) -> Dict[str, Any]:
+        config = {campo: getattr(self, campo) for campo in CAMPOS_CONFIG}
+        config["latencia"] = self.latencia.especificacao
+        config["latencia_login"] = self.latencia_login.especificacao
+        return config
+
+    # ------------------------------------------------------------------
+    # Tokens
+    # ------------------------------------------------------------------
+
+    def emitir_token(self) -> str:
+        agora = time.monotonic()
+        # Descartar tokens expirados há mais de um prazo (memória limitada)
+        for token, expira_em in list(self.tokens.items()):
+            if expira_em + self.token_segundos < agora:
+                del self.tokens[token]
+
+        token = secrets.token_urlsafe(32)
+        self.tokens[token] = agora + self.token_segundos
+        self.estatisticas.eventos["tokens_emitidos"] += 1
+        return token
+
+    def validar_token(self, request: Request) -> Optional[PlainTextResponse]:
+        """None se o token é válido; senão a resposta 401 (como a API real)."""
+        token = request.headers.get("authorization", "")
+        if token.lower().startswith("bearer "):
+            token = token[7:]
+        token = token.strip()
+
+        expira_em = self.tokens.get(token)
+        if expira_em is None:
+            self.estatisticas.eventos["tokens_invalidos"] += 1
+            return PlainTextResponse("Unauthorized: invalid token", status_code=401)
+        if time.monotonic() >= expira_em:
+            self.estatisticas.eventos["tokens_expirados"] += 1
+            return PlainTextResponse("jwt expired", status_code=401)
+        return None
+
+    # ------------------------------------------------------------------
+    # Latência e falhas
+    # ------------------------------------------------------------------
+
+    async def simular_rede(self, latencia: Latencia) -> Optional[PlainTextResponse]:
+        """Aplica a latência e, conforme as taxas, devolve uma falha injetada."""
+        sorteio = self.aleatorio.random()
+        if sorteio < self.taxa_504:
+            self.estatisticas.eventos["falhas_504"] += 1
+            await asyncio.sleep(self.atraso_504)
+            return PlainTextResponse("Gateway Timeout", status_code=504)
+
+        await asyncio.sleep(latencia.amostrar())
+
+        if sorteio < self.taxa_504 + self.taxa_5xx:
+            status = self.aleatorio.choice((500, 502, 503))
+            self.estatisticas.eventos[f"falhas_{status}"] += 1
+            return PlainTextResponse(
+                {500: "Internal Server Error", 502: "Bad Gateway"}.get(
+                    status, "Service Unavailable"
+                ),
+                status_code=status,
+            )
+        return None
+
+    # ------------------------------------------------------------------
+    # Guias
+    # ------------------------------------------------------------------
+
+    def validar_guia(self, guia: Any) -> Optional[str]:
+        """Mensagem de erro de validação da guia (None se aceita)."""
+        if not isinstance(guia, dict) or not guia.get("numeroGuia"):
+            return "Campo obrigatório numeroGuia não foi informado"
+        if str(guia["numeroGuia"]).startswith(self.prefixo_erro):
+            return f"Beneficiário da guia {guia['numeroGuia']} não cadastrado no DRG"
+        if self.aleatorio.random() < self.taxa_erro_guia:
+            return f"Validação: CID da guia {guia['numeroGuia']} inválido"
+        return None
+
+    def registrar_guia(self, guia: Dict[str, Any]):
+        """Guarda a guia aceita no formato devolvido pelo PULL."""
+        numero = str(guia["numeroGuia"])
+        self.guias.pop(numero, None)
+        self.guias[numero] = {
+            "numeroGuia": numero,
+            "situacaoGuia": "A",
+            "senhaAutorizacao": "".join(
+                self.aleatorio.choices(string.digits, k=9)
+            ),
+            "dataAutorizacao": date.today().isoformat(),
+            "qtdeDiariasAutorizadas": guia.get("diariasSolicitadas"),
+            "tipoAcomodacaoAutorizada": guia.get("tipoAcomodacaoSolicitada"),
+            "dataUltimaAlteracao": date.today().isoformat(),
+        }
+        while len(self.guias) > self.max_guias:
+            self.guias.popitem(last=False)
+
+    def buscar_guias(self, filtros: Dict[str, Any]) -> Dict[str, Any]:
+        """Página de guias filtradas por numeroGuia e/ou dataUltimaAlteracao."""
+        numeros = filtros.get("numeroGuia") or []
+        if isinstance(numeros, str):
+            numeros = [numeros]
+        desde = filtros.get("dataUltimaAlteracao")
+        pagina = max(int(filtros.get("page") or 1), 1)
+
+        if numeros:
+            encontradas = [self.guias[n] for n in numeros if n in self.guias]
+        else:
+            encontradas = list(self.guias.values())
+        if desde:
+            encontradas = [g for g in encontradas if g["dataUltimaAlteracao"] >= desde]
+
+        inicio = (pagina - 1) * GUIAS_POR_PAGINA
+        return {
+            "guias": encontradas[inicio : inicio + GUIAS_POR_PAGINA],
+            "page": pagina,
+            "totalElements": len(encontradas),
+            "totalPages": math.ceil(len(encontradas) / GUIAS_POR_PAGINA),
+        }
+
+
+def criar_app(simulador: SimuladorDRG) -> FastAPI:
+    """Aplicação FastAPI do simulador (também utilizável com TestClient)."""
+    app = FastAPI(title="Simulador DRG", docs_url="/_docs", redoc_url=None)
+
+    @app.middleware("http")
+    async def registrar_requisicao(request: Request, call_next):
+        inicio = time.perf_counter()
+        response = await call_next(request)
+        simulador.estatisticas.registrar(
+            request.url.path, response.status_code, time.perf_counter() - inicio
+        )
+        return response
+
+    @app.post("/login")
+    async def login(request: Request):
+        await asyncio.sleep(simulador.latencia_login.amostrar())
+        if simulador.api_key and (
+            request.headers.get("authorization") != f"Bearer {simulador.api_key}"
+        ):
+            return PlainTextResponse("Forbidden: invalid api key", status_code=403)
+
+        try:
+            dados = await request.json()
+        except ValueError:
+            return PlainTextResponse("Bad Request", status_code=400)
+        if not isinstance(dados, dict) or not dados.get("userName"):
+            return PlainTextResponse(
+                "Bad Request: userName obrigatório", status_code=400
+            )
+        if (simulador.usuario and dados.get("userName") != simulador.usuario) or (
+            simulador.senha and dados.get("password") != simulador.senha
+        ):
+            return PlainTextResponse("Usuário ou senha inválidos", status_code=401)
+
+        return PlainTextResponse(simulador.emitir_token())
+
+    @app.post("/integracao/guias/save")
+    async def salvar_guias(request: Request):
+        negado = simulador.validar_token(request)
+        if negado:
+            return negado
+        falha = await simulador.simular_rede(simulador.latencia)
+        if falha:
+            return falha
+
+        try:
+            dados = await request.json()
+            guias = dados["loteGuias"]["guia"]
+        except (ValueError, KeyError, TypeError):
+            return JSONResponse(
+                {"erro": "Requisição inválida: loteGuias.guia não informado"},
+                status_code=400,
+            )
+
+        resultado = []
+        for guia in guias:
+            numero = guia.get("numeroGuia") if isinstance(guia, dict) else None
+            erro = simulador.validar_guia(guia)
+            if erro:
+                simulador.estatisticas.eventos["guias_rejeitadas"] += 1
+            else:
+                simulador.registrar_guia(guia)
+                simulador.estatisticas.eventos["guias_aceitas"] += 1
+            resultado.append(
+                {
+                    "numeroGuia": numero,
+                    "status": "erro" if erro else "sucesso",
+                    "erro": erro,
+                }
+            )
+        return {"guias": resultado}
+
+    @app.post("/guiainternacao/search")
+    async def buscar_guias(request: Request):
+        negado = simulador.validar_token(request)
+        if negado:
+            return negado
+        if simulador.api_key and request.headers.get("x-api-key") != simulador.api_key:
+            return PlainTextResponse("Forbidden: invalid x-api-key", status_code=403)
+        falha = await simulador.simular_rede(simulador.latencia)
+        if falha:
+            return falha
+
+        try:
+            filtros = await request.json()
+        except ValueError:
+            return PlainTextResponse("Bad Request", status_code=400)
+        if not isinstance(filtros, dict):
+            return PlainTextResponse("Bad Request", status_code=400)
+        if not filtros.get("numeroGuia") and not filtros.get("dataUltimaAlteracao"):
+            return JSONResponse(
+                {"erro": "Informe numeroGuia ou dataUltimaAlteracao"}, status_code=400
+            )
+        return simulador.buscar_guias(filtros)
+
+    @app.get("/_estatisticas")
+    async def estatisticas():
+        agora = time.monotonic()
+        return {
+            **simulador.estatisticas.resumo(),
+            "guias_armazenadas": len(simulador.guias),
+            "tokens_ativos": sum(
+                1 for expira_em in simulador.tokens.values() if expira_em > agora
+            ),
+            "config": simulador.configuracao(),
+            "timestamp": datetime.utcnow().isoformat(),
+        }
+
+    @app.post("/_estatisticas/zerar")
+    async def zerar_estatisticas():
+        simulador.estatisticas.zerar()
+        return {"sucesso": True}
+
+    @app.get("/_config")
+    async def obter_config():
+        return simulador.configuracao()
+
+    @app.put("/_config")
+    async def alterar_config(request: Request):
+        try:
+            simulador.configurar(await request.json())
+        except (ValueError, TypeError) as e:
+            return JSONResponse({"sucesso": False, "erro": str(e)}, status_code=400)
+        return {"sucesso": True, "config": simulador.configuracao()}
+
+    @app.post("/_tokens/expirar")
+    async def expirar_tokens():
+        """Expira todos os tokens emitidos (testa a renovação forçada)."""
+        for token in simulador.tokens:
+            simulador.tokens[token] = 0.0
+        return {"sucesso": True, "tokens": len(simulador.tokens)}
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulador local da API DRG")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=9000)
+    parser.add_argument(
+        "--latencia",
+        default="fixa:0",
+        help="Latência do save/search: fixa:MS | uniforme:MIN,MAX | "
+        "normal:MEDIA,DESVIO | lognormal:MEDIANA,SIGMA",
+    )
+    parser.add_argument("--latencia-login", default="fixa:0")
+    parser.add_argument("--taxa-5xx", type=float, default=0.0, help="0 a 1")
+    parser.add_argument("--taxa-504", type=float, default=0.0, help="0 a 1")
+    parser.add_argument(
+        "--atraso-504", type=float, default=0.0, help="Segundos antes de responder 504"
+    )
+    parser.add_argument("--token-segundos", type=float, default=4 * 3600)
+    parser.add_argument("--taxa-erro-guia", type=float, default=0.0, help="0 a 1")
+    parser.add_argument("--prefixo-erro", default="ERRO")
+    parser.add_argument("--usuario", help="Exigir este userName no login")
+    parser.add_argument("--senha", help="Exigir esta password no login")
+    parser.add_argument("--api-key", help="Exigir esta API key (login e PULL)")
+    parser.add_argument("--max-guias", type=int, default=100000)
+    parser.add_argument("--semente", type=int, help="Semente dos sorteios")
+    args = parser.parse_args()
+
+    try:
+        simulador = SimuladorDRG(
+            latencia=args.latencia,
+            latencia_login=args.latencia_login,
+            taxa_5xx=args.taxa_5xx,
+            taxa_504=args.taxa_504,
+            atraso_504=args.atraso_504,
+            token_segundos=args.token_segundos,
+            taxa_erro_guia=args.taxa_erro_guia,
+            prefixo_erro=args.prefixo_erro,
+            usuario=args.usuario,
+            senha=args.senha,
+            api_key=args.api_key,
+            max_guias=args.max_guias,
+            semente=args.semente,
+        )
+    except ValueError as e:
+        parser.error(str(e))
+
+    base = f"http://{args.host}:{args.porta}"
+    print("🧪 SIMULADOR DRG")
+    print("=" * 60)
+    print(f"AUTH_API_URL={base}/login")
+    print(f"DRG_API_URL={base}/integracao/guias/save")
+    print(f"DRG_API_PULL_URL={base}/guiainternacao/search")
+    print(f"📊 Estatísticas: {base}/_estatisticas")
+
+    uvicorn.run(
+        criar_app(simulador), host=args.host, port=args.porta, log_level="warning"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Verificação dos planos de execução das consultas frequentes (SQLite)
+
+Cria as tabelas dos modelos em um banco SQLite em memória e executa
+EXPLAIN QUERY PLAN nas consultas dos monitores e das rotas, conferindo que
+cada uma usa o índice esperado. Serve como teste de regressão: se um índice
+for removido do modelo ou uma consulta mudar a ponto de não usá-lo mais, o
+script termina com código 1.
+
+As consultas são montadas pelos mesmos métodos que os serviços e as rotas
+executam (monitor_service.consulta_pendentes, estatisticas_service.
+consulta_contagens, ...), então o plano verificado é o da consulta real.
+
+Uso:
+    python tests/verificar_indices.py
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from alembic.script import ScriptDirectory  # noqa: E402
+from sqlalchemy import create_engine, inspect, select  # noqa: E402
+from sqlalchemy.orm import with_parent  # noqa: E402
+
+from app.database.database import Base  # noqa: E402
+from app.database.migracoes import aplicar_migracoes, configuracao_alembic  # noqa: E402
+from app.models import Anexo, Diagnostico, Guia, Procedimento  # noqa: E402
+from app.routes.fastapi_routes import (  # noqa: E402
+    COLUNAS_LISTAGEM,
+    _consulta_guias_com_erro,
+    _consulta_listagem,
+)
+from app.services.consulta_externa_service import consulta_externa_service  # noqa: E402
+from app.services.estatisticas_service import estatisticas_service  # noqa: E402
+from app.services.exportacao_service import (  # noqa: E402
+    CAMPOS_PADRAO,
+    exportacao_service,
+)
+from app.services.monitor_campos_service import monitor_campos_service  # noqa: E402
+from app.services.monitor_pull_service import monitor_pull_service  # noqa: E402
+from app.services.monitor_service import monitor_service  # noqa: E402
+
+AGORA = datetime.utcnow()
+ONTEM = AGORA - timedelta(days=1)
+
+# Qualquer índice iniciado por tp_status atende às buscas por igualdade de status
+INDICES_TP_STATUS = (
+    "ix_guias_tp_status_id",
+    "ix_guias_tp_status_dt_proc",
+    "ix_guias_status",
+)
+
+# Guia já gravada, para as cargas dos relacionamentos (guia.anexos, ...)
+GUIA = Guia(id=1)
+
+
+def pendentes(auto_reprocess: bool):
+    """Consulta do monitor de envio com AUTO_REPROCESS ligado ou desligado."""
+    anterior = monitor_service.auto_reprocess
+    monitor_service.auto_reprocess = auto_reprocess
+    try:
+        return monitor_service.consulta_pendentes()
+    finally:
+        monitor_service.auto_reprocess = anterior
+
+
+# (descrição, consulta, índice(s) aceito(s) no plano)
+CONSULTAS = [
+    (
+        "Monitor de envio: guias aguardando (primeira tentativa)",
+        pendentes(auto_reprocess=False),
+        INDICES_TP_STATUS,
+    ),
+    (
+        "Monitor de envio: aguardando ou com erro retentável",
+        pendentes(auto_reprocess=True),
+        INDICES_TP_STATUS,
+    ),
+    (
+        "Monitor PULL: transmitidas desde data_processamento",
+        monitor_pull_service.consulta_enviadas(ONTEM),
+        "ix_guias_tp_status_dt_proc",
+    ),
+    (
+        "Monitor de campos: guias em monitoramento",
+        monitor_campos_service.consulta_monitoradas(),
+        "ix_guias_status_monitoramento",
+    ),
+    (
+        "Estatísticas: contagem por status",
+        estatisticas_service.consulta_contagens(ONTEM),
+        "ix_guias_status",
+    ),
+    (
+        "Estatísticas: consultas nas últimas 24h (contadores habilitados)",
+        estatisticas_service.consulta_recentes(ONTEM),
+        "ix_guias_dt_ultima_consulta",
+    ),
+    (
+        "GET /guias?status=E&apos_id=... (keyset)",
+        _consulta_listagem(COLUNAS_LISTAGEM, "E", 1000, 0, 100),
+        "ix_guias_tp_status_id",
+    ),
+    (
+        "GET /monitoramento: erros com 2+ tentativas",
+        _consulta_guias_com_erro(),
+        INDICES_TP_STATUS,
+    ),
+    (
+        "GET /guias/export por janela de atualização",
+        exportacao_service.montar_consulta(CAMPOS_PADRAO, {}, ONTEM, AGORA),
+        "ix_guias_data_atualizacao",
+    ),
+    (
+        "Consulta externa: guia por numero_guia",
+        consulta_externa_service.consulta_por_numero("123"),
+        "ix_inovemed_tbl_guias_numero_guia",
+    ),
+    (
+        "Anexos da guia (guia.anexos)",
+        select(Anexo).where(with_parent(GUIA, Guia.anexos)),
+        "ix_anexos_guia_id",
+    ),
+    (
+        "Procedimentos da guia (guia.procedimentos)",
+        select(Procedimento).where(with_parent(GUIA, Guia.procedimentos)),
+        "ix_procedimentos_guia_id",
+    ),
+    (
+        "Diagnósticos da guia (guia.diagnosticos)",
+        select(Diagnostico).where(with_parent(GUIA, Guia.diagnosticos)),
+        "ix_diagnosticos_guia_id",
+    ),
+]
+
+
+def plano(conexao, consulta) -> list:
+    compilada = consulta.compile(
+        dialect=conexao.dialect, compile_kwargs={"render_postcompile": True}
+    )
+    parametros = tuple(compilada.params[nome] for nome in compilada.positiontup)
+    linhas = conexao.exec_driver_sql(
+        f"EXPLAIN QUERY PLAN {compilada}", parametros
+    ).fetchall()
+    return [linha[-1] for linha in linhas]
+
+
+def verificar_criacao_em_banco_existente() -> bool:
+    """Banco existente sem os índices das consultas recebe todos pela migração 0002."""
+    indices_0002 = (
+        ScriptDirectory.from_config(configuracao_alembic())
+        .get_revision("0002")
+        .module.INDICES
+    )
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conexao:
+        for nome, _, _ in indices_0002:
+            conexao.exec_driver_sql(f"DROP INDEX {nome}")
+
+    aplicar_migracoes(engine)
+    inspetor = inspect(engine)
+    existentes = {
+        indice["name"]
+        for tabela in Base.metadata.sorted_tables
+        for indice in inspetor.get_indexes(tabela.name)
+    }
+    esperados = {
+        indice.name
+        for tabela in Base.metadata.sorted_tables
+        for indice in tabela.indexes
+    }
+    ok = esperados <= existentes
+    print(
+        f"{'✅' if ok else '❌'} Banco existente: {len(indices_0002)} índices "
+        f"recriados pela migração 0002 (faltando: "
+        f"{sorted(esperados - existentes) or 'nenhum'})"
+    )
+    return ok
+
+
+def main():
+    print("🔍 VERIFICAÇÃO DE ÍNDICES (EXPLAIN QUERY PLAN)")
+    print("=" * 60)
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+
+    falhas = 0
+    with engine.connect() as conexao:
+        for descricao, consulta, indices in CONSULTAS:
+            if isinstance(indices, str):
+                indices = (indices,)
+            detalhes = plano(conexao, consulta)
+            usa_indice = any(
+                f"INDEX {indice}" in detalhe for detalhe in detalhes for indice in indices
+            )
+            print(f"{'✅' if usa_indice else '❌'} {descricao}")
+            if not usa_indice:
+                falhas += 1
+                print(f"   esperado: {' ou '.join(indices)}")
+                for detalhe in detalhes:
+                    print(f"   plano: {detalhe}")
+
+    if not verificar_criacao_em_banco_existente():
+        falhas += 1
+
+    print()
+    if falhas:
+        print(f"❌ {falhas} verificação(ões) falharam")
+        return 1
+    print(f"🎉 Todas as {len(CONSULTAS) + 1} verificações passaram")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Verificação das migrações do Alembic (SQLite)
+
+Aplica `upgrade head` (pelo mesmo caminho de DATABASE_INIT_MODE=migrate) em um
+banco SQLite vazio e compara o esquema resultante com os modelos
+(Base.metadata) usando o autogenerate do Alembic: qualquer tabela, coluna ou
+índice que exista só de um lado é uma divergência. Também confere que um
+segundo upgrade não faz nada e que o downgrade até a base funciona. O
+create_all cria o esquema direto dos modelos, então só esta verificação pega
+erros nas revisões. Termina com código 1 se falhar.
+
+Uso:
+    python tests/verificar_migracoes.py
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from alembic import command  # noqa: E402
+from alembic.autogenerate import compare_metadata  # noqa: E402
+from alembic.migration import MigrationContext  # noqa: E402
+from sqlalchemy import create_engine, inspect  # noqa: E402
+
+from app.database.database import Base  # noqa: E402
+from app.database.migracoes import aplicar_migracoes, configuracao_alembic  # noqa: E402
+import app.models  # noqa: E402,F401
+
+
+def divergencias(engine) -> list:
+    with engine.connect() as conexao:
+        contexto = MigrationContext.configure(
+            conexao, opts={"compare_type": True, "target_metadata": Base.metadata}
+        )
+        return [
+            diferenca
+            for diferenca in compare_metadata(contexto, Base.metadata)
+            # Tabela de controle do próprio Alembic
+            if not (
+                diferenca[0] == "remove_table"
+                and diferenca[1].name == "alembic_version"
+            )
+        ]
+
+
+def main():
+    print("🔍 VERIFICAÇÃO DAS MIGRAÇÕES (SQLite vazio -> head)")
+    print("=" * 60)
+    falhas = 0
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        url = f"sqlite:///{os.path.join(diretorio, 'migracoes.db')}"
+        engine = create_engine(url)
+
+        try:
+            aplicar_migracoes(engine)
+            print("✅ upgrade head em banco vazio")
+        except Exception as e:
+            print(f"❌ upgrade head em banco vazio: {e}")
+            return 1
+
+        diferencas = divergencias(engine)
+        print(f"{'✅' if not diferencas else '❌'} Esquema igual aos modelos")
+        for diferenca in diferencas:
+            print(f"   divergência: {diferenca}")
+        falhas += bool(diferencas)
+
+        try:
+            aplicar_migracoes(engine)
+            print("✅ Segundo upgrade head sem alterações")
+        except Exception as e:
+            print(f"❌ Segundo upgrade head: {e}")
+            falhas += 1
+
+        config = configuracao_alembic()
+        with engine.connect() as conexao:
+            config.attributes["connection"] = conexao
+            command.downgrade(config, "base")
+        restantes = set(inspect(engine).get_table_names()) - {"alembic_version"}
+        print(
+            f"{'✅' if not restantes else '❌'} downgrade base "
+            f"(tabelas restantes: {sorted(restantes) or 'nenhuma'})"
+        )
+        falhas += bool(restantes)
+        engine.dispose()
+
+    print()
+    if falhas:
+        print(f"❌ {falhas} verificação(ões) falharam")
+        return 1
+    print("🎉 Migrações consistentes com os modelos")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())